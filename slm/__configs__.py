@@ -47,6 +47,8 @@ __valid_configs__ = [
   ('report-include-summary', False, 'Flag: Include summary page in reports'),
   ('report-strip-licenseref', False, 'Remove "LicenseRef-" tags from licenses in reports?'),
   ('report-pretty-print', False, 'Flag: Add pretty-printing whitespace to JSON reports'),
+  ('report-xlsx-split-categories', False, 'Flag: Write each category to its own xlsx workbook, alongside a summary workbook'),
+  ('report-rollup-dirs', False, 'Flag: In xlsx and JSON reports, list each directory whose files all have the same license as a single row'),
 ]
 
 def isValidConfigKey(key):
@@ -0,0 +1,190 @@
+# batchImporter.py
+#
+# Module for spdxLicenseManager to import many SPDX tag-value files as
+# scans in one run, parsing them concurrently.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from .projectdb import ProjectDBInsertError
+from .tvImporter import TVImporter
+from .tvParser import TVParser
+from .tvReader import TVReader
+
+class BatchImportError(Exception):
+  """Exception raised for errors in reading, parsing or importing an SPDX
+  file.
+
+  Attributes:
+    message -- explanation of the error
+  """
+  def __init__(self, message):
+    # passed on so that the error can be pickled back from a worker process
+    super(BatchImportError, self).__init__(message)
+    self.message = message
+
+def parseSPDXFile(spdx_path):
+  """
+  Read and parse an SPDX tag-value file, and return its list of parsed
+  file data. Raises BatchImportError if the file can't be read or parsed,
+  or has no file data.
+  """
+  try:
+    with open(spdx_path, 'r') as f:
+      # read in the tag-value pairs line-by-line
+      reader = TVReader()
+      for line in f:
+        reader.readNextLine(line)
+      tvList = reader.finalize()
+  except FileNotFoundError:
+    raise BatchImportError(f"File not found: {spdx_path}")
+  # check for errors
+  if reader.isError():
+    raise BatchImportError(f"Error reading {spdx_path}: {reader.errorMessage}")
+
+  # parse the tag-value pairs
+  parser = TVParser()
+  for tag, value in tvList:
+    parser.parseNextPair(tag, value)
+  fdList = parser.finalize()
+  # check for errors
+  if parser.isError():
+    raise BatchImportError(f"Error parsing {spdx_path}: {parser.errorMessage}")
+  # empty list means no file data found
+  if fdList == []:
+    raise BatchImportError(f"Error parsing {spdx_path}: No file data found")
+  return fdList
+
+def getImporterFailureMessage(importer):
+  """Explain why importer failed to check a file data list."""
+  # failed because of unknown licenses?
+  if importer.licensesUnknown != []:
+    message = "The following unknown licenses were detected:\n=====\n"
+    for lic in importer.licensesUnknown:
+      message += f"{lic}\n"
+    message += "=====\nFor each, run 'slm add-license' or 'slm add-conversion' before importing."
+    return message
+
+  # failed because of duplicate paths?
+  if importer.pathDuplicates != []:
+    message = "The following duplicate file paths were detected:\n=====\n"
+    for path in importer.pathDuplicates:
+      message += f"{path}\n"
+    message += "=====\nAll duplicates should be removed from the SPDX file before importing."
+    return message
+
+  return "Unknown error checking file data"
+
+def importFileDataList(db, fdList, subproject, scan_dt, desc):
+  """
+  Check a parsed file data list and import it as a new scan. The scan and
+  its files are committed together, so a failed import leaves no scan
+  behind. Returns (scan_id, count); raises BatchImportError on failure.
+  """
+  importer = TVImporter()
+  if not importer.checkFileDataList(fdList=fdList, db=db):
+    raise BatchImportError(getImporterFailureMessage(importer))
+  try:
+    scan_id = db.addScan(subproject=subproject, scan_dt_str=scan_dt,
+      desc=desc, commit=False)
+    importer.importFileDataList(fdList=fdList, db=db, scan_id=scan_id)
+  except ProjectDBInsertError as e:
+    db.session.rollback()
+    raise BatchImportError(e.message)
+  return (scan_id, importer.getImportedCount())
+
+def getRetrievedImportTasks(retriever):
+  """
+  Return a BatchImporter task for each file that retriever moved, for its
+  subproject and dated from its new name, which always ends in
+  YYYY-MM-DD.spdx.
+  """
+  tasks = []
+  for _id, name, srcPath, dstPath in retriever.results["success"]:
+    scan_dt = os.path.basename(dstPath)[-15:-5]
+    desc = f"retrieved from {os.path.basename(srcPath)}"
+    tasks.append((name, dstPath, scan_dt, desc))
+  return tasks
+
+class BatchImporter:
+  """Imports a sequence of SPDX files as new scans. With more than one job,
+  the files are read and parsed in worker processes, since parsing is
+  CPU-bound Python; the calling process is the only one that writes to the
+  project database, and imports each file as soon as it and every file
+  before it have been parsed. At most twice as many files as there are
+  jobs are parsed ahead of the import, to bound memory use."""
+
+  def __init__(self, db, jobs=1):
+    super(BatchImporter, self).__init__()
+    self.db = db
+    self.jobs = jobs
+
+  ##### Main batch importing functions
+  ##### External usage shouldn't require calling anything except these
+
+  def run(self, tasks):
+    """
+    Import each (subproject, spdx_path, scan_dt, desc) task. Returns a
+    (scan_id, count, error) tuple for each task, in the same order; a file
+    that fails has scan_id None and an error message, and doesn't stop
+    the remaining files from being imported.
+    """
+    outcomes = [None] * len(tasks)
+
+    # with one job or one file there is nothing to run concurrently
+    if self.jobs == 1 or len(tasks) < 2:
+      for i, task in enumerate(tasks):
+        try:
+          fdList = parseSPDXFile(task[1])
+        except BatchImportError as e:
+          outcomes[i] = (None, 0, e.message)
+          continue
+        outcomes[i] = self._importTask(task, fdList)
+      return outcomes
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+      for i, task in enumerate(tasks):
+        pending.append((i, task, executor.submit(parseSPDXFile, task[1])))
+        # import the oldest parsed file before parsing too far ahead
+        while len(pending) > self.jobs * 2:
+          self._collect(pending.popleft(), outcomes)
+      while pending:
+        self._collect(pending.popleft(), outcomes)
+    return outcomes
+
+  ##### Helper functions
+
+  def _collect(self, item, outcomes):
+    i, task, future = item
+    try:
+      fdList = future.result()
+    except BatchImportError as e:
+      outcomes[i] = (None, 0, e.message)
+      return
+    outcomes[i] = self._importTask(task, fdList)
+
+  def _importTask(self, task, fdList):
+    subproject, spdx_path, scan_dt, desc = task
+    try:
+      scan_id, count = importFileDataList(self.db, fdList, subproject,
+        scan_dt, desc)
+    except BatchImportError as e:
+      return (None, 0, e.message)
+    return (scan_id, count, None)
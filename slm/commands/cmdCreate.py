@@ -24,6 +24,7 @@ import click
 
 from .helperContext import extractContext
 from ..projectdb import ProjectDB
+from ..statusIndex import StatusIndex
 
 def createNewProjectDirs(slmhome, pname):
   dirPath = os.path.abspath(os.path.join(slmhome, "projects", pname))
@@ -112,6 +113,7 @@ def cmdCreateSubproject(ctx, spname, spdesc):
 
   # update project config object
   db.addSubproject(spname, spdesc)
+  StatusIndex(slmhome).recordSubproject(project, spname)
 
   db.closeDB()
 
@@ -21,14 +21,23 @@ import os
 import sys
 import click
 
-from .helperContext import extractContext
+from .helperContext import addMissingIndexes, extractContext
 from ..reports.analysis import Analyzer
-from ..reports.common import ReportFileError
-from ..reports.json import JSONReporter
+from ..reports.common import (REPORT_EXTENSIONS, ReportFileError,
+  cleanOrphanedTempFiles)
+from ..reports.csv import CSVReporter
+from ..reports.json import JSONCompactReporter, JSONReporter, NDJSONReporter
+from ..reports.sqlite import SQLiteReporter
 from ..reports.xlsx import XlsxReporter
+from ..projectdb import ProjectDBQueryError
+from ..statusIndex import StatusIndex
+
+# report formats that can roll up directories
+ROLLUP_FORMATS = ["xlsx", "json"]
 
 def cmdCreateReport(ctx, subproject, scan_id=None, scan_ids=None,
-  report_path=None, report_format='xlsx', no_summary=False, force=False):
+  report_path=None, report_format='xlsx', no_summary=False, force=False,
+  streaming=False, rollup=False):
 
   slmhome, mainconfig, project, db = extractContext(ctx)
 
@@ -44,7 +53,17 @@ def cmdCreateReport(ctx, subproject, scan_id=None, scan_ids=None,
   kwConfig = {}
   if no_summary:
     kwConfig['report-include-summary'] = 'no'
+  if rollup:
+    if report_format not in ROLLUP_FORMATS:
+      sys.exit(f"Directory roll-up is only available for xlsx and json reports.")
+    kwConfig['report-rollup-dirs'] = 'yes'
+  # rolled-up reporters need every file up front, and may read the
+  # results more than once, so the analysis is never streamed when
+  # directories are rolled up, whether by flag or by the project's config
+  if report_format in ROLLUP_FORMATS and _getRollupConfig(db, kwConfig) == "yes":
+    streaming = False
 
+  addMissingIndexes(db)
   analyzer = Analyzer(db=db)
 
   # confirm that scan with this ID exists
@@ -58,7 +77,8 @@ def cmdCreateReport(ctx, subproject, scan_id=None, scan_ids=None,
     if report_path is None:
       subproject_name = scan.subproject.name
       scan_dt_str = scan.scan_dt.strftime("%Y-%m-%d")
-      filename = f"{subproject_name}-{scan_dt_str}.{report_format}"
+      ext = REPORT_EXTENSIONS.get(report_format, report_format)
+      filename = f"{subproject_name}-{scan_dt_str}.{ext}"
       report_path = os.path.join(slmhome, "projects", project, "subprojects",
         subproject_name, "reports", filename)
 
@@ -69,26 +89,54 @@ def cmdCreateReport(ctx, subproject, scan_id=None, scan_ids=None,
       if scan is None:
         sys.exit(f"Scan ID {s_id} does not exist.")
 
-  results = analyzer.runAnalysis(scan_ids=scan_ids_list)
+  # in streaming mode, files are read from the database while the report
+  # is written, rather than all being loaded first
+  analyzer.runAnalysis(scan_ids=scan_ids_list, streaming=streaming)
+  results = analyzer.getResults()
 
   reporter = None
   if report_format == 'xlsx':
     reporter = XlsxReporter(db=db, config=kwConfig)
-    reporter.setResults(results)
+    reporter.setResults(results, streaming=streaming)
     reporter.generate()
   elif report_format == 'json':
     reporter = JSONReporter(db=db, config=kwConfig)
-    # JSON reports must get results as a reformatted list
-    listResults = analyzer.getResultsAsList()
-    reporter.setResults(listResults)
+    reporter.setResults(results)
+  elif report_format == 'json-compact':
+    reporter = JSONCompactReporter(db=db, config=kwConfig)
+    reporter.setResults(results)
+  elif report_format == 'ndjson':
+    reporter = NDJSONReporter(db=db, config=kwConfig)
+    reporter.setResults(results)
+  elif report_format == 'csv':
+    reporter = CSVReporter(db=db, config=kwConfig)
+    reporter.setResults(results)
+  elif report_format == 'sqlite':
+    reporter = SQLiteReporter(db=db, config=kwConfig)
+    reporter.setResults(results)
   else:
     sys.exit(f"Unknown report format: {report_format}")
 
+  # remove anything left behind by an earlier run that was killed
+  cleanOrphanedTempFiles(os.path.dirname(os.path.abspath(report_path)))
+
   try:
     reporter.save(path=report_path, replace=force)
+    StatusIndex(slmhome).recordPaths(project, [report_path])
   except ReportFileError as e:
     if "File already exists" in str(e):
       sys.exit(f"File already exists at {report_path} (use -f to force overwrite)")
 
   # and confirm success
   click.echo(f"Report successfully created at {report_path}.")
+
+##### Helper functions
+
+def _getRollupConfig(db, kwConfig):
+  value = kwConfig.get('report-rollup-dirs', None)
+  if value is not None:
+    return str(value).lower()
+  try:
+    return str(db.getConfigValue('report-rollup-dirs')).lower()
+  except ProjectDBQueryError:
+    return ""
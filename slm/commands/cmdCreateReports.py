@@ -20,60 +20,160 @@
 import os
 import sys
 import click
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import time
 
-from .helperContext import extractContext
-from ..reports.analysis import Analyzer
-from ..reports.common import ReportFileError
-from ..reports.json import JSONReporter
-from ..reports.xlsx import XlsxReporter
+from .helperContext import addMissingIndexes, extractContext
+from ..reports.common import (REPORT_EXTENSIONS, ReportFileError,
+  cleanOrphanedTempFiles)
+from ..reports.freshness import ReportFingerprinter, ReportManifest
+from ..reports.pipeline import (REPORTERS, ReportPipeline, createScanReports,
+  newStageTimings, STAGES)
+from ..projectdb import ProjectDB, ProjectDBQueryError
+from ..statusIndex import StatusIndex
 
-def cmdCreateReports(ctx, force=False):
+def cmdCreateReports(ctx, subproject=None, force=False,
+  report_formats="xlsx,json", jobs=1, since=None, timings=False,
+  pipeline=False):
 
   slmhome, mainconfig, project, db = extractContext(ctx)
 
-  # cycle through all scans for this project
-  numReports = 0
-  scans = db.getScansAll()
-  for scan in scans:
+  # check which formats were requested
+  formats = [fmt.strip() for fmt in report_formats.split(",")]
+  for fmt in formats:
+    if fmt not in REPORTERS:
+      sys.exit(f"Unknown report format: {fmt}")
+
+  if jobs < 1:
+    sys.exit(f"Number of jobs must be at least 1, got {jobs}")
+  if pipeline and jobs > 1:
+    sys.exit(f"--pipeline can only be used with --jobs 1")
 
+  # check whether month is valid, if present
+  if since is not None:
+    try:
+      _dt = datetime.strptime(since, "%Y-%m")
+    except ValueError as e:
+      sys.exit(f"Invalid format for --since argument ({since}): should be --since YYYY-MM")
+    # strptime also accepts "2018-1", so normalize it before comparing
+    since = _dt.strftime("%Y-%m")
+
+  # get the scans to report on
+  if subproject is not None:
+    try:
+      scans = db.getScansFiltered(subproject=subproject)
+    except ProjectDBQueryError as e:
+      sys.exit(e.message)
+  else:
+    scans = db.getScansAll()
+  if since is not None:
+    scans = [scan for scan in scans if scan.scan_dt.strftime("%Y-%m") >= since]
+
+  # work out which reports are missing or out of date before doing any
+  # analysis, so that scans whose reports are all up to date are skipped
+  fingerprinter = ReportFingerprinter(db=db)
+  manifests = {}
+  tasks = []
+  for scan in scans:
     # construct the scan's default path
     subproject_name = scan.subproject.name
     scan_dt_str = scan.scan_dt.strftime("%Y-%m-%d")
     filename_pref = f"{subproject_name}-{scan_dt_str}"
-    report_path_pref = os.path.join(slmhome, "projects", project, "subprojects",
-      subproject_name, "reports", filename_pref)
-
-    # analyze this scan
-    analyzer = Analyzer(db=db)
-    results = analyzer.runAnalysis(scan_ids=[scan._id])
-
-    # create xlsx report
-    xlsxReporter = XlsxReporter(db=db, config={})
-    xlsxReporter.setResults(results)
-    xlsxReporter.generate()
-    xlsxPath = report_path_pref + ".xlsx"
-    try:
-      xlsxReporter.save(path=xlsxPath, replace=force)
-      numReports += 1
-    except ReportFileError as e:
-      if "File already exists" not in str(e):
-        click.echo(f"Error creating XLSX report for scan {scan._id} at {xlsxPath}: {str(e)}")
-
-    # create json report
-    jsonReporter = JSONReporter(db=db, config={})
-    # JSON reports must get results as a reformatted list
-    listResults = analyzer.getResultsAsList()
-    jsonReporter.setResults(listResults)
-    jsonPath = report_path_pref + ".json"
+    reportsDir = os.path.join(slmhome, "projects", project, "subprojects",
+      subproject_name, "reports")
+    if reportsDir not in manifests:
+      # first remove anything left behind by an earlier run that was killed
+      cleanOrphanedTempFiles(reportsDir)
+      manifests[reportsDir] = ReportManifest(reportsDir)
+    manifest = manifests[reportsDir]
+
+    fingerprint = fingerprinter.getScanFingerprint(scan)
+    reports = []
+    for fmt in formats:
+      reportPath = os.path.join(reportsDir,
+        f"{filename_pref}.{REPORT_EXTENSIONS[fmt]}")
+      if force or not manifest.isUpToDate(reportPath, fingerprint):
+        reports.append((fmt, reportPath))
+    if reports != []:
+      tasks.append((scan._id, reports, manifest, fingerprint))
+
+  # older databases may be missing indexes that report queries use
+  if tasks != []:
+    addMissingIndexes(db)
+
+  # create reports for each scan, either one at a time in this process
+  # (optionally in a pipeline that overlaps one scan's analysis with the
+  # previous scan's reports), or in a pool of worker processes that each open their own read-only database
+  # connection; either way, outcomes are collected in scan order. Stale
+  # reports are replaced, so every report still to be created is saved
+  # with replace.
+  startTime = time.perf_counter()
+  if jobs == 1 or len(tasks) < 2:
+    reportPipeline = ReportPipeline(db=db, overlap=pipeline)
+    outcomes = reportPipeline.run([(scan_id, reports)
+      for scan_id, reports, manifest, fingerprint in tasks])
+    stageTimings = reportPipeline.timings
+  else:
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+      futures = [executor.submit(_createScanReportsWorker, db.pathToDB,
+        scan_id, reports)
+        for scan_id, reports, manifest, fingerprint in tasks]
+      workerOutcomes = [_getWorkerOutcome(future, task[0])
+        for future, task in zip(futures, tasks)]
+    # stage timings are summed across workers
+    outcomes = []
+    stageTimings = newStageTimings()
+    for created, errors, workerTimings in workerOutcomes:
+      outcomes.append((created, errors))
+      for stage in STAGES:
+        stageTimings[stage] += workerTimings[stage]
+  totalTime = time.perf_counter() - startTime
+
+  numReports = 0
+  allCreated = []
+  for (scan_id, reports, manifest, fingerprint), (created, errors) in zip(tasks, outcomes):
+    numReports += len(created)
+    allCreated.extend(created)
+    for reportPath in created:
+      manifest.record(reportPath, fingerprint)
+    for error in errors:
+      click.echo(error)
+
+  StatusIndex(slmhome).recordPaths(project, allCreated)
+
+  for manifest in manifests.values():
     try:
-      jsonReporter.save(path=jsonPath, replace=force)
-      numReports += 1
+      manifest.save()
     except ReportFileError as e:
-      if "File already exists" not in str(e):
-        click.echo(f"Error creating JSON report for scan {scan._id} at {jsonPath}: {str(e)}")
+      click.echo(f"Error recording report fingerprints: {e.message}")
 
   # and confirm success
   if numReports == 1:
     click.echo(f"1 report successfully created")
   else:
     click.echo(f"{numReports} reports successfully created")
+
+  if timings:
+    stageStrs = [f"{stage} {stageTimings[stage]:.2f}s" for stage in STAGES]
+    click.echo(f"Timings: {', '.join(stageStrs)}, total {totalTime:.2f}s")
+
+def _createScanReportsWorker(pathToDB, scan_id, reports):
+  # runs in a worker process, so it opens its own database connection
+  db = ProjectDB()
+  db.openDB(pathToDB, readonly=True)
+  try:
+    workerTimings = newStageTimings()
+    created, errors = createScanReports(db, scan_id, reports, workerTimings)
+    return (created, errors, workerTimings)
+  finally:
+    db.closeDB()
+
+def _getWorkerOutcome(future, scan_id):
+  # a failure in one worker is reported along with the others, rather than
+  # stopping the remaining scans
+  try:
+    return future.result()
+  except Exception as e:
+    return ([], [f"Error creating reports for scan {scan_id}: {str(e)}"],
+      newStageTimings())
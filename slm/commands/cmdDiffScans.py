@@ -0,0 +1,86 @@
+# commands/cmdDiffScans.py
+#
+# Implementation of 'diff-scans' command for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import click
+from tabulate import tabulate
+
+from .helperContext import addMissingIndexes, extractContext
+from ..reports.common import ReportAnalysisError, ReportFileError
+from ..reports.diff import DiffReporter, ScanDiffer
+
+def cmdDiffScans(ctx, from_scan_id=None, to_scan_id=None, report_path=None,
+  report_format=None, force=False):
+
+  slmhome, mainconfig, project, db = extractContext(ctx)
+
+  if from_scan_id is None or to_scan_id is None:
+    sys.exit(f'Usage: slm diff-scans --from SCAN_ID --to SCAN_ID [--report_path PATH] [OPTIONS]\n\nError: "from" and "to" scan IDs must both be provided.')
+
+  addMissingIndexes(db)
+
+  # check that both scans exist before starting the diff
+  differ = ScanDiffer(db=db)
+  try:
+    diffFiles = differ.iterDiff(from_scan_id, to_scan_id)
+    firstDiff = next(diffFiles, None)
+  except ReportAnalysisError as e:
+    sys.exit(e.message)
+
+  def allDiffs():
+    if firstDiff is not None:
+      yield firstDiff
+    yield from diffFiles
+
+  # with no report path, just print the differences
+  if report_path is None:
+    table = []
+    counts = {ScanDiffer.ADDED: 0, ScanDiffer.REMOVED: 0, ScanDiffer.CHANGED: 0}
+    for df in allDiffs():
+      counts[df.status] += 1
+      table.append([df.status, df.path, df.oldLicense or "",
+        df.newLicense or "", ", ".join(df.changes)])
+    _printCounts(from_scan_id, to_scan_id, counts)
+    if table != []:
+      click.echo("")
+      click.echo(tabulate(table,
+        headers=["Status", "File", "Old license", "New license", "Changes"]))
+    return
+
+  # otherwise, determine format from the path if not specified
+  if report_format is None:
+    report_format = os.path.splitext(report_path)[1].lstrip(".").lower()
+  if report_format not in DiffReporter.FORMATS:
+    sys.exit(f"Unknown diff report format: {report_format}")
+
+  reporter = DiffReporter()
+  reporter.setDiff(allDiffs())
+  try:
+    reporter.save(path=report_path, report_format=report_format, replace=force)
+  except ReportFileError as e:
+    if "File already exists" in e.message:
+      sys.exit(f"File already exists at {report_path} (use -f to force overwrite)")
+    sys.exit(e.message)
+
+  _printCounts(from_scan_id, to_scan_id, reporter.counts)
+  click.echo(f"Diff report successfully created at {report_path}.")
+
+def _printCounts(from_scan_id, to_scan_id, counts):
+  click.echo(f"Changes from scan {from_scan_id} to scan {to_scan_id}: {counts[ScanDiffer.ADDED]} added, {counts[ScanDiffer.REMOVED]} removed, {counts[ScanDiffer.CHANGED]} changed")
@@ -21,11 +21,10 @@ import sys
 import click
 
 from .helperContext import extractContext
-from ..projectdb import ProjectDBInsertError
 
-from ..tvReader import TVReader
-from ..tvParser import TVParser
-from ..tvImporter import TVImporter
+from ..batchImporter import (BatchImportError, importFileDataList,
+  parseSPDXFile)
+from ..statusIndex import StatusIndex
 
 def cmdImportScan(ctx, subproject, spdx_path, scan_dt, desc):
   slmhome, mainconfig, project, db = extractContext(ctx)
@@ -33,67 +32,22 @@ def cmdImportScan(ctx, subproject, spdx_path, scan_dt, desc):
   if subproject is None:
     sys.exit(f'Usage: slm --subproject SUBPROJECT import-scan SPDX_PATH [OPTIONS]\n\nError: Missing argument "subproject". Include "--subproject SUBPROJECT" before import-scan command, or set SLM_SUBPROJECT environment variable.')
 
-  # first, check and validate that the SPDX tag-value doc is good to go
+  # read, parse and validate the SPDX tag-value doc, then import it
   try:
-    with open(spdx_path, 'r') as f:
-      # read in the tag-value pairs line-by-line
-      reader = TVReader()
-      for line in f:
-        reader.readNextLine(line)
-      tvList = reader.finalize()
-      # check for errors
-      if reader.isError():
-        sys.exit(f"Error reading {spdx_path}: {reader.errorMessage}")
+    fdList = parseSPDXFile(spdx_path)
+    scan_id, count = importFileDataList(db, fdList, subproject, scan_dt, desc)
+  except BatchImportError as e:
+    sys.exit(e.message)
 
-      # parse the tag-value pairs
-      parser = TVParser()
-      for tag, value in tvList:
-        parser.parseNextPair(tag, value)
-      fdList = parser.finalize()
-      # check for errors
-      if parser.isError():
-        sys.exit(f"Error parsing {spdx_path}: {parser.errorMessage}")
-      # empty list means no file data found
-      if fdList == []:
-        sys.exit(f"Error parsing {spdx_path}: No file data found")
+  # record the scan, and its SPDX file if it's in the subproject's folder
+  scan_dt_str = db.getScan(_id=scan_id).scan_dt.strftime("%Y-%m-%d")
+  index = StatusIndex(slmhome)
+  index.recordScans(project, [(subproject, scan_dt_str)])
+  index.recordPaths(project, [spdx_path])
 
-      # check the parsed file data
-      importer = TVImporter()
-      retval = importer.checkFileDataList(fdList=fdList, db=db)
-      if not retval:
-        _handleImporterFailure(importer=importer)
-
-      # create new scan and get ID
-      scan_id = db.addScan(subproject=subproject, scan_dt_str=scan_dt,
-        desc=desc)
-
-      # import the validated file data
-      importer.importFileDataList(fdList=fdList, db=db, scan_id=scan_id)
-
-      # and report on how many files were imported
-      count = importer.getImportedCount()
-      click.echo(f"Successfully imported {count} files from {spdx_path}")
-      click.echo(f"Scan ID is {scan_id}")
-
-  except FileNotFoundError as e:
-    sys.exit(f"File not found: {spdx_path}")
+  # and report on how many files were imported
+  click.echo(f"Successfully imported {count} files from {spdx_path}")
+  click.echo(f"Scan ID is {scan_id}")
 
   # clean up database
   db.closeDB()
-
-def _handleImporterFailure(importer):
-  # failed because of unknown licenses?
-  if importer.licensesUnknown != []:
-    exitMessage = "The following unknown licenses were detected:\n=====\n"
-    for lic in importer.licensesUnknown:
-      exitMessage += f"{lic}\n"
-    exitMessage += "=====\nFor each, run 'slm add-license' or 'slm add-conversion' before importing."
-    sys.exit(exitMessage)
-
-  # failed because of duplicate paths?
-  if importer.pathDuplicates != []:
-    exitMessage = "The following duplicate file paths were detected:\n=====\n"
-    for path in importer.pathDuplicates:
-      exitMessage += f"{path}\n"
-    exitMessage += "=====\nAll duplicates should be removed from the SPDX file before importing."
-    sys.exit(exitMessage)
@@ -20,7 +20,7 @@
 import sys
 import click
 
-from .helperContext import extractContext
+from .helperContext import addMissingIndexes, extractContext
 
 def cmdListScanResults(ctx, scan_id=None):
   slmhome, mainconfig, project, db = extractContext(ctx)
@@ -34,5 +34,6 @@ def cmdListScanResults(ctx, scan_id=None):
   if scan is None:
     sys.exit(f"Scan ID {scan_id} does not exist.")
 
+  addMissingIndexes(db)
   for file in db.getFiles(scan_id):
     click.echo(f"{file.path} => {file.license.name}")
@@ -0,0 +1,69 @@
+# commands/cmdRetrieveAndImport.py
+#
+# Implementation of 'retrieve-and-import' command for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import click
+
+from .helperContext import extractContext
+from .helperRetrieve import (echoRetrieverResults,
+  getFailedTransfersMessage, runRetriever)
+
+from ..batchImporter import BatchImporter, getRetrievedImportTasks
+from ..statusIndex import StatusIndex
+
+def cmdRetrieveAndImport(ctx, month, recursive=False, max_depth=None,
+  globs=(), archives=False, jobs=1, copy_workers=4):
+  slmhome, mainconfig, project, db = extractContext(ctx)
+
+  if jobs < 1:
+    sys.exit(f"Number of jobs must be at least 1, got {jobs}")
+
+  retriever = runRetriever(slmhome, project, db, month, recursive=recursive,
+    max_depth=max_depth, globs=globs, archives=archives,
+    copy_workers=copy_workers)
+  echoRetrieverResults(retriever)
+
+  # import each retrieved file as a scan for its subproject
+  tasks = getRetrievedImportTasks(retriever)
+  importer = BatchImporter(db=db, jobs=jobs)
+  outcomes = importer.run(tasks)
+
+  numErrors = 0
+  imported = []
+  for (name, dstPath, scan_dt, desc), (scan_id, count, error) in zip(tasks,
+      outcomes):
+    dstFile = os.path.basename(dstPath)
+    if error is None:
+      click.echo(f"Imported {count} files from {dstFile} to {name} (scan ID {scan_id})")
+      imported.append((name, scan_dt))
+    else:
+      click.echo(f"Error importing {dstFile} to {name}: {error}")
+      numErrors += 1
+
+  StatusIndex(slmhome).recordScans(project, imported)
+
+  failedMessage = getFailedTransfersMessage(retriever)
+  if numErrors > 0:
+    message = f"{numErrors} of {len(tasks)} retrieved files could not be imported; fix the errors above and import them with 'slm import-scan'."
+    if failedMessage is not None:
+      message = f"{failedMessage}\n{message}"
+    sys.exit(message)
+  if failedMessage is not None:
+    sys.exit(failedMessage)
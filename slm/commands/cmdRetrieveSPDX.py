@@ -17,59 +17,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os
 import sys
-import click
-from datetime import datetime
 
 from .helperContext import extractContext
-from ..projectdb import ProjectDBQueryError
+from .helperRetrieve import (echoRetrieverResults,
+  getFailedTransfersMessage, runRetriever)
 
-from ..retriever import Retriever
-
-def cmdRetrieveSPDX(ctx, month):
+def cmdRetrieveSPDX(ctx, month, recursive=False, max_depth=None, globs=(),
+  archives=False, copy_workers=4):
   slmhome, mainconfig, project, db = extractContext(ctx)
 
-  # check whether spdx-search-dir is set
-  try:
-    search_dir = db.getConfigValue("spdx-search-dir")
-  except ProjectDBQueryError as e:
-    sys.exit("Configuration variable for SPDX search directory not found.\nPlease call 'slm set-config spdx-search-dir DIR_NAME' first.")
-
-  # check whether year-month is present and valid
-  if month is None:
-    sys.exit("Missing argument: --month YYYY-MM")
-  try:
-    _dt = datetime.strptime(month, "%Y-%m")
-  except ValueError as e:
-    sys.exit(f"Invalid format for --month argument ({month}): should be --month YYYY-MM")
-
-  retriever = Retriever()
-
-  # get subprojects
-  subprojects = db.getSubprojectsAll()
-
-  # get project dir
-  project_dir = os.path.join(slmhome, "projects", project)
-
-  # set config
-  retriever.setDatestr(month)
-  retriever.setSearchDir(search_dir)
-  retriever.setProjectDir(project_dir)
-  for subproject in subprojects:
-    retriever.addSubproject(
-      name=subproject.name,
-      _id=subproject._id,
-      spdx_search=subproject.spdx_search,
-    )
-
-  # run retriever
-  retriever.prepareFiles()
-  retriever.createResults()
-  retriever.moveFiles()
+  retriever = runRetriever(slmhome, project, db, month, recursive=recursive,
+    max_depth=max_depth, globs=globs, archives=archives,
+    copy_workers=copy_workers)
 
   # output results
-  for _id, name, srcPath, dstPath in retriever.results["success"]:
-    srcFile = os.path.split(srcPath)[1]
-    dstFile = os.path.split(dstPath)[1]
-    click.echo(f"Moved {srcFile} to {name} (new name: {dstFile})")
+  echoRetrieverResults(retriever)
+  failedMessage = getFailedTransfersMessage(retriever)
+  if failedMessage is not None:
+    sys.exit(failedMessage)
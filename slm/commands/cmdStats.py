@@ -0,0 +1,82 @@
+# commands/cmdStats.py
+#
+# Implementation of 'stats' command for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import click
+from tabulate import tabulate
+
+from .helperContext import addMissingIndexes, extractContext
+from ..reports.analysis import Analyzer
+from ..reports.common import ReportAnalysisError
+from ..reports.counts import FileCounter
+
+FINDING_HEADERS = [
+  ("emptyfile", "Empty files"),
+  ("thirdparty", "Third party"),
+]
+
+def cmdStats(ctx, scan_id=None, scan_ids=None):
+  slmhome, mainconfig, project, db = extractContext(ctx)
+
+  # figure out which scans to count; default is all of them
+  if scan_id is not None and scan_ids is not None:
+    sys.exit("Cannot use both --scan_id and --scan_ids.")
+  if scan_id is not None:
+    scan_ids_list = [scan_id]
+  elif scan_ids is not None:
+    try:
+      scan_ids_list = Analyzer(db=db).splitScanIDString(scan_ids)
+    except ReportAnalysisError as e:
+      sys.exit(e.message)
+  else:
+    scan_ids_list = [scan._id for scan in db.getScansAll()]
+  for s_id in scan_ids_list:
+    if db.getScan(_id=s_id) is None:
+      sys.exit(f"Scan ID {s_id} does not exist.")
+
+  addMissingIndexes(db)
+  counts = FileCounter(db=db).countFiles(scan_ids=scan_ids_list)
+
+  # only show columns for findings that were counted
+  findingHeaders = [(name, header) for name, header in FINDING_HEADERS
+    if name in counts.findingCounts]
+  headers = ["Category", "License", "Files"] + [h for n, h in findingHeaders]
+
+  # build table in report order, skipping anything with no files
+  table = []
+  for cat in db.getCategoriesAll():
+    if counts.categoryCounts.get(cat._id, 0) == 0:
+      continue
+    for lic in cat.licenses:
+      numFiles = counts.licenseCounts.get(lic._id, 0)
+      if numFiles == 0:
+        continue
+      row = [cat.name, lic.name, numFiles]
+      for name, header in findingHeaders:
+        row.append(counts.findingCounts[name].get(lic._id, 0))
+      table.append(row)
+  totalRow = ["TOTAL", "", counts.total]
+  for name, header in findingHeaders:
+    totalRow.append(sum(counts.findingCounts[name].values()))
+  table.append(totalRow)
+
+  scansStr = ", ".join([str(s_id) for s_id in scan_ids_list])
+  click.echo(f"File counts for scans: {scansStr}")
+  click.echo("")
+  click.echo(tabulate(table, headers=headers))
@@ -17,10 +17,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import io
+import json
+import sys
 import click
 from tabulate import tabulate
 
-from ..slmmanager import SLMManager
+from ..slmmanager import SLMManager, SLMManagerError
+from ..statusIndex import StatusIndex
 
 def aster(b):
   if b == True:
@@ -28,28 +34,98 @@ def aster(b):
   else:
     return " "
 
-def cmdStatus(ctx, year_month):
+def cell(statuses):
+  # one letter for each of SPDX, Scan, JSON and XLSX that is present
+  return "".join(letter if b else "-"
+    for letter, b in zip("SCJX", statuses))
+
+# names of the items checked for each subproject and month, in order
+STATUS_ITEMS = ["spdx", "scan", "json", "xlsx"]
+
+STATUS_FORMATS = ["text", "json", "csv"]
+
+def getStatusText(allRows, months, isRange):
+  if isRange:
+    lines = [f"Months: {months[0]} to {months[-1]}",
+      "S = SPDX, C = Scan, J = JSON, X = XLSX", ""]
+    headers = ["Project", "Subproject", *months]
+    table = [[p, sp, *[cell(statuses[month]) for month in months]]
+      for p, sp, statuses in allRows]
+  else:
+    lines = [f"Month: {months[0]}", ""]
+    headers = ["Project", "Subproject", "SPDX", "Scan", "JSON", "XLSX"]
+    table = [[p, sp, *[aster(b) for b in statuses[months[0]]]]
+      for p, sp, statuses in allRows]
+  # status table with headers
+  lines.append(tabulate(table, headers=headers))
+  return "\n".join(lines)
+
+def getStatusJSON(allRows, months):
+  subprojects = []
+  for p, sp, statuses in allRows:
+    subprojects.append({
+      "project": p,
+      "subproject": sp,
+      "months": {month: dict(zip(STATUS_ITEMS, statuses[month]))
+        for month in months},
+    })
+  return json.dumps({"months": months, "subprojects": subprojects}, indent=2)
+
+def getStatusCSV(allRows, months):
+  output = io.StringIO()
+  writer = csv.writer(output, lineterminator="\n")
+  writer.writerow(["project", "subproject", "month", *STATUS_ITEMS])
+  for p, sp, statuses in allRows:
+    for month in months:
+      writer.writerow([p, sp, month,
+        *["yes" if b else "no" for b in statuses[month]]])
+  return output.getvalue().rstrip("\n")
+
+def cmdStatus(ctx, year_month=None, from_month=None, to_month=None,
+  status_format="text", fail_on_missing=False, rebuild=False):
   mainconfig = ctx.obj.get('SLMCONFIG_DATA', None)
   slmhome = ctx.obj.get('SLMHOME', None)
   manager = SLMManager(config=mainconfig, root=slmhome)
 
-  click.echo(f"Month: {year_month}")
-  click.echo("")
-
-  # build status table
-  headers = ["Project", "Subproject", "SPDX", "Scan", "JSON", "XLSX"]
-  table = []
-  for p in mainconfig.projects:
-    pdb = manager.openProjectDB(p.name)
-    subprojects = pdb.getSubprojectsAll()
-    for sp in subprojects:
-      isSPDX = aster(manager.isSPDXForMonth(pdb, p.name, sp.name, year_month))
-      isScan = aster(manager.isScanForMonth(pdb, sp.name, year_month))
-      isXLSX = aster(manager.isXLSXForMonth(p.name, sp.name, year_month))
-      isJSON = aster(manager.isJSONForMonth(p.name, sp.name, year_month))
-      sp_row = [p.name, sp.name, isSPDX, isScan, isXLSX, isJSON]
-      table.append(sp_row)
-    pdb.closeDB()
-
-  # print status table with headers
-  click.echo(tabulate(table, headers=headers))
+  if year_month is not None and (from_month is not None or to_month is not None):
+    sys.exit(f"Cannot give both a month and --from / --to.")
+  if year_month is None:
+    if from_month is None or to_month is None:
+      sys.exit(f"Usage: \n  slm status YEAR_MONTH\n  slm status --from YEAR_MONTH --to YEAR_MONTH")
+  else:
+    from_month, to_month = year_month, year_month
+  # months are validated and normalized to YYYY-MM, whether one month or
+  # a range was given
+  try:
+    months = manager.getMonthsInRange(from_month, to_month)
+  except SLMManagerError as e:
+    sys.exit(e.message)
+  if status_format not in STATUS_FORMATS:
+    sys.exit(f"Unknown status format: {status_format}")
+
+  # status comes from the index, which is rebuilt from the project
+  # databases and folders if requested or if it doesn't exist yet
+  projects = [p.name for p in mainconfig.projects]
+  index = StatusIndex(slmhome)
+  if rebuild or not index.exists():
+    # each project has its own database and directories, so they are
+    # read concurrently; map keeps the projects in their config order
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(projects)))) as executor:
+      projectItems = [(p, *items) for p, items in zip(projects,
+        executor.map(manager.getProjectStatusItems, projects))]
+    index.rebuild(projectItems)
+  allRows = index.getStatusForMonths(projects, months)
+
+  if status_format == "json":
+    click.echo(getStatusJSON(allRows, months))
+  elif status_format == "csv":
+    click.echo(getStatusCSV(allRows, months))
+  else:
+    click.echo(getStatusText(allRows, months, year_month is None))
+
+  # for monitoring, fail if any subproject is missing anything in any month
+  if fail_on_missing:
+    numMissing = sum(1 for p, sp, statuses in allRows for month in months
+      if not all(statuses[month]))
+    if numMissing > 0:
+      sys.exit(f"{numMissing} of {len(allRows) * len(months)} subproject months are missing an SPDX file, scan or report.")
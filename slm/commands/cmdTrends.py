@@ -0,0 +1,79 @@
+# commands/cmdTrends.py
+#
+# Implementation of 'trends' command for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import click
+from datetime import datetime
+from tabulate import tabulate
+
+from .helperContext import addMissingIndexes, extractContext
+from ..reports.common import ReportAnalysisError
+from ..reports.trends import TrendCounter
+
+def cmdTrends(ctx, subproject=None, from_month=None, to_month=None):
+  slmhome, mainconfig, project, db = extractContext(ctx)
+
+  # check whether months are valid, if present; strptime also accepts
+  # "2018-1", so they are normalized to YYYY-MM before being compared
+  months = []
+  for arg, month in [("--from", from_month), ("--to", to_month)]:
+    if month is not None:
+      try:
+        month = datetime.strptime(month, "%Y-%m").strftime("%Y-%m")
+      except ValueError as e:
+        sys.exit(f"Invalid format for {arg} argument ({month}): should be {arg} YYYY-MM")
+    months.append(month)
+  from_month, to_month = months
+
+  addMissingIndexes(db)
+  try:
+    trends = TrendCounter(db=db).countTrends(subproject=subproject,
+      fromMonth=from_month, toMonth=to_month)
+  except ReportAnalysisError as e:
+    sys.exit(e.message)
+
+  if subproject is not None:
+    click.echo(f"License trends for subproject {subproject}")
+  else:
+    click.echo(f"License trends for project {project}")
+  click.echo("")
+  if trends.months == []:
+    click.echo("No scans found.")
+    return
+
+  # one column per month; each category is followed by its licenses,
+  # skipping anything with no files in any month
+  def monthValues(monthCounts):
+    return [monthCounts.get(month, 0) for month in trends.months]
+
+  headers = ["Category", "License"] + trends.months
+  table = []
+  for cat in db.getCategoriesAll():
+    catCounts = trends.categoryCounts.get(cat._id, None)
+    if catCounts is None:
+      continue
+    table.append([cat.name, ""] + monthValues(catCounts))
+    for lic in cat.licenses:
+      licCounts = trends.licenseCounts.get(lic._id, None)
+      if licCounts is None:
+        continue
+      table.append(["", lic.name] + monthValues(licCounts))
+  table.append(["TOTAL", ""] + monthValues(trends.totals))
+
+  click.echo(tabulate(table, headers=headers))
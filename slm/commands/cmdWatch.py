@@ -0,0 +1,79 @@
+# commands/cmdWatch.py
+#
+# Implementation of 'watch' command for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import time
+import click
+
+from .helperContext import extractContext
+from ..projectdb import ProjectDB
+from ..watcher import ProjectWatcher
+
+def cmdWatch(ctx, interval=60, settle=30, once=False, recursive=False,
+  max_depth=None, globs=(), archives=False, jobs=1, reports=False):
+  slmhome, mainconfig, project, db = extractContext(ctx)
+
+  if slmhome is None:
+    sys.exit("spdxLicenseManager data directory not specified.\nPlease specify with --slmhome or with SLM_HOME environment variable.")
+  if interval <= 0:
+    sys.exit(f"Invalid --interval argument ({interval}): must be more than 0")
+  if settle < 0:
+    sys.exit(f"Invalid --settle argument ({settle}): must be 0 or more")
+  if max_depth is not None and max_depth < 0:
+    sys.exit(f"Invalid --max_depth argument ({max_depth}): must be 0 or more")
+  if jobs < 1:
+    sys.exit(f"Number of jobs must be at least 1, got {jobs}")
+
+  # watch just the given project, or every project
+  if project is not None:
+    projects = [project]
+  else:
+    projects = [p.name for p in mainconfig.projects]
+
+  # setting max depth implies recursive
+  if max_depth is None:
+    max_depth = None if recursive else 0
+  watchers = [ProjectWatcher(slmhome, p, maxDepth=max_depth, globs=globs,
+    archives=archives, jobs=jobs, reports=reports, settle=settle)
+    for p in projects]
+
+  try:
+    while True:
+      for watcher in watchers:
+        for message in _pollProject(slmhome, mainconfig, watcher):
+          click.echo(f"{watcher.project}: {message}")
+      if once:
+        break
+      time.sleep(interval)
+  except KeyboardInterrupt:
+    click.echo("Stopped watching.")
+
+def _pollProject(slmhome, mainconfig, watcher):
+  # each poll opens the project database afresh, so that config changes
+  # are picked up; an error in one project doesn't stop the others
+  projectDB = ProjectDB()
+  try:
+    projectDB.openDB(os.path.join(os.path.abspath(slmhome),
+      mainconfig.getDBRelativePath(watcher.project)))
+    return watcher.poll(projectDB)
+  except Exception as e:
+    return [f"Error: {getattr(e, 'message', str(e))}"]
+  finally:
+    projectDB.closeDB()
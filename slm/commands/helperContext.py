@@ -17,6 +17,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
+import click
+
+from ..projectdb import ProjectDBUpdateError
+
 def extractContext(ctx):
   """Extract standard config vars from click context."""
   slmhome = ctx.obj.get('SLMHOME', None)
@@ -25,3 +30,15 @@ def extractContext(ctx):
   db = ctx.obj.get('PROJECTDB', None)
 
   return (slmhome, mainconfig, project, db)
+
+def addMissingIndexes(db):
+  """Add any file indexes missing from an older project database, for
+  commands that query files. Says so first, since it can take a while."""
+  missing = db.getMissingIndexes()
+  if missing == []:
+    return
+  click.echo(f"Adding missing indexes to the project database ({', '.join(missing)}); this may take a while for large projects.")
+  try:
+    db.addMissingIndexes()
+  except ProjectDBUpdateError as e:
+    sys.exit(e.message)
@@ -0,0 +1,123 @@
+# commands/helperRetrieve.py
+#
+# Helper functions for spdxLicenseManager commands that retrieve SPDX files.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import click
+from datetime import datetime
+
+from ..projectdb import ProjectDBQueryError
+
+from ..retriever import Retriever
+from ..statusIndex import StatusIndex
+
+def runRetriever(slmhome, project, db, month, recursive=False, max_depth=None,
+  globs=(), archives=False, copy_workers=4):
+  """Check the retrieval options, then retrieve and move this month's SPDX
+  files, and return the Retriever with its results."""
+  # check whether spdx-search-dir is set
+  try:
+    search_dir = db.getConfigValue("spdx-search-dir")
+  except ProjectDBQueryError as e:
+    sys.exit("Configuration variable for SPDX search directory not found.\nPlease call 'slm set-config spdx-search-dir DIR_NAME' first.")
+
+  # check whether year-month is present and valid
+  if month is None:
+    sys.exit("Missing argument: --month YYYY-MM")
+  try:
+    _dt = datetime.strptime(month, "%Y-%m")
+  except ValueError as e:
+    sys.exit(f"Invalid format for --month argument ({month}): should be --month YYYY-MM")
+
+  # check whether max depth is valid; setting it implies --recursive
+  if max_depth is not None and max_depth < 0:
+    sys.exit(f"Invalid --max_depth argument ({max_depth}): must be 0 or more")
+  if copy_workers < 1:
+    sys.exit(f"Number of copy workers must be at least 1, got {copy_workers}")
+
+  retriever = Retriever()
+
+  # get subprojects
+  subprojects = db.getSubprojectsAll()
+
+  # get project dir
+  project_dir = os.path.join(slmhome, "projects", project)
+
+  # set config
+  retriever.setDatestr(month)
+  retriever.setSearchDir(search_dir)
+  retriever.setProjectDir(project_dir)
+  if max_depth is not None:
+    retriever.setMaxDepth(max_depth)
+  elif recursive:
+    retriever.setMaxDepth(None)
+  retriever.setGlobs(globs)
+  retriever.setSearchArchives(archives)
+  retriever.setCopyWorkers(copy_workers)
+  for subproject in subprojects:
+    retriever.addSubproject(
+      name=subproject.name,
+      _id=subproject._id,
+      spdx_search=subproject.spdx_search,
+    )
+
+  # run retriever
+  retriever.prepareFiles()
+  retriever.createResults()
+  retriever.moveFiles()
+  StatusIndex(slmhome).recordPaths(project, [dstPath
+    for _id, name, srcPath, dstPath in retriever.results["success"]])
+
+  return retriever
+
+def echoRetrieverResults(retriever):
+  """Report which SPDX files the Retriever moved or extracted, and why any
+  others weren't."""
+  for archivePath, reason in retriever.unreadableArchives:
+    click.echo(f"Skipped unreadable archive {archivePath}: {reason}")
+  for _id, name, srcPath, dstPath in retriever.results["success"]:
+    srcFile = os.path.split(srcPath)[1]
+    dstFile = os.path.split(dstPath)[1]
+    if srcPath in retriever.archiveMembers:
+      archiveFile = os.path.split(retriever.archiveMembers[srcPath][0])[1]
+      click.echo(f"Extracted {srcFile} from {archiveFile} to {name} (new name: {dstFile})")
+    else:
+      click.echo(f"Moved {srcFile} to {name} (new name: {dstFile})")
+  # subprojects with no file this month are expected, so only problems
+  # with the files that were found are reported
+  found = set(name for name, _id, matches in retriever.subprojects.values()
+    if matches != [])
+  for _id, name, message in retriever.results["error"]:
+    if name in found:
+      click.echo(message)
+
+  # files on another filesystem are copied, so report how fast that was
+  stats = retriever.copyStats
+  if stats["files"] > 0:
+    mb = stats["bytes"] / (1024 * 1024)
+    rate = mb / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    click.echo(f"Copied {stats['files']} files across filesystems ({mb:.1f} MB in {stats['seconds']:.2f}s, {rate:.1f} MB/s)")
+
+def getFailedTransfersMessage(retriever):
+  """Explain how many matched SPDX files couldn't be copied or extracted,
+  or return None if there were none."""
+  numFailed = len(retriever.failedTransfers)
+  if numFailed == 0:
+    return None
+  return f"{numFailed} SPDX files could not be copied or extracted into their subprojects; see the errors above."
@@ -17,7 +17,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from sqlalchemy import Column, Date, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -106,6 +106,11 @@ class File(Base):
   # relationships
   scan = relationship('Scan')
   license = relationship('License')
+  # indexes
+  # files are nearly always looked up by scan, and reported in path order
+  __table_args__ = (
+    Index('ix_files_scan_id_path', 'scan_id', 'path'),
+  )
 
   def __repr__(self):
     if self.license:
@@ -19,8 +19,10 @@
 
 import os
 import datetime
+import sqlite3
+from urllib.parse import quote
 
-from sqlalchemy import create_engine, desc, extract, and_
+from sqlalchemy import create_engine, desc, extract, and_, func, text
 from sqlalchemy.exc import OperationalError, DatabaseError, IntegrityError
 from sqlalchemy.orm import sessionmaker
 
@@ -79,6 +81,7 @@ class ProjectDB:
     super(ProjectDB, self).__init__()
     self.engine = None
     self.session = None
+    self.pathToDB = None
 
   def createDB(self, pathToDB):
     if pathToDB != ":memory:":
@@ -127,15 +130,22 @@ class ProjectDB:
     query.update({Config.value: "yes"})
     self.session.commit()
 
-  def openDB(self, pathToDB):
+  def openDB(self, pathToDB, readonly=False):
     if pathToDB == ":memory:":
       raise ProjectDBConfigError(f"Can't open an in-memory database, call createDB() instead")
 
-    # create engine string (file path only)
-    engine_str = "sqlite:///" + pathToDB
+    # connect to database; read-only connections are opened via an SQLite
+    # URI, so that any attempted write fails. The connection is made here
+    # rather than by SQLAlchemy, since older SQLAlchemy versions can't pass
+    # a URI through to sqlite3.
+    if readonly:
+      uri = f"file:{quote(pathToDB)}?mode=ro"
+      self.engine = create_engine("sqlite://",
+        creator=lambda: sqlite3.connect(uri, uri=True))
+    else:
+      self.engine = create_engine("sqlite:///" + pathToDB)
+    self.pathToDB = pathToDB
 
-    # connect to database
-    self.engine = create_engine(engine_str)
     Session = sessionmaker(bind=self.engine)
     self.session = Session()
 
@@ -151,10 +161,39 @@ class ProjectDB:
       self.closeDB()
       raise ProjectDBConfigError(f"{pathToDB} does not contain spdxLicenseManager magic value")
 
+  def getMissingIndexes(self):
+    """
+    Return the names of any file indexes in the model that this database
+    doesn't have yet, because it was created before they were added.
+    """
+    query = text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table")
+    existing = set(row[0] for row in
+      self.session.execute(query, {"table": File.__tablename__}))
+    return [index.name for index in File.__table__.indexes
+      if index.name not in existing]
+
+  def addMissingIndexes(self):
+    """
+    Create any file indexes returned by getMissingIndexes(). This reads the
+    whole files table, so it can take a while on large databases.
+    """
+    try:
+      for index in File.__table__.indexes:
+        columns = ", ".join(column.name for column in index.columns)
+        self.session.execute(text(f"CREATE INDEX IF NOT EXISTS {index.name} ON {File.__tablename__} ({columns})"))
+      self.session.commit()
+    except OperationalError:
+      self.session.rollback()
+      raise ProjectDBUpdateError(f"Couldn't add missing indexes to {self.pathToDB}")
+
   def closeDB(self):
     if self.session is not None:
       self.session.close()
       self.session = None
+    # close pooled connections now, in this thread, rather than whenever
+    # the engine is garbage-collected
+    if self.engine is not None:
+      self.engine.dispose()
     self.engine = None
 
   def commit(self):
@@ -664,3 +703,74 @@ class ProjectDB:
       self.session.commit()
     else:
       self.session.flush()
+
+  def getFilesCountByLicense(self, *, scan_ids):
+    """
+    Get the number of files for each license across the given scans, as a
+    dict mapping license ID => count. Licenses with no files are omitted.
+    """
+    query = self.session.query(File.license_id, func.count(File._id)).\
+                         filter(File.scan_id.in_(scan_ids)).\
+                         group_by(File.license_id)
+    return dict(query.all())
+
+  def getFilesCountByScanAndLicense(self, *, scan_ids):
+    """
+    Get the number of files for each license in each of the given scans,
+    as a dict mapping (scan ID, license ID) => count, from one aggregate
+    query. Licenses with no files are omitted.
+    """
+    query = self.session.query(File.scan_id, File.license_id,
+                               func.count(File._id)).\
+                         filter(File.scan_id.in_(scan_ids)).\
+                         group_by(File.scan_id, File.license_id)
+    return {(s_id, l_id): count for s_id, l_id, count in query.all()}
+
+  def iterFilesOrdered(self, *, scan_ids, batch_size=1000):
+    """
+    Iterate over all files in the given scans, in report order: by category
+    order, then license name, then scan ID, then path.
+    Yields plain tuples rather than File objects, so that nothing is kept in
+    the session's identity map:
+      [0]: file ID
+      [1]: scan ID
+      [2]: license ID
+      [3]: category ID
+      [4]: path
+      [5]: SHA1
+      [6]: MD5
+      [7]: SHA256
+    """
+    query = self.session.query(
+      File._id, File.scan_id, File.license_id, License.category_id,
+      File.path, File.sha1, File.md5, File.sha256
+    ).join(License, File.license_id == License._id).\
+      join(Category, License.category_id == Category._id).\
+      filter(File.scan_id.in_(scan_ids)).\
+      order_by(Category.order, License.name, File.scan_id, File.path)
+    for row in query.yield_per(batch_size):
+      yield tuple(row)
+
+  def iterFilePaths(self, *, scan_ids, batch_size=1000):
+    query = self.session.query(File.path).\
+                         filter(File.scan_id.in_(scan_ids))
+    for row in query.yield_per(batch_size):
+      yield row[0]
+
+  def iterFilesByPath(self, *, scan_id, batch_size=1000):
+    """
+    Iterate over all files in one scan, ordered by path, so that two scans
+    can be compared with a single merge pass. Uses the (scan_id, path)
+    index. Yields plain tuples:
+      [0]: path
+      [1]: license ID
+      [2]: SHA1
+      [3]: MD5
+      [4]: SHA256
+    """
+    query = self.session.query(
+      File.path, File.license_id, File.sha1, File.md5, File.sha256
+    ).filter(File.scan_id == scan_id).\
+      order_by(File.path)
+    for row in query.yield_per(batch_size):
+      yield tuple(row)
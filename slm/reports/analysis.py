@@ -22,8 +22,45 @@ import os
 from collections import OrderedDict
 
 from .common import ReportAnalysisError
+from .counts import FileCounter
+from .results import ResultCategory, ResultFile, ResultLicense
 from ..projectdb import ProjectDBQueryError
-from ..datatypes import Category, File, License
+
+class _FileStream:
+  """Shared ordered cursor over streamed files, handed out one license at a
+  time. Licenses must be iterated in report order; any files belonging to a
+  license that the consumer skipped over are discarded."""
+
+  def __init__(self, files, ranks):
+    self.files = files
+    self.ranks = ranks
+    self.pending = None
+
+  def filesForLicense(self, license_id):
+    rank = self.ranks[license_id]
+    while True:
+      if self.pending is None:
+        try:
+          self.pending = next(self.files)
+        except StopIteration:
+          return
+      pendingRank = self.ranks[self.pending.license_id]
+      if pendingRank > rank:
+        return
+      f = self.pending
+      self.pending = None
+      if pendingRank == rank:
+        yield f
+
+class _StreamedLicenseFiles:
+  """Iterable for one license's files in streaming mode."""
+
+  def __init__(self, stream, license_id):
+    self.stream = stream
+    self.license_id = license_id
+
+  def __iter__(self):
+    return self.stream.filesForLicense(self.license_id)
 
 class Analyzer:
 
@@ -40,7 +77,7 @@ class Analyzer:
   ##### Main common report analysis functions
   ##### External usage shouldn't require calling anything except these
 
-  def runAnalysis(self, *, scan_id=None, scan_ids=[]):
+  def runAnalysis(self, *, scan_id=None, scan_ids=[], streaming=False):
     # cannot pass both singular and multiple scan IDs
     if scan_id is not None and scan_ids != []:
       raise ReportAnalysisError(f"Cannot call runAnalysis with both singular and multiple scan IDs")
@@ -59,37 +96,61 @@ class Analyzer:
 
     # build and run analysis
     self._buildScanCategories()
-    if scan_id is not None:
-      self._addFiles(scan_id=scan_id)
-    for si in scan_ids:
-      self._addFiles(scan_id=si)
-    self._runAnalysis()
+    if streaming:
+      # in streaming mode, files are not loaded here; only counts are added,
+      # and files are then retrieved in order via iterFiles()
+      self.streaming = True
+      if scan_id is not None:
+        self.streamScanIDs = [scan_id]
+      else:
+        self.streamScanIDs = list(scan_ids)
+      self._addFileCounts(scan_ids=self.streamScanIDs)
+      self._runStreamingAnalysis()
+    else:
+      if scan_id is not None:
+        self._addFiles(scan_id=scan_id)
+      for si in scan_ids:
+        self._addFiles(scan_id=si)
+      # file counts for the results come from the counter, as in
+      # streaming mode, rather than from the loaded files
+      if scan_id is not None:
+        self._addFileCounts(scan_ids=[scan_id])
+      else:
+        self._addFileCounts(scan_ids=scan_ids)
+      self._runAnalysis()
 
     self.analysisDone = True
     return self.primaryScanCategories
 
-  def getResultsAsList(self):
+  def iterFiles(self):
     if not self.analysisDone:
-      raise ReportAnalysisError("Cannot call getResultsAsList before analysis has been run")
+      raise ReportAnalysisError("Cannot call iterFiles before analysis has been run")
+    if not self.streaming:
+      raise ReportAnalysisError("Cannot call iterFiles unless analysis was run in streaming mode")
+
+    # files come back from one ordered query, in the same order as the
+    # categories and licenses in primaryScanCategories
+    rows = self.db.iterFilesOrdered(scan_ids=self.streamScanIDs)
+    for _id, scan_id, l_id, c_id, path, sha1, md5, sha256 in rows:
+      cat = self.primaryScanCategories[c_id]
+      lic = cat.licensesSorted[l_id]
+      path = path[len(self.streamPrefix):]
+      findings = self._getStreamedFindings(path=path, md5=md5)
+      f = ResultFile(_id=_id, scan_id=scan_id, license_id=l_id, path=path,
+        sha1=sha1, md5=md5, sha256=sha256, findings=findings)
+      yield (cat, lic, f)
 
-    listResults = []
-    # create and add new categories
-    for cat_id, cat in self.primaryScanCategories.items():
-      newCat = Category(_id=cat_id, name=cat.name)
-      newCat.licenses = []
-      listResults.append(newCat)
-      # create and add new licenses
-      for lic_id, lic in cat.licensesSorted.items():
-        newLic = License(_id=lic_id, name=lic.name)
-        newLic.files = []
-        newCat.licenses.append(newLic)
-        for f_id, f in lic.filesSorted.items():
-          newFile = File(_id=f_id, scan_id=f.scan_id, path=f.path,
-            sha1=f.sha1, md5=f.md5, sha256=f.sha256
-          )
-          newFile.findings = f.findings
-          newLic.files.append(newFile)
-    return listResults
+  def getResults(self):
+    if not self.analysisDone:
+      raise ReportAnalysisError("Cannot call getResults before analysis has been run")
+
+    # results are built only once, and then shared by all reporters
+    if self.results is None:
+      if self.streaming:
+        self.results = self._buildStreamedResults()
+      else:
+        self.results = self._buildResults()
+    return self.results
 
   def splitScanIDString(self, sstring):
     ids_set = set()
@@ -157,6 +218,60 @@ class Analyzer:
       cat.hasFiles = True
       lic.hasFiles = True
 
+  def _addFileCounts(self, scan_ids):
+    if self.primaryScanCategories == OrderedDict():
+      raise ReportAnalysisError("Cannot call _addFileCounts before _buildScanCategories")
+
+    counter = FileCounter(db=self.db, config=self.kwConfig)
+    counts = counter.countFiles(scan_ids=scan_ids, withFindings=False)
+    for cat in self.primaryScanCategories.values():
+      cat.numFiles = counts.categoryCounts.get(cat._id, 0)
+      for lic in cat.licensesSorted.values():
+        lic.numFiles = counts.licenseCounts.get(lic._id, 0)
+        if lic.numFiles > 0:
+          lic.hasFiles = True
+          cat.hasFiles = True
+
+  def _runStreamingAnalysis(self):
+    if self.primaryScanCategories == OrderedDict():
+      raise ReportAnalysisError("Cannot call _runStreamingAnalysis before _buildScanCategories")
+
+    # per-file analyses are applied by iterFiles() as each file is read, so
+    # here we just determine which ones apply
+    self.streamPrefix = ""
+    if self._getFinalConfigValue('analyze-exclude-path-prefix') == "yes":
+      self.streamPrefix = self._getStreamedPathPrefix()
+    self.streamExtList = []
+    if self._getFinalConfigValue('analyze-extensions') == "yes":
+      self.streamExtList = self._parseExtConfig()
+    self.streamDirList = []
+    if self._getFinalConfigValue('analyze-thirdparty') == "yes":
+      self.streamDirList = self._parseDirConfig()
+    self.streamEmptyFile = False
+    if self._getFinalConfigValue('analyze-emptyfile') == "yes":
+      self.streamEmptyFile = True
+
+    # then run post-analysis modifications to results
+    if self._getFinalConfigValue('analyze-exclude-empty-cats-and-lics') == "yes":
+      self._analyzeExcludeEmptyCatsAndLics()
+
+  def _getStreamedPathPrefix(self):
+    counter = FileCounter(db=self.db, config=self.kwConfig)
+    return counter.getPathPrefix(scan_ids=self.streamScanIDs)
+
+  def _getStreamedFindings(self, path, md5):
+    findings = {}
+    if self.streamExtList != []:
+      ext = os.path.splitext(path)[1].lstrip(".")
+      if ext in self.streamExtList:
+        findings["extension"] = "yes"
+    for directory in self.streamDirList:
+      if directory in path:
+        findings["thirdparty"] = "yes"
+    if self.streamEmptyFile and md5 == self.MD5_EMPTY_FILE:
+      findings["emptyfile"] = "yes"
+    return findings
+
   def _runAnalysis(self):
     if self.primaryScanCategories == OrderedDict():
       raise ReportAnalysisError("Cannot call _runAnalysis before _buildScanCategories")
@@ -240,6 +355,48 @@ class Analyzer:
       for lic_id in licsToDelete:
         del cat.licensesSorted[lic_id]
 
+  ##### Result model helper functions
+
+  def _buildResults(self):
+    results = []
+    for cat_id, cat in self.primaryScanCategories.items():
+      licenses = []
+      for lic_id, lic in cat.licensesSorted.items():
+        files = tuple(
+          ResultFile(_id=f_id, scan_id=f.scan_id, license_id=lic_id,
+            path=f.path, sha1=f.sha1, md5=f.md5, sha256=f.sha256,
+            findings=f.findings)
+          for f_id, f in lic.filesSorted.items()
+        )
+        licenses.append(ResultLicense(_id=lic_id, name=lic.name, files=files,
+          numFiles=lic.numFiles))
+      results.append(ResultCategory(_id=cat_id, name=cat.name,
+        licenses=tuple(licenses), numFiles=cat.numFiles))
+    return tuple(results)
+
+  def _buildStreamedResults(self):
+    # rank each license by its position in report order, so that the shared
+    # file stream can tell which license each file belongs to
+    ranks = {}
+    for cat in self.primaryScanCategories.values():
+      for lic_id in cat.licensesSorted.keys():
+        ranks[lic_id] = len(ranks)
+    stream = _FileStream(
+      files=(f for cat, lic, f in self.iterFiles()),
+      ranks=ranks,
+    )
+
+    results = []
+    for cat_id, cat in self.primaryScanCategories.items():
+      licenses = []
+      for lic_id, lic in cat.licensesSorted.items():
+        licenses.append(ResultLicense(_id=lic_id, name=lic.name,
+          files=_StreamedLicenseFiles(stream, lic_id),
+          numFiles=lic.numFiles))
+      results.append(ResultCategory(_id=cat_id, name=cat.name,
+        licenses=tuple(licenses), numFiles=cat.numFiles))
+    return tuple(results)
+
   ##### Other helper functions
 
   def _reset(self):
@@ -248,6 +405,13 @@ class Analyzer:
     self.primaryScanCategories = OrderedDict()
     self.kwConfig = {}
     self.analysisDone = False
+    self.results = None
+    self.streaming = False
+    self.streamScanIDs = []
+    self.streamPrefix = ""
+    self.streamExtList = []
+    self.streamDirList = []
+    self.streamEmptyFile = False
 
   def _getFinalConfigValue(self, key):
     kwValue = self.kwConfig.get(key, None)
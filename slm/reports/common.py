@@ -17,6 +17,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import tempfile
+from contextlib import contextmanager
+
+# file extension for each report format, used for default report paths
+REPORT_EXTENSIONS = {
+  "xlsx": "xlsx",
+  "json": "json",
+  "json-compact": "compact.json",
+  "ndjson": "ndjson",
+  "csv": "csv",
+  "sqlite": "sqlite",
+}
+
 class ReportFileError(Exception):
   """Exception raised for report file errors (e.g. invalid path or permission).
 
@@ -43,3 +57,107 @@ class ReportAnalysisError(Exception):
   """
   def __init__(self, message):
     self.message = message
+
+##### Atomic report writing
+
+# reports are first written to a hidden temporary file in the same
+# directory, named ".{report filename}.{pid}.{random}.slm-tmp"
+TEMP_SUFFIX = ".slm-tmp"
+
+@contextmanager
+def atomicReportPath(path):
+  """
+  Yield a temporary path in the same directory as path, for a report to be
+  written to. If the with block completes, the temporary file is synced to
+  disk and renamed to path, replacing any existing file; otherwise it is
+  removed. Either way, path never holds a partly-written report.
+  """
+  dirName = os.path.dirname(os.path.abspath(path))
+  fd, tmpPath = tempfile.mkstemp(dir=dirName, suffix=TEMP_SUFFIX,
+    prefix=f".{os.path.basename(path)}.{os.getpid()}.")
+  os.close(fd)
+  try:
+    yield tmpPath
+    # mkstemp creates the file readable by its owner only; give it the
+    # mode of the file it replaces, or the usual mode for a new file
+    try:
+      mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+      mode = 0o666 & ~_getUmask()
+    os.chmod(tmpPath, mode)
+    _fsyncPath(tmpPath)
+    os.replace(tmpPath, path)
+  except BaseException:
+    if os.path.exists(tmpPath):
+      os.remove(tmpPath)
+    raise
+  # and make sure the rename itself is on disk
+  _fsyncDir(dirName)
+
+def _getUmask():
+  # the umask can only be read by setting it, so it is read once and kept,
+  # rather than briefly changing it while other threads may create files
+  global _umask
+  if _umask is None:
+    _umask = os.umask(0o022)
+    os.umask(_umask)
+  return _umask
+
+_umask = None
+
+def cleanOrphanedTempFiles(dirName):
+  """
+  Remove temporary report files left in dirName by processes that were
+  killed while writing them. Files belonging to processes that are still
+  running are left alone. Returns the number of files removed.
+  """
+  numRemoved = 0
+  try:
+    filenames = os.listdir(dirName)
+  except FileNotFoundError:
+    return 0
+  for filename in filenames:
+    if not (filename.startswith(".") and filename.endswith(TEMP_SUFFIX)):
+      continue
+    parts = filename[:-len(TEMP_SUFFIX)].rsplit(".", 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+      continue
+    if _isProcessRunning(int(parts[1])):
+      continue
+    try:
+      os.remove(os.path.join(dirName, filename))
+      numRemoved += 1
+    except FileNotFoundError:
+      pass
+  return numRemoved
+
+def _fsyncPath(path):
+  with open(path, "rb") as f:
+    os.fsync(f.fileno())
+
+def _fsyncDir(dirName):
+  # not every platform can open a directory to sync it
+  try:
+    fd = os.open(dirName, os.O_RDONLY)
+  except OSError:
+    return
+  try:
+    os.fsync(fd)
+  except OSError:
+    pass
+  finally:
+    os.close(fd)
+
+def _isProcessRunning(pid):
+  if pid == os.getpid():
+    return True
+  try:
+    os.kill(pid, 0)
+  except ProcessLookupError:
+    return False
+  except PermissionError:
+    # running, but owned by someone else
+    return True
+  except OSError:
+    return False
+  return True
@@ -0,0 +1,164 @@
+# reports/counts.py
+#
+# Module for counting files by license, category and finding for
+# spdxLicenseManager, across one or more scans. All counting is done by
+# aggregate queries in the database.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from sqlalchemy import Integer, cast, func, or_
+
+from ..datatypes import File, License
+from ..projectdb import ProjectDBQueryError
+
+class FileCounts:
+  """Counts of files across one or more scans.
+
+  Attributes:
+    licenseCounts -- dict of license ID => number of files
+    categoryCounts -- dict of category ID => number of files
+    findingCounts -- dict of finding name => dict of license ID => number
+                     of files with that finding
+    total -- total number of files
+  """
+  __slots__ = ('licenseCounts', 'categoryCounts', 'findingCounts', 'total')
+
+  def __init__(self, licenseCounts, categoryCounts, findingCounts):
+    self.licenseCounts = licenseCounts
+    self.categoryCounts = categoryCounts
+    self.findingCounts = findingCounts
+    self.total = sum(licenseCounts.values())
+
+class FileCounter:
+
+  MD5_EMPTY_FILE = "d41d8cd98f00b204e9800998ecf8427e"
+
+  def __init__(self, db, config={}):
+    super(FileCounter, self).__init__()
+    self.db = db
+    self.kwConfig = {}
+    # copy over config entries into new dict
+    for key, value in config.items():
+      self.kwConfig[key] = value
+
+  ##### Main counting functions
+  ##### External usage shouldn't require calling anything except these
+
+  def countFiles(self, scan_ids, withFindings=True):
+    licToCat = dict(self.db.session.query(License._id, License.category_id).all())
+    findings = []
+    if withFindings:
+      findings = self._getFindingColumns(scan_ids)
+
+    if findings == []:
+      licenseCounts = self.db.getFilesCountByLicense(scan_ids=scan_ids)
+      findingCounts = {}
+    else:
+      licenseCounts, findingCounts = self._countWithFindings(scan_ids,
+        findings)
+
+    # roll up license counts into their categories
+    categoryCounts = {}
+    for lic_id, count in licenseCounts.items():
+      c_id = licToCat[lic_id]
+      categoryCounts[c_id] = categoryCounts.get(c_id, 0) + count
+
+    return FileCounts(licenseCounts, categoryCounts, findingCounts)
+
+  def getPathPrefix(self, scan_ids):
+    # narrow down the common prefix one path at a time, so that we never
+    # need to hold the full list of paths
+    prefix = None
+    for path in self.db.iterFilePaths(scan_ids=scan_ids):
+      try:
+        if prefix is None:
+          prefix = os.path.commonpath([path])
+        else:
+          prefix = os.path.commonpath([prefix, path])
+      except ValueError:
+        # mixing absolute and relative paths, so no common prefix
+        return ""
+      if prefix == "":
+        return ""
+    if prefix is None:
+      return ""
+    return prefix
+
+  ##### Counting helper functions
+
+  def _countWithFindings(self, scan_ids, findings):
+    # each finding column is 0 or 1 per file, so summing it by license
+    # counts the files with that finding, in the same single query
+    columns = [File.license_id, func.count(File._id)] + \
+      [func.sum(col) for name, col in findings]
+    query = self.db.session.query(*columns).\
+                            filter(File.scan_id.in_(scan_ids)).\
+                            group_by(File.license_id)
+    licenseCounts = {}
+    findingCounts = {name: {} for name, col in findings}
+    for row in query.all():
+      l_id = row[0]
+      licenseCounts[l_id] = row[1]
+      for (name, col), count in zip(findings, row[2:]):
+        if count:
+          findingCounts[name][l_id] = count
+    return licenseCounts, findingCounts
+
+  def _getFindingColumns(self, scan_ids):
+    # each finding is computed by the database as a 0/1 column, matching
+    # the corresponding per-file check in Analyzer
+    findings = []
+    if self._getFinalConfigValue('analyze-emptyfile') == "yes":
+      col = func.coalesce(cast(File.md5 == self.MD5_EMPTY_FILE, Integer), 0)
+      findings.append(("emptyfile", col))
+    if self._getFinalConfigValue('analyze-thirdparty') == "yes":
+      dirList = self._parseDirConfig()
+      if dirList != []:
+        # Analyzer looks for third party dirs after stripping any common
+        # path prefix, so do the same here
+        path = File.path
+        if self._getFinalConfigValue('analyze-exclude-path-prefix') == "yes":
+          prefix = self.getPathPrefix(scan_ids)
+          path = func.substr(File.path, len(prefix) + 1)
+        conds = [func.instr(path, d) > 0 for d in dirList]
+        col = func.coalesce(cast(or_(*conds), Integer), 0)
+        findings.append(("thirdparty", col))
+    return findings
+
+  ##### Other helper functions
+
+  def _getFinalConfigValue(self, key):
+    kwValue = self.kwConfig.get(key, None)
+    if kwValue is not None:
+      return str(kwValue).lower()
+    try:
+      value = self.db.getConfigValue(key)
+      return str(value).lower()
+    except ProjectDBQueryError:
+      return ""
+
+  def _parseDirConfig(self):
+    dirString = self._getFinalConfigValue('analyze-thirdparty-dirs')
+    if dirString == '':
+      return []
+
+    dirList = dirString.split(';')
+    dirStripped = []
+    for directory in dirList:
+      dirStripped.append(directory.strip())
+    return sorted(dirStripped)
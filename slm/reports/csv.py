@@ -0,0 +1,92 @@
+# reports/csv.py
+#
+# Module for CSV report generation functions for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import os
+
+from .common import ReportFileError, ReportNotReadyError, atomicReportPath
+
+class CSVReporter:
+
+  # finding name => column header, in column order
+  FINDING_COLUMNS = [
+    ("extension", "Excluded extension"),
+    ("thirdparty", "Third party"),
+    ("emptyfile", "Empty file"),
+  ]
+
+  def __init__(self, db, config={}):
+    super(CSVReporter, self).__init__()
+    self._reset()
+    self.db = db
+    # copy over config entries into new dict
+    for key, value in config.items():
+      self.kwConfig[key] = value
+
+  ##### Main CSV reporting functions
+  ##### External usage shouldn't require calling anything except these
+
+  def setResults(self, results):
+    self.results = results
+
+  def generate(self):
+    pass
+
+  def save(self, path, replace=False):
+    self._saveCheck(path=path, replace=replace)
+
+    try:
+      with atomicReportPath(path) as tmpPath:
+        with open(tmpPath, "w", newline="") as f:
+          self._writeResults(f, self.results)
+    except PermissionError:
+      raise ReportFileError(f"Permission denied to save to {path}")
+
+  ##### Helper functions for CSV reporting
+
+  def _writeResults(self, f, results):
+    # one row per file, written as the results are read
+    writer = csv.writer(f)
+    writer.writerow(["Category", "License", "File"] +
+      [header for finding, header in self.FINDING_COLUMNS])
+    for cat in results:
+      for lic in cat.licenses:
+        for file in lic.files:
+          row = [cat.name, lic.name, file.path]
+          for finding, header in self.FINDING_COLUMNS:
+            row.append(file.findings.get(finding, ""))
+          writer.writerow(row)
+
+  def _saveCheck(self, path, replace=False):
+    if self.results is None:
+      raise ReportNotReadyError("Cannot call save() before analysis results are set")
+
+    # check whether requested file already exists
+    if os.path.exists(path) and not replace:
+      raise ReportFileError(f"File already exists at {path}")
+
+    # check whether we have write permission for this path
+    if not os.access(path=os.path.dirname(path), mode=os.W_OK):
+      raise ReportFileError(f"Permission denied to save to {path}")
+
+  ##### Other helper functions
+
+  def _reset(self):
+    self.results = None
+    self.kwConfig = {}
@@ -0,0 +1,252 @@
+# reports/diff.py
+#
+# Module for comparing two scans and reporting the differences for
+# spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import os
+import openpyxl
+
+from .common import (ReportAnalysisError, ReportFileError,
+  ReportNotReadyError, atomicReportPath)
+from .counts import FileCounter
+from .results import _ReadOnlyResult
+from ..projectdb import ProjectDBQueryError
+
+class DiffFile(_ReadOnlyResult):
+  """File that differs between two scans.
+
+  Attributes:
+    path -- file path
+    status -- one of "added", "removed" or "changed"
+    oldLicense -- license name in the earlier scan (None if added)
+    newLicense -- license name in the later scan (None if removed)
+    changes -- tuple of what changed, from "license", "sha1", "md5" and
+               "sha256"; empty unless status is "changed"
+  """
+  __slots__ = ('path', 'status', 'oldLicense', 'newLicense', 'changes')
+
+  def __init__(self, *, path, status, oldLicense=None, newLicense=None,
+    changes=()):
+    self._init(path=path, status=status, oldLicense=oldLicense,
+      newLicense=newLicense, changes=changes)
+
+  def __repr__(self):
+    return f"DiffFile {self.status}: {self.path}"
+
+class ScanDiffer:
+
+  ADDED = "added"
+  REMOVED = "removed"
+  CHANGED = "changed"
+
+  # index in iterFilesByPath tuples => name of the change
+  CHECKSUM_COLUMNS = [(2, "sha1"), (3, "md5"), (4, "sha256")]
+
+  def __init__(self, db, config={}):
+    super(ScanDiffer, self).__init__()
+    self.db = db
+    self.kwConfig = {}
+    # copy over config entries into new dict
+    for key, value in config.items():
+      self.kwConfig[key] = value
+
+  ##### Main diff functions
+  ##### External usage shouldn't require calling anything except these
+
+  def iterDiff(self, fromScanID, toScanID):
+    """
+    Yield a DiffFile for each file that was added, removed or changed
+    between the two scans, in path order. Both scans are read as ordered
+    cursors and merged in one pass, so neither is loaded into memory.
+    Checksums are only compared where both scans have a value. If
+    analyze-exclude-path-prefix is set, each scan's common path prefix is
+    removed first, as in reports, so that versioned top-level directories
+    still line up.
+    """
+    for s_id in [fromScanID, toScanID]:
+      if self.db.getScan(_id=s_id) is None:
+        raise ReportAnalysisError(f"Scan ID {s_id} does not exist.")
+    licNames = {lic._id: lic.name for lic in self.db.getLicensesAll()}
+
+    oldIter = self._iterFilesByPath(fromScanID)
+    newIter = self._iterFilesByPath(toScanID)
+    old = next(oldIter, None)
+    new = next(newIter, None)
+    while old is not None or new is not None:
+      if new is None or (old is not None and old[0] < new[0]):
+        yield DiffFile(path=old[0], status=self.REMOVED,
+          oldLicense=licNames.get(old[1]))
+        old = next(oldIter, None)
+      elif old is None or new[0] < old[0]:
+        yield DiffFile(path=new[0], status=self.ADDED,
+          newLicense=licNames.get(new[1]))
+        new = next(newIter, None)
+      else:
+        changes = self._getChanges(old, new)
+        if changes != ():
+          yield DiffFile(path=old[0], status=self.CHANGED,
+            oldLicense=licNames.get(old[1]), newLicense=licNames.get(new[1]),
+            changes=changes)
+        old = next(oldIter, None)
+        new = next(newIter, None)
+
+  ##### Helper functions
+
+  def _iterFilesByPath(self, scan_id):
+    rows = self.db.iterFilesByPath(scan_id=scan_id)
+    if self._getFinalConfigValue('analyze-exclude-path-prefix') != "yes":
+      return rows
+    # every path in the scan shares the prefix, so removing it keeps them
+    # in path order
+    prefix = FileCounter(db=self.db).getPathPrefix(scan_ids=[scan_id])
+    return ((row[0][len(prefix):], *row[1:]) for row in rows)
+
+  def _getFinalConfigValue(self, key):
+    kwValue = self.kwConfig.get(key, None)
+    if kwValue is not None:
+      return str(kwValue).lower()
+    try:
+      value = self.db.getConfigValue(key)
+      return str(value).lower()
+    except ProjectDBQueryError:
+      return ""
+
+  def _getChanges(self, old, new):
+    changes = []
+    if old[1] != new[1]:
+      changes.append("license")
+    for i, name in self.CHECKSUM_COLUMNS:
+      if old[i] is not None and new[i] is not None and old[i] != new[i]:
+        changes.append(name)
+    return tuple(changes)
+
+class DiffReporter:
+
+  FORMATS = ["json", "csv", "xlsx"]
+
+  def __init__(self):
+    super(DiffReporter, self).__init__()
+    self._reset()
+
+  ##### Main diff reporting functions
+  ##### External usage shouldn't require calling anything except these
+
+  def setDiff(self, diffFiles):
+    # diffFiles can be a one-shot iterator, so it is only consumed by save()
+    self.diffFiles = diffFiles
+    self.counts = {ScanDiffer.ADDED: 0, ScanDiffer.REMOVED: 0,
+      ScanDiffer.CHANGED: 0}
+
+  def save(self, path, report_format, replace=False):
+    if report_format not in self.FORMATS:
+      raise ReportFileError(f"Unknown diff report format: {report_format}")
+    self._saveCheck(path=path, replace=replace)
+
+    try:
+      with atomicReportPath(path) as tmpPath:
+        if report_format == "json":
+          self._saveJSON(tmpPath)
+        elif report_format == "csv":
+          self._saveCSV(tmpPath)
+        else:
+          self._saveXlsx(tmpPath)
+    except PermissionError:
+      raise ReportFileError(f"Permission denied to save to {path}")
+
+  ##### Helper functions for each format
+
+  def _iterCounted(self):
+    for df in self.diffFiles:
+      self.counts[df.status] += 1
+      yield df
+
+  def _saveJSON(self, path):
+    # write one entry at a time, rather than building the whole list
+    with open(path, "w") as f:
+      f.write("[")
+      first = True
+      for df in self._iterCounted():
+        if not first:
+          f.write(", ")
+        first = False
+        json.dump({
+          'path': df.path,
+          'status': df.status,
+          'oldLicense': df.oldLicense,
+          'newLicense': df.newLicense,
+          'changes': list(df.changes),
+        }, f)
+      f.write("]")
+
+  def _saveCSV(self, path):
+    with open(path, "w", newline="") as f:
+      writer = csv.writer(f)
+      writer.writerow(["Status", "File", "Old license", "New license",
+        "Changes"])
+      for df in self._iterCounted():
+        writer.writerow([df.status, df.path, df.oldLicense or "",
+          df.newLicense or "", ";".join(df.changes)])
+
+  def _saveXlsx(self, path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Scan diff"
+
+    # create font styles
+    fontBold = openpyxl.styles.Font(size=16, bold=True)
+    fontNormal = openpyxl.styles.Font(size=14)
+
+    # set column dimensions and fill in sheet headers
+    headers = [("A", "Status", 12), ("B", "File", 100),
+      ("C", "Old license", 30), ("D", "New license", 30),
+      ("E", "Changes", 20)]
+    for col, header, width in headers:
+      ws.column_dimensions[col].width = width
+      ws[f'{col}1'] = header
+      ws[f'{col}1'].font = fontBold
+
+    row = 2
+    for df in self._iterCounted():
+      values = [df.status, df.path, df.oldLicense, df.newLicense,
+        ", ".join(df.changes)]
+      for (col, header, width), value in zip(headers, values):
+        ws[f'{col}{row}'] = value
+        ws[f'{col}{row}'].font = fontNormal
+      row += 1
+
+    wb.save(path)
+
+  ##### Other helper functions
+
+  def _saveCheck(self, path, replace=False):
+    if self.diffFiles is None:
+      raise ReportNotReadyError("Cannot call save() before diff is set")
+
+    # check whether requested file already exists
+    if os.path.exists(path) and not replace:
+      raise ReportFileError(f"File already exists at {path}")
+
+    # check whether we have write permission for this path
+    if not os.access(path=os.path.dirname(os.path.abspath(path)), mode=os.W_OK):
+      raise ReportFileError(f"Permission denied to save to {path}")
+
+  def _reset(self):
+    self.diffFiles = None
+    self.counts = None
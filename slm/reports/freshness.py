@@ -0,0 +1,113 @@
+# reports/freshness.py
+#
+# Module for checking whether previously-created reports are up to date,
+# for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+
+from sqlalchemy import or_
+
+from .common import ReportFileError, atomicReportPath
+from ..__about__ import __version__
+from ..datatypes import Category, Config, License
+
+# only config values with these prefixes change what a report contains
+REPORT_CONFIG_PREFIXES = ["analyze-", "report-"]
+
+class ReportFingerprinter:
+  """Computes fingerprints of everything that a scan's report depends on:
+  the scan itself, the categories and licenses, the project's analyzer and
+  reporter config values and the spdxLicenseManager version. A scan's files never change
+  after it is imported, so the scan is identified by its ID and date."""
+
+  def __init__(self, db):
+    super(ReportFingerprinter, self).__init__()
+    self.db = db
+    self.catalogHash = None
+
+  def getScanFingerprint(self, scan):
+    if self.catalogHash is None:
+      self.catalogHash = self._getCatalogHash()
+    h = hashlib.sha1(self.catalogHash.encode("utf-8"))
+    h.update(f"|scan|{scan._id}|{scan.subproject_id}|{scan.scan_dt}".encode("utf-8"))
+    return h.hexdigest()
+
+  ##### Helper functions
+
+  def _getCatalogHash(self):
+    # the catalog tables are small, so they are read in full once per run
+    session = self.db.session
+    catalog = [
+      ["version", __version__],
+      ["categories", session.query(Category._id, Category.name,
+        Category.order).order_by(Category._id).all()],
+      ["licenses", session.query(License._id, License.name,
+        License.category_id).order_by(License._id).all()],
+      ["configs", session.query(Config.key, Config.value).\
+        filter(or_(*[Config.key.like(f"{prefix}%")
+          for prefix in REPORT_CONFIG_PREFIXES])).\
+        order_by(Config.key).all()],
+    ]
+    s = json.dumps(catalog, default=str)
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+class ReportManifest:
+  """Records the fingerprint that each report in a reports directory was
+  created from, in a hidden JSON file alongside the reports."""
+
+  FILENAME = ".slm-reports.json"
+
+  def __init__(self, reportsDir):
+    super(ReportManifest, self).__init__()
+    self.path = os.path.join(reportsDir, self.FILENAME)
+    self.fingerprints = {}
+    self.changed = False
+    try:
+      with open(self.path, "r") as f:
+        self.fingerprints = json.load(f)
+    except (FileNotFoundError, ValueError):
+      # no manifest yet, or an unreadable one; treat as empty
+      self.fingerprints = {}
+
+  def isUpToDate(self, reportPath, fingerprint):
+    """
+    A report is up to date if it exists and was either created from this
+    fingerprint, or has no recorded fingerprint (in which case it was
+    created by hand or by an earlier version, and is left alone).
+    """
+    if not os.path.exists(reportPath):
+      return False
+    recorded = self.fingerprints.get(os.path.basename(reportPath), None)
+    return recorded is None or recorded == fingerprint
+
+  def record(self, reportPath, fingerprint):
+    self.fingerprints[os.path.basename(reportPath)] = fingerprint
+    self.changed = True
+
+  def save(self):
+    if not self.changed:
+      return
+    try:
+      with atomicReportPath(self.path) as tmpPath:
+        with open(tmpPath, "w") as f:
+          json.dump(self.fingerprints, f, indent=2, sort_keys=True)
+    except PermissionError:
+      raise ReportFileError(f"Permission denied to save to {self.path}")
+    self.changed = False
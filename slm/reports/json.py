@@ -19,12 +19,19 @@
 
 import json
 import os
+from collections import OrderedDict
 
-from .common import ReportFileError, ReportNotReadyError
-from ..datatypes import Category, File, License
+from .common import ReportFileError, ReportNotReadyError, atomicReportPath
+from .results import ResultDirectory
+from .rollup import rollUpResults
+from ..projectdb import ProjectDBQueryError
 
 class JSONReporter:
 
+  PRETTY_PRINT_INDENT = 2
+  # whether the report-rollup-dirs config is honored
+  SUPPORTS_ROLLUP = True
+
   def __init__(self, db, config={}):
     super(JSONReporter, self).__init__()
     self._reset()
@@ -37,70 +44,73 @@ class JSONReporter:
   ##### External usage shouldn't require calling anything except these
 
   def setResults(self, results):
-    self.rjs = ""
     self.results = results
 
   def generate(self):
     pass
 
   def save(self, path, replace=False):
-    if type(self.results) != list:
+    if self.results is None:
       raise ReportNotReadyError("Cannot call generateAndSave() before analysis results are set")
 
     self._saveCheck(path=path, replace=replace)
 
+    indent = None
+    if self._getFinalConfigValue("report-pretty-print") == "yes":
+      indent = self.PRETTY_PRINT_INDENT
+
+    results = self.results
+    if (self.SUPPORTS_ROLLUP and
+        self._getFinalConfigValue("report-rollup-dirs") == "yes"):
+      results = rollUpResults(results)
+
     try:
-      with open(path, "w") as f:
-        json.dump(list(self.results), f, cls=self.SLMJSONEncoder)
+      with atomicReportPath(path) as tmpPath:
+        with open(tmpPath, "w") as f:
+          self._writeResults(f, results, indent=indent)
     except PermissionError:
       raise ReportFileError(f"Permission denied to save to {path}")
 
-  ##### custom JSON encoder for relevant SLM data types
-
-  class SLMJSONEncoder(json.JSONEncoder):
-    def default(self, o):
-      if isinstance(o, Category):
-        return {
-          'name': o.name,
-          '_id': o._id,
-          'licenses': o.licenses,
-          'numFiles': self._getNumFilesForCategory(o),
-        }
-      elif isinstance(o, License):
-        return {
-          'name': o.name,
-          '_id': o._id,
-          'files': o.files,
-          'numFiles': self._getNumFilesForLicense(o),
-        }
-      elif isinstance(o, File):
-        if o.findings != {}:
-          return {
-            'path': o.path,
-            '_id': o._id,
-            'findings': o.findings,
-            }
-        else:
-          return {
-            'path': o.path,
-            '_id': o._id,
-          }
+  ##### Streaming JSON writer for results
+
+  def _writeResults(self, f, results, indent=None):
+    # categories, licenses and files are written one at a time, in the
+    # same format that json.dump() would produce, so that nothing is built
+    # up in memory; counts come from the results rather than from the lists
+    writer = _JSONStreamWriter(f, indent=indent)
+
+    def writeFile(file, level):
+      # rolled-up directories have a file count rather than an ID
+      if isinstance(file, ResultDirectory):
+        pairs = [('path', file.path), ('numFiles', file.numFiles)]
       else:
-        return {'__{}__'.format(o.__class__.__name__): o.__dict__}
+        pairs = [('path', file.path), ('_id', file._id)]
+      if file.findings != {}:
+        pairs.append(('findings', dict(file.findings)))
+      writer.writeObject(pairs, level)
 
-    def _getNumFilesForLicense(self, lic):
-      return len(lic.files)
+    def writeLicense(lic, level):
+      writer.writeObject([
+        ('name', lic.name),
+        ('_id', lic._id),
+        ('files', lambda lvl: writer.writeList(lic.files, lvl, writeFile)),
+        ('numFiles', lic.numFiles),
+      ], level)
 
-    def _getNumFilesForCategory(self, cat):
-      count = 0
-      for lic in cat.licenses:
-        count += self._getNumFilesForLicense(lic)
-      return count
+    def writeCategory(cat, level):
+      writer.writeObject([
+        ('name', cat.name),
+        ('_id', cat._id),
+        ('licenses', lambda lvl: writer.writeList(cat.licenses, lvl, writeLicense)),
+        ('numFiles', cat.numFiles),
+      ], level)
+
+    writer.writeList(results, 0, writeCategory)
 
   ##### Helper functions for JSON saving
 
   def _saveCheck(self, path, replace=False):
-    if type(self.results) != list:
+    if self.results is None:
       raise ReportNotReadyError("Cannot call generateAndSave() before analysis results are set")
 
     # check whether requested file already exists
@@ -114,7 +124,6 @@ class JSONReporter:
   ##### Other helper functions
 
   def _reset(self):
-    self.rjs = None
     self.results = None
     self.reportSaved = False
     self.kwConfig = {}
@@ -128,3 +137,134 @@ class JSONReporter:
       return str(value).lower()
     except ProjectDBQueryError:
       return ""
+
+class JSONCompactReporter(JSONReporter):
+  """JSON report with no repeated keys or directory names. Categories and
+  licenses are listed once, and each file is a row of
+  [dir, name, _id, license, findings], where dir is an index into the dirs
+  path table, license is an index into the licenses list, and findings is
+  a bitmask of the entries in the findings list that are set for the file.
+  Each dirs entry keeps its trailing "/", so a file's path is always
+  dirs[dir] + name: "/x.c" has dir "/", and "x.c" has dir ""."""
+
+  FORMAT_NAME = "slm-json-compact-2"
+  FINDINGS = ["extension", "thirdparty", "emptyfile"]
+  FILE_COLUMNS = ["dir", "name", "_id", "license", "findings"]
+  SUPPORTS_ROLLUP = False
+
+  def _writeResults(self, f, results, indent=None):
+    # the header lists are small, so they are built first; the files are
+    # then written one row at a time. This format is never pretty-printed.
+    categories = []
+    licenses = []
+    for catIndex, cat in enumerate(results):
+      categories.append({'name': cat.name, '_id': cat._id,
+        'numFiles': cat.numFiles})
+      for lic in cat.licenses:
+        licenses.append((lic, catIndex))
+    header = OrderedDict([
+      ('format', self.FORMAT_NAME),
+      ('categories', categories),
+      ('licenses', [{'name': lic.name, '_id': lic._id, 'category': catIndex,
+        'numFiles': lic.numFiles} for lic, catIndex in licenses]),
+      ('findings', self.FINDINGS),
+      ('fileColumns', self.FILE_COLUMNS),
+    ])
+    # write the header object without its closing brace
+    f.write(json.dumps(header, separators=(",", ":"))[:-1])
+    f.write(',"files":[')
+    # the path table is only as big as the number of directories, and is
+    # written after the files, once it is complete
+    dirs = OrderedDict()
+    first = True
+    for licIndex, (lic, catIndex) in enumerate(licenses):
+      for file in lic.files:
+        if not first:
+          f.write(",")
+        first = False
+        split = file.path.rfind("/") + 1
+        dirName, name = file.path[:split], file.path[split:]
+        dirIndex = dirs.setdefault(dirName, len(dirs))
+        row = [dirIndex, name, file._id, licIndex,
+          self._getFindingsMask(file.findings)]
+        f.write(json.dumps(row, separators=(",", ":")))
+    f.write('],"dirs":')
+    f.write(json.dumps(list(dirs.keys()), separators=(",", ":")))
+    f.write("}")
+
+  def _getFindingsMask(self, findings):
+    mask = 0
+    for i, finding in enumerate(self.FINDINGS):
+      if findings.get(finding, "N/A") == "yes":
+        mask |= (1 << i)
+    return mask
+
+class NDJSONReporter(JSONReporter):
+  """Newline-delimited JSON report: one object per line for each file, with
+  its license, category and findings."""
+
+  SUPPORTS_ROLLUP = False
+
+  def _writeResults(self, f, results, indent=None):
+    # one record per line by definition, so this is never pretty-printed
+    for cat in results:
+      for lic in cat.licenses:
+        for file in lic.files:
+          f.write(json.dumps(OrderedDict([
+            ('path', file.path),
+            ('_id', file._id),
+            ('license', lic.name),
+            ('category', cat.name),
+            ('findings', dict(file.findings)),
+          ]), separators=(",", ":")))
+          f.write("\n")
+
+class _JSONStreamWriter:
+  """Writes JSON lists and objects to a file incrementally, matching the
+  output of json.dump() with the same indent."""
+
+  def __init__(self, f, indent=None):
+    self.f = f
+    self.indent = indent
+    # json.dump() drops the space after commas when indenting
+    self.itemSep = ", " if indent is None else ","
+
+  def writeList(self, items, level, writeItem):
+    empty = True
+    for item in items:
+      self.f.write("[" if empty else self.itemSep)
+      self.f.write(self._newline(level + 1))
+      writeItem(item, level + 1)
+      empty = False
+    if empty:
+      self.f.write("[]")
+    else:
+      self.f.write(self._newline(level) + "]")
+
+  def writeObject(self, pairs, level):
+    # values can be callables, which write themselves at the given level
+    empty = True
+    for key, value in pairs:
+      self.f.write("{" if empty else self.itemSep)
+      self.f.write(self._newline(level + 1))
+      self.f.write(json.dumps(key) + ": ")
+      if callable(value):
+        value(level + 1)
+      else:
+        self.writeValue(value, level + 1)
+      empty = False
+    if empty:
+      self.f.write("{}")
+    else:
+      self.f.write(self._newline(level) + "}")
+
+  def writeValue(self, value, level):
+    s = json.dumps(value, indent=self.indent)
+    if self.indent is not None:
+      s = s.replace("\n", self._newline(level))
+    self.f.write(s)
+
+  def _newline(self, level):
+    if self.indent is None:
+      return ""
+    return "\n" + " " * (self.indent * level)
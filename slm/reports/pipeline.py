@@ -0,0 +1,185 @@
+# reports/pipeline.py
+#
+# Module for creating reports for many scans, overlapping the analysis of
+# one scan with the writing of the previous scan's reports, for
+# spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .analysis import Analyzer
+from .common import ReportFileError
+from .csv import CSVReporter
+from .json import JSONCompactReporter, JSONReporter, NDJSONReporter
+from .sqlite import SQLiteReporter
+from .xlsx import XlsxReporter
+from ..projectdb import ProjectDB
+
+# reporter class and display name for each report format
+REPORTERS = {
+  "xlsx": (XlsxReporter, "XLSX"),
+  "json": (JSONReporter, "JSON"),
+  "json-compact": (JSONCompactReporter, "compact JSON"),
+  "ndjson": (NDJSONReporter, "NDJSON"),
+  "csv": (CSVReporter, "CSV"),
+  "sqlite": (SQLiteReporter, "SQLite"),
+}
+
+# stages that report creation time is broken down into
+STAGES = ["analysis", "render", "write"]
+
+def newStageTimings():
+  return {stage: 0.0 for stage in STAGES}
+
+def analyzeScan(db, scan_id, timings):
+  """Analyze one scan, adding the time taken to timings["analysis"]."""
+  start = time.perf_counter()
+  try:
+    analyzer = Analyzer(db=db)
+    analyzer.runAnalysis(scan_ids=[scan_id])
+    return analyzer.getResults()
+  finally:
+    timings["analysis"] += time.perf_counter() - start
+
+def writeScanReports(db, scan_id, results, reports, timings):
+  """
+  Create one scan's reports from its analysis results. reports is a list
+  of (format, path) tuples; existing files are replaced. Returns the list
+  of paths created and a list of error messages.
+  """
+  created = []
+  errors = []
+  for fmt, reportPath in reports:
+    reporterClass, fmtName = REPORTERS[fmt]
+    start = time.perf_counter()
+    reporter = reporterClass(db=db, config={})
+    reporter.setResults(results)
+    reporter.generate()
+    saveStart = time.perf_counter()
+    timings["render"] += saveStart - start
+    try:
+      reporter.save(path=reportPath, replace=True)
+      created.append(reportPath)
+    except ReportFileError as e:
+      errors.append(f"Error creating {fmtName} report for scan {scan_id} at {reportPath}: {str(e)}")
+    finally:
+      timings["write"] += time.perf_counter() - saveStart
+  return (created, errors)
+
+def createScanReports(db, scan_id, reports, timings):
+  """Analyze one scan and create its reports; see writeScanReports()."""
+  results = analyzeScan(db, scan_id, timings)
+  return writeScanReports(db, scan_id, results, reports, timings)
+
+class ReportPipeline:
+  """Creates reports for a sequence of scans in two overlapping stages. The
+  calling process analyzes each scan in turn and hands its results to a
+  report process, which renders and writes them while the next scan is
+  analyzed. Both stages are CPU-bound Python, so the report stage runs in
+  its own process rather than a thread. At most queueSize analyzed scans
+  are handed to the report stage and not yet finished at any time, so
+  analysis cannot run far ahead and hold many scans' results in memory.
+
+  The report process opens its own read-only connection to the project
+  database, since reporters may read config values while they work.
+
+  Handing each scan's results to another process costs time too, so the
+  stages are only overlapped if overlap is True; otherwise each scan is
+  analyzed and reported on in turn, in the calling process."""
+
+  def __init__(self, db, queueSize=2, overlap=True):
+    super(ReportPipeline, self).__init__()
+    self.db = db
+    self.queueSize = queueSize
+    self.overlap = overlap
+    self.timings = newStageTimings()
+
+  ##### Main pipeline functions
+  ##### External usage shouldn't require calling anything except these
+
+  def run(self, tasks):
+    """
+    Create reports for each (scan_id, reports) task, where reports is as
+    for writeScanReports(). Returns a (created, errors) tuple for each task,
+    in the same order. A scan that fails is reported in its errors rather
+    than stopping the remaining scans.
+    """
+    outcomes = [([], []) for task in tasks]
+
+    # with only one scan there is nothing to overlap
+    if not self.overlap or len(tasks) < 2:
+      for i, (scan_id, reports) in enumerate(tasks):
+        outcomes[i] = self._runInProcess(scan_id, reports)
+      return outcomes
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=1, initializer=_openReportDB,
+        initargs=(self.db.pathToDB,)) as executor:
+      for i, (scan_id, reports) in enumerate(tasks):
+        try:
+          results = analyzeScan(self.db, scan_id, self.timings)
+        except Exception as e:
+          outcomes[i] = ([], [_getScanError(scan_id, e)])
+          continue
+        pending.append((i, scan_id, executor.submit(_writeScanReportsInWorker,
+          scan_id, results, reports)))
+        del results
+        # wait for the report stage to catch up before analyzing more
+        while len(pending) > self.queueSize:
+          self._collect(pending.popleft(), outcomes)
+      while pending:
+        self._collect(pending.popleft(), outcomes)
+    return outcomes
+
+  ##### Helper functions
+
+  def _runInProcess(self, scan_id, reports):
+    try:
+      return createScanReports(self.db, scan_id, reports, self.timings)
+    except Exception as e:
+      return ([], [_getScanError(scan_id, e)])
+
+  def _collect(self, item, outcomes):
+    i, scan_id, future = item
+    try:
+      created, errors, workerTimings = future.result()
+    except Exception as e:
+      outcomes[i] = ([], [_getScanError(scan_id, e)])
+      return
+    outcomes[i] = (created, errors)
+    for stage in STAGES:
+      self.timings[stage] += workerTimings[stage]
+
+def _getScanError(scan_id, e):
+  return f"Error creating reports for scan {scan_id}: {str(e)}"
+
+##### Functions run in the report stage's process
+
+_reportDB = None
+
+def _openReportDB(pathToDB):
+  global _reportDB
+  _reportDB = ProjectDB()
+  _reportDB.openDB(pathToDB, readonly=True)
+
+def _writeScanReportsInWorker(scan_id, results, reports):
+  workerTimings = newStageTimings()
+  created, errors = writeScanReports(_reportDB, scan_id, results, reports,
+    workerTimings)
+  return (created, errors, workerTimings)
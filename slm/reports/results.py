@@ -0,0 +1,153 @@
+# reports/results.py
+#
+# Module for the analysis result model for spdxLicenseManager. Produced once
+# by the Analyzer and consumed read-only by every reporter.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from types import MappingProxyType
+
+class _ReadOnlyResult:
+  """Base for result classes; attributes can only be set in __init__."""
+  __slots__ = ()
+
+  def __setattr__(self, name, value):
+    raise AttributeError(f"Cannot modify {name} on read-only {self.__class__.__name__}")
+
+  def __delattr__(self, name):
+    raise AttributeError(f"Cannot delete {name} on read-only {self.__class__.__name__}")
+
+  def _init(self, **kwargs):
+    for key, value in kwargs.items():
+      object.__setattr__(self, key, value)
+
+  # results are pickled when they are passed to another process; read-only
+  # mappings can't be pickled, so they are passed as plain dicts
+  def __getstate__(self):
+    state = {}
+    for key in self.__slots__:
+      value = getattr(self, key)
+      if isinstance(value, MappingProxyType):
+        value = dict(value)
+      state[key] = value
+    return state
+
+  def __setstate__(self, state):
+    self._init(**{key: MappingProxyType(value) if isinstance(value, dict)
+      else value for key, value in state.items()})
+
+class ResultCategory(_ReadOnlyResult):
+  """Category in analysis results, with its licenses in report order.
+
+  Attributes:
+    _id -- category ID in the project database
+    name -- category name
+    numFiles -- total number of files across all of its licenses
+    licenses -- sequence of ResultLicense, sorted by license name
+  """
+  __slots__ = ('_id', 'name', 'numFiles', 'licenses')
+
+  def __init__(self, *, _id, name, licenses, numFiles=None):
+    if numFiles is None:
+      numFiles = sum(lic.numFiles for lic in licenses)
+    self._init(_id=_id, name=name, numFiles=numFiles, licenses=licenses)
+
+  @property
+  def hasFiles(self):
+    return self.numFiles > 0
+
+  def __repr__(self):
+    return f"ResultCategory {self._id}: {self.name} ({self.numFiles} files)"
+
+class ResultLicense(_ReadOnlyResult):
+  """License in analysis results, with its files in report order.
+
+  Attributes:
+    _id -- license ID in the project database (or a temporary ID for
+           licenses created only for reporting)
+    name -- license name
+    numFiles -- number of files with this license
+    files -- iterable of ResultFile, sorted by path. In streaming mode this
+             can only be iterated once, in report order.
+  """
+  __slots__ = ('_id', 'name', 'numFiles', 'files')
+
+  def __init__(self, *, _id, name, files, numFiles=None):
+    if numFiles is None:
+      numFiles = len(files)
+    self._init(_id=_id, name=name, numFiles=numFiles, files=files)
+
+  @property
+  def hasFiles(self):
+    return self.numFiles > 0
+
+  def __repr__(self):
+    return f"ResultLicense {self._id}: {self.name} ({self.numFiles} files)"
+
+class ResultFile(_ReadOnlyResult):
+  """File in analysis results.
+
+  Attributes:
+    _id -- file ID in the project database
+    scan_id -- ID of the scan containing this file
+    license_id -- ID of this file's concluded license
+    path -- file path, after any prefix stripping from analysis
+    sha1, md5, sha256 -- checksums (can be None)
+    findings -- read-only mapping of analysis findings, e.g.
+                {"extension": "yes"}
+  """
+  __slots__ = ('_id', 'scan_id', 'license_id', 'path', 'sha1', 'md5',
+    'sha256', 'findings')
+
+  def __init__(self, *, _id, scan_id, license_id, path, sha1=None, md5=None,
+    sha256=None, findings=None):
+    if findings is None:
+      findings = {}
+    # findings are copied, so that later changes to the original dict
+    # can't change the shared results
+    findings = MappingProxyType(dict(findings))
+    self._init(_id=_id, scan_id=scan_id, license_id=license_id, path=path,
+      sha1=sha1, md5=md5, sha256=sha256, findings=findings)
+
+  @property
+  def numFiles(self):
+    return 1
+
+  def __repr__(self):
+    return f"ResultFile {self._id}: scan {self.scan_id}, path {self.path}"
+
+class ResultDirectory(_ReadOnlyResult):
+  """Directory in rolled-up results, standing in for all of the files under
+  it, which share the same license.
+
+  Attributes:
+    path -- directory path, followed by "/**"
+    license_id -- ID of the license shared by all of its files
+    numFiles -- number of files under the directory
+    findings -- read-only mapping of analysis findings shared by all of
+                its files
+  """
+  __slots__ = ('path', 'license_id', 'numFiles', 'findings')
+
+  def __init__(self, *, path, license_id, numFiles, findings=None):
+    if findings is None:
+      findings = {}
+    findings = MappingProxyType(dict(findings))
+    self._init(path=path, license_id=license_id, numFiles=numFiles,
+      findings=findings)
+
+  def __repr__(self):
+    return f"ResultDirectory {self.path} ({self.numFiles} files)"
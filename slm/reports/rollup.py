@@ -0,0 +1,161 @@
+# reports/rollup.py
+#
+# Module for rolling up directories whose files all share the same license
+# into a single row, for spdxLicenseManager reports.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .results import ResultCategory, ResultDirectory, ResultLicense
+
+# suffix added to a directory's path for its rolled-up row
+ROLLUP_SUFFIX = "/**"
+
+def rollUpResults(results, *, byFindings=True, minFiles=2):
+  """
+  Return a copy of results in which each directory whose files all share
+  the same license is replaced by a single ResultDirectory row, for the
+  highest such directory. If byFindings is True, the files must also have
+  the same findings. Directories with fewer than minFiles files are left
+  as they are. Licenses and categories keep their original file counts.
+
+  Every file is read exactly once, so streamed results can be rolled up
+  too; the rolled-up rows are returned as regular tuples.
+  """
+  # gather every file with the index of its license, then sort by path so
+  # that each directory's files are contiguous. Each license's files are
+  # usually already sorted, so this mostly merges existing runs.
+  licenses = []
+  entries = []
+  for cat in results:
+    for lic in cat.licenses:
+      licIndex = len(licenses)
+      licenses.append(lic)
+      for file in lic.files:
+        findings = tuple(sorted(file.findings.items())) if byFindings else ()
+        entries.append((file.path, (licIndex, findings), file))
+  entries.sort(key=lambda entry: entry[0])
+
+  rows = [[] for lic in licenses]
+  trie = _RollupTrie(licenses, rows, minFiles)
+  for path, key, file in entries:
+    trie.addFile(path, key, file)
+  trie.finish()
+
+  # rebuild the results, with each license's rows back in path order
+  rolledUp = []
+  licIndex = 0
+  for cat in results:
+    catLicenses = []
+    for lic in cat.licenses:
+      licRows = sorted(rows[licIndex], key=lambda row: row.path)
+      catLicenses.append(ResultLicense(_id=lic._id, name=lic.name,
+        files=tuple(licRows), numFiles=lic.numFiles))
+      licIndex += 1
+    rolledUp.append(ResultCategory(_id=cat._id, name=cat.name,
+      licenses=tuple(catLicenses)))
+  return tuple(rolledUp)
+
+class _RollupNode:
+  """Directory in the path trie. While every file under it has the same
+  key, its rows are held in case a parent directory rolls them up; once it
+  has files with different keys, it is mixed, and so are all of its parent
+  directories, and its rows are final."""
+  __slots__ = ('name', 'path', 'key', 'count', 'held', 'mixed')
+
+  def __init__(self, name, path):
+    self.name = name
+    self.path = path
+    self.key = None
+    self.count = 0
+    self.held = []
+    self.mixed = False
+
+class _RollupTrie:
+  """Path trie built in one pass over sorted paths. Only the directories
+  on the path to the current file are kept open; each one is closed, and
+  rolled up into its parent if possible, as soon as the paths move past
+  it."""
+
+  def __init__(self, licenses, rows, minFiles):
+    self.licenses = licenses
+    self.rows = rows
+    self.minFiles = minFiles
+    # root node has no path, and is never rolled up itself
+    self.stack = [_RollupNode(None, None)]
+
+  def addFile(self, path, key, file):
+    dirNames = path.split("/")[:-1]
+
+    # close any open directories that this path is not in
+    depth = 0
+    while (depth < len(self.stack) - 1 and depth < len(dirNames) and
+        self.stack[depth + 1].name == dirNames[depth]):
+      depth += 1
+    while len(self.stack) - 1 > depth:
+      self._close()
+
+    # and open the ones that it is in
+    for i in range(depth, len(dirNames)):
+      self.stack.append(_RollupNode(dirNames[i], "/".join(dirNames[:i+1])))
+
+    self._add(self.stack[-1], [file], key, 1)
+
+  def finish(self):
+    while len(self.stack) > 1:
+      self._close()
+    root = self.stack[0]
+    if not root.mixed:
+      self._emit(root.held, root.key)
+
+  ##### Helper functions
+
+  def _close(self):
+    node = self.stack.pop()
+    parent = self.stack[-1]
+    # the empty path at the top of absolute paths is never rolled up, just
+    # like the root
+    if node.mixed:
+      self._setMixed(parent)
+    elif node.count >= self.minFiles and node.path != "":
+      licIndex, findings = node.key
+      row = ResultDirectory(path=node.path + ROLLUP_SUFFIX,
+        license_id=self.licenses[licIndex]._id, numFiles=node.count,
+        findings=dict(findings))
+      self._add(parent, [row], node.key, node.count)
+    else:
+      self._add(parent, node.held, node.key, node.count)
+
+  def _add(self, node, rows, key, count):
+    if node.mixed:
+      self._emit(rows, key)
+    elif node.key is None or node.key == key:
+      node.key = key
+      node.count += count
+      node.held.extend(rows)
+    else:
+      self._setMixed(node)
+      self._emit(rows, key)
+
+  def _setMixed(self, node):
+    if node.mixed:
+      return
+    self._emit(node.held, node.key)
+    node.held = []
+    node.mixed = True
+
+  def _emit(self, rows, key):
+    if rows != []:
+      self.rows[key[0]].extend(rows)
@@ -0,0 +1,154 @@
+# reports/sqlite.py
+#
+# Module for SQLite results database export functions for
+# spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sqlite3
+
+from .common import ReportFileError, ReportNotReadyError, atomicReportPath
+
+class SQLiteReporter:
+
+  # rows are inserted in batches of this size
+  BATCH_SIZE = 10000
+
+  SCHEMA = [
+    """CREATE TABLE categories (
+      _id INTEGER PRIMARY KEY,
+      name TEXT,
+      report_order INTEGER,
+      numFiles INTEGER
+    )""",
+    """CREATE TABLE licenses (
+      _id INTEGER PRIMARY KEY,
+      name TEXT,
+      category_id INTEGER REFERENCES categories(_id),
+      report_order INTEGER,
+      numFiles INTEGER
+    )""",
+    """CREATE TABLE files (
+      _id INTEGER PRIMARY KEY,
+      scan_id INTEGER,
+      license_id INTEGER REFERENCES licenses(_id),
+      path TEXT,
+      sha1 TEXT,
+      md5 TEXT,
+      sha256 TEXT
+    )""",
+    """CREATE TABLE findings (
+      file_id INTEGER REFERENCES files(_id),
+      finding TEXT,
+      value TEXT
+    )""",
+  ]
+
+  # indexes are created after the rows are inserted, which is faster
+  INDEXES = [
+    "CREATE INDEX ix_files_license_id ON files (license_id)",
+    "CREATE INDEX ix_findings_file_id ON findings (file_id)",
+  ]
+
+  def __init__(self, db, config={}):
+    super(SQLiteReporter, self).__init__()
+    self._reset()
+    self.db = db
+    # copy over config entries into new dict
+    for key, value in config.items():
+      self.kwConfig[key] = value
+
+  ##### Main SQLite reporting functions
+  ##### External usage shouldn't require calling anything except these
+
+  def setResults(self, results):
+    self.results = results
+
+  def generate(self):
+    pass
+
+  def save(self, path, replace=False):
+    self._saveCheck(path=path, replace=replace)
+
+    # the database is built in a new, empty temporary file, rather than
+    # being added to an old one, and replaces path once complete
+    try:
+      with atomicReportPath(path) as tmpPath:
+        conn = sqlite3.connect(tmpPath)
+        try:
+          self._writeResults(conn, self.results)
+        finally:
+          conn.close()
+    except PermissionError:
+      raise ReportFileError(f"Permission denied to save to {path}")
+
+  ##### Helper functions for SQLite reporting
+
+  def _writeResults(self, conn, results):
+    # everything is written in a single transaction, with files and
+    # findings inserted in batches as the results are read
+    with conn:
+      for statement in self.SCHEMA:
+        conn.execute(statement)
+
+      catRows = []
+      licRows = []
+      fileRows = []
+      findingRows = []
+      for catOrder, cat in enumerate(results):
+        catRows.append((cat._id, cat.name, catOrder, cat.numFiles))
+        for lic in cat.licenses:
+          licRows.append((lic._id, lic.name, cat._id, len(licRows),
+            lic.numFiles))
+          for file in lic.files:
+            fileRows.append((file._id, file.scan_id, lic._id, file.path,
+              file.sha1, file.md5, file.sha256))
+            for finding, value in file.findings.items():
+              findingRows.append((file._id, finding, value))
+            if len(fileRows) >= self.BATCH_SIZE:
+              self._insertFiles(conn, fileRows, findingRows)
+              fileRows = []
+              findingRows = []
+      self._insertFiles(conn, fileRows, findingRows)
+      conn.executemany("INSERT INTO categories VALUES (?, ?, ?, ?)", catRows)
+      conn.executemany("INSERT INTO licenses VALUES (?, ?, ?, ?, ?)", licRows)
+
+      for statement in self.INDEXES:
+        conn.execute(statement)
+
+  def _insertFiles(self, conn, fileRows, findingRows):
+    conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+      fileRows)
+    conn.executemany("INSERT INTO findings VALUES (?, ?, ?)", findingRows)
+
+  def _saveCheck(self, path, replace=False):
+    if self.results is None:
+      raise ReportNotReadyError("Cannot call save() before analysis results are set")
+
+    # check whether requested file already exists
+    if os.path.exists(path) and not replace:
+      raise ReportFileError(f"File already exists at {path}")
+
+    # check whether we have write permission for this path
+    if not os.access(path=os.path.dirname(path), mode=os.W_OK):
+      raise ReportFileError(f"Permission denied to save to {path}")
+
+  ##### Other helper functions
+
+  def _reset(self):
+    self.results = None
+    self.kwConfig = {}
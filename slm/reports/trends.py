@@ -0,0 +1,118 @@
+# reports/trends.py
+#
+# Module for counting files by license and category per month, for a
+# subproject or a whole project, for spdxLicenseManager.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .common import ReportAnalysisError
+from ..datatypes import License
+from ..projectdb import ProjectDBQueryError
+
+class TrendCounts:
+  """File counts per month.
+
+  Attributes:
+    months -- sorted list of months with scans, as "YYYY-MM" strings
+    scanIDs -- dict of month => list of scan IDs counted for that month
+    licenseCounts -- dict of license ID => dict of month => number of files
+    categoryCounts -- dict of category ID => dict of month => number of files
+    totals -- dict of month => total number of files
+  """
+  __slots__ = ('months', 'scanIDs', 'licenseCounts', 'categoryCounts',
+    'totals')
+
+  def __init__(self, months, scanIDs, licenseCounts, categoryCounts, totals):
+    self.months = months
+    self.scanIDs = scanIDs
+    self.licenseCounts = licenseCounts
+    self.categoryCounts = categoryCounts
+    self.totals = totals
+
+class TrendCounter:
+
+  def __init__(self, db):
+    super(TrendCounter, self).__init__()
+    self.db = db
+
+  ##### Main trend counting functions
+  ##### External usage shouldn't require calling anything except these
+
+  def countTrends(self, *, subproject=None, fromMonth=None, toMonth=None):
+    """
+    Count files by license and category for each month with scans, from
+    fromMonth to toMonth inclusive ("YYYY-MM" strings; None for no limit).
+    If a subproject was scanned more than once in a month, only its latest
+    scan that month is counted. With no subproject, each month's counts are
+    summed across all subprojects.
+    """
+    scanIDs = self._getScansByMonth(subproject, fromMonth, toMonth)
+    scanToMonth = {}
+    for month, s_ids in scanIDs.items():
+      for s_id in s_ids:
+        scanToMonth[s_id] = month
+
+    # one aggregate query over all files in the selected scans
+    counts = self.db.getFilesCountByScanAndLicense(
+      scan_ids=list(scanToMonth.keys()))
+    licToCat = dict(self.db.session.query(License._id, License.category_id).all())
+
+    licenseCounts = {}
+    categoryCounts = {}
+    totals = {month: 0 for month in scanIDs}
+    for (s_id, l_id), count in counts.items():
+      month = scanToMonth[s_id]
+      self._addCount(licenseCounts, l_id, month, count)
+      self._addCount(categoryCounts, licToCat[l_id], month, count)
+      totals[month] += count
+
+    return TrendCounts(sorted(scanIDs.keys()), scanIDs, licenseCounts,
+      categoryCounts, totals)
+
+  ##### Helper functions
+
+  def _getScansByMonth(self, subproject, fromMonth, toMonth):
+    if subproject is not None:
+      try:
+        scans = self.db.getScansFiltered(subproject=subproject)
+      except ProjectDBQueryError as e:
+        raise ReportAnalysisError(e.message)
+    else:
+      scans = self.db.getScansAll()
+
+    # keep only the latest scan for each subproject in each month
+    latest = {}
+    for scan in scans:
+      month = scan.scan_dt.strftime("%Y-%m")
+      if fromMonth is not None and month < fromMonth:
+        continue
+      if toMonth is not None and month > toMonth:
+        continue
+      key = (scan.subproject_id, month)
+      prev = latest.get(key, None)
+      if prev is None or (scan.scan_dt, scan._id) > (prev.scan_dt, prev._id):
+        latest[key] = scan
+
+    scanIDs = {}
+    for (sp_id, month), scan in latest.items():
+      scanIDs.setdefault(month, []).append(scan._id)
+    for s_ids in scanIDs.values():
+      s_ids.sort()
+    return scanIDs
+
+  def _addCount(self, countsDict, key, month, count):
+    monthCounts = countsDict.setdefault(key, {})
+    monthCounts[month] = monthCounts.get(month, 0) + count
@@ -18,14 +18,22 @@
 # limitations under the License.
 
 import os
-from collections import OrderedDict
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 
-from .common import ReportFileError, ReportNotReadyError
-from ..projectdb import ProjectDBQueryError, License
+from .common import (ReportAnalysisError, ReportFileError,
+  ReportNotReadyError, atomicReportPath)
+from .results import ResultCategory, ResultLicense
+from .rollup import rollUpResults
+from ..projectdb import ProjectDBQueryError
 
 class XlsxReporter:
 
+  # Excel's limit on rows per worksheet, including the header row
+  MAX_SHEET_ROWS = 1048576
+  # Excel's limit on the length of a worksheet title
+  MAX_SHEET_TITLE = 31
+
   def __init__(self, db, config={}):
     super(XlsxReporter, self).__init__()
     self._reset()
@@ -37,34 +45,82 @@ class XlsxReporter:
   ##### Main xlsx reporting functions
   ##### External usage shouldn't require calling anything except these
 
-  def setResults(self, results):
+  def setResults(self, results, *, streaming=False):
+    # rolling up directories reads the results more than once, which
+    # streamed results can't support, so they must not be streamed
+    self.rollup = (self._getFinalConfigValue("report-rollup-dirs") == "yes")
+    if self.rollup and streaming:
+      raise ReportAnalysisError("Cannot roll up directories in streamed results")
+    self.streaming = streaming
+    self.categoryWbs = []
+    if streaming:
+      # streamed results can only be read once, in report order, so the
+      # workbook is written row by row in write-only mode, and the
+      # "No license found" category is split up while it is being written
+      self.wb = openpyxl.Workbook(write_only=True)
+      self.results = results
+      return
+
     self.wb = openpyxl.Workbook()
-    self.results = results
-    # look for "No license found" category, and if one exists, annotate it
-    for cat in self.results.values():
+    # results are shared with other reporters and can't be modified, so
+    # any "No license found" category is replaced with an annotated copy
+    # in this reporter's view of the results
+    nextLicID = self._getResultsMaxLicenseID(results) + 1
+    view = []
+    for cat in results:
       if cat.name == "No license found":
-        nextLicID = self._getResultsMaxLicenseID(self.results) + 1
-        self._annotateNoLicenseFound(catNoLicense=cat, nextLicID=nextLicID)
+        cat = self._annotateNoLicenseFound(catNoLicense=cat, nextLicID=nextLicID)
+      view.append(cat)
+    if self.rollup:
+      # each finding already has its own "license" here, so directories
+      # are rolled up by license alone
+      view = rollUpResults(view, byFindings=False)
+    self.results = tuple(view)
 
   def generate(self):
-    if type(self.results) != OrderedDict:
+    if self.results is None:
       raise ReportNotReadyError("Cannot call generate() before analysis results are set")
 
     strip_licenseref = False
     if self._getFinalConfigValue("report-strip-licenseref") == 'yes':
       strip_licenseref = True
 
-    if self._getFinalConfigValue("report-include-summary") == 'yes':
+    # if each category gets its own workbook, the main workbook always
+    # holds the summary, since it would otherwise be empty
+    split = (self._getFinalConfigValue("report-xlsx-split-categories") == 'yes')
+    include_summary = split or (self._getFinalConfigValue("report-include-summary") == 'yes')
+
+    if self.streaming:
+      self._generateStreamedReport(self.wb, self.results,
+        include_summary=include_summary, strip_licenseref=strip_licenseref,
+        split=split)
+      self.reportGenerated = True
+      return
+
+    if include_summary:
       self._generateSummarySheet(self.wb, self.results, strip_licenseref=strip_licenseref)
 
-    self._generateCategorySheets(self.wb, self.results)
-    self._generateFileListings(self.wb, self.results, strip_licenseref=strip_licenseref)
+    if split:
+      for cat in self.results:
+        if not cat.hasFiles:
+          continue
+        catWb = openpyxl.Workbook()
+        self._generateCategorySheets(catWb, (cat,))
+        self._generateFileListings(catWb, (cat,), strip_licenseref=strip_licenseref)
+        self.categoryWbs.append((cat.name, catWb))
+    else:
+      self._generateCategorySheets(self.wb, self.results)
+      self._generateFileListings(self.wb, self.results, strip_licenseref=strip_licenseref)
     self.reportGenerated = True
 
   def save(self, path, replace=False):
     self._saveCheck(path=path, replace=replace)
     try:
-      self.wb.save(path)
+      with atomicReportPath(path) as tmpPath:
+        self.wb.save(tmpPath)
+      for catName, catWb in self.categoryWbs:
+        with atomicReportPath(self._getCategoryWorkbookPath(path, catName)) as tmpPath:
+          catWb.save(tmpPath)
     except PermissionError:
       raise ReportFileError(f"Permission denied to save to {path}")
 
@@ -80,7 +136,7 @@ class XlsxReporter:
     # should be renamed when we come to the first category with files
     first_sheet = (wb.sheetnames[0] != 'License summary')
 
-    for cat in results.values():
+    for cat in results:
       # skip category if it has no files
       if not cat.hasFiles:
         continue
@@ -93,15 +149,24 @@ class XlsxReporter:
       else:
         ws = wb.create_sheet(cat.name)
 
-      # and set column dimensions
-      ws.column_dimensions['A'].width = 100
-      ws.column_dimensions['B'].width = 60
+      self._setUpCategorySheet(ws, fontBold)
+
+  def _setUpCategorySheet(self, ws, fontBold):
+    # set column dimensions
+    ws.column_dimensions['A'].width = 100
+    ws.column_dimensions['B'].width = 60
+
+    # and fill in sheet headers
+    ws['A1'] = "File"
+    ws['A1'].font = fontBold
+    ws['B1'] = "License"
+    ws['B1'].font = fontBold
 
-      # and fill in sheet headers
-      ws['A1'] = "File"
-      ws['A1'].font = fontBold
-      ws['B1'] = "License"
-      ws['B1'].font = fontBold
+    # rolled-up directory rows stand for more than one file
+    if self.rollup:
+      ws.column_dimensions['C'].width = 10
+      ws['C1'] = "# of files"
+      ws['C1'].font = fontBold
 
   def _generateFileListings(self, wb, results, strip_licenseref=False):
     # create font styles
@@ -109,7 +174,7 @@ class XlsxReporter:
     fontNormal = openpyxl.styles.Font(size=14)
     alignNormal = openpyxl.styles.Alignment(wrap_text=True)
 
-    for cat in results.values():
+    for cat in results:
       if not cat.hasFiles:
         continue
       try:
@@ -117,16 +182,29 @@ class XlsxReporter:
       except KeyError:
         raise ReportNotReadyError(f"Sheet not found for category {cat.name}; has _generateCategorySheets() been called?")
       row = 2
-      for lic in cat.licensesSorted.values():
+      sheetNum = 1
+      for lic in cat.licenses:
         if not lic.hasFiles:
           continue
-        for file in lic.filesSorted.values():
+        for file in lic.files:
+          # roll over to a continuation sheet, right after this one, once
+          # this one is full
+          if row > self.MAX_SHEET_ROWS:
+            sheetNum += 1
+            ws = wb.create_sheet(
+              self._getContinuationSheetTitle(cat.name, sheetNum),
+              index=wb.index(ws) + 1)
+            self._setUpCategorySheet(ws, fontBold)
+            row = 2
           ws[f'A{row}'] = file.path
           ws[f'A{row}'].font = fontNormal
           ws[f'A{row}'].alignment = alignNormal
           ws[f'B{row}'] = self._getFinalLicenseName(lic.name, strip_licenseref)
           ws[f'B{row}'].font = fontNormal
           ws[f'B{row}'].alignment = alignNormal
+          if self.rollup:
+            ws[f'C{row}'] = file.numFiles
+            ws[f'C{row}'].font = fontNormal
           row += 1
 
   def _generateSummarySheet(self, wb, results, strip_licenseref=False):
@@ -153,16 +231,16 @@ class XlsxReporter:
     # create category and license rows
     total = 0
     row = 3
-    for cat in results.values():
+    for cat in results:
       if not cat.hasFiles:
         continue
       ws[f'A{row}'] = f'{cat.name}:'
       ws[f'A{row}'].font = fontBold
       row += 1
-      for lic in cat.licensesSorted.values():
+      for lic in cat.licenses:
         if not lic.hasFiles:
           continue
-        numfiles = len(lic.filesSorted)
+        numfiles = lic.numFiles
         ws[f'B{row}'] = self._getFinalLicenseName(lic.name, strip_licenseref)
         ws[f'B{row}'].font = fontNormal
         ws[f'B{row}'].alignment = alignNormal
@@ -178,86 +256,171 @@ class XlsxReporter:
     ws[f'C{row}'] = total
     ws[f'C{row}'].font = fontBold
 
+  def _generateStreamedReport(self, wb, results, include_summary=False,
+    strip_licenseref=False, split=False):
+    self._addNamedStyles(wb)
+
+    # the summary sheet comes first, but its rows can only be written once
+    # all files have been streamed and the final counts are known
+    wsSummary = None
+    if include_summary:
+      wsSummary = wb.create_sheet("License summary")
+    summary = []
+
+    checks = self._getNoLicenseFoundChecks()
+    for cat in results:
+      if not cat.hasFiles:
+        continue
+      catWb = wb
+      if split:
+        catWb = openpyxl.Workbook(write_only=True)
+        self._addNamedStyles(catWb)
+        self.categoryWbs.append((cat.name, catWb))
+      sheets = _StreamedCategorySheets(self, catWb, cat.name, strip_licenseref)
+
+      licCounts = []
+      licenses = cat.licenses
+      labeled = {}
+      if cat.name == "No license found" and checks != [] and len(licenses) > 0:
+        # split the first license's files by finding, as in
+        # _annotateNoLicenseFound(); only the labeled paths are held
+        lic = licenses[0]
+        licenses = licenses[1:]
+        numRemaining = 0
+        for file in lic.files:
+          for finding, name in checks:
+            if file.findings.get(finding, "N/A") == "yes":
+              labeled.setdefault(finding, []).append(file.path)
+              break
+          else:
+            sheets.appendFile(file.path, lic.name)
+            numRemaining += 1
+        licCounts.append((lic.name, numRemaining))
+
+      for lic in licenses:
+        if not lic.hasFiles:
+          continue
+        for file in lic.files:
+          sheets.appendFile(file.path, lic.name)
+        licCounts.append((lic.name, lic.numFiles))
+
+      names = dict(checks)
+      for finding, paths in labeled.items():
+        for path in paths:
+          sheets.appendFile(path, names[finding])
+        licCounts.append((names[finding], len(paths)))
+
+      summary.append((cat.name, licCounts))
+
+    if wsSummary is not None:
+      self._writeStreamedSummary(wsSummary, summary, strip_licenseref)
+
+    # a workbook must have at least one sheet to be saved
+    if wb.sheetnames == []:
+      wb.create_sheet()
+
+  def _writeStreamedSummary(self, ws, summary, strip_licenseref=False):
+    ws.column_dimensions['A'].width = 3
+    ws.column_dimensions['B'].width = 60
+    ws.column_dimensions['C'].width = 10
+
+    # same layout as _generateSummarySheet()
+    ws.append([self._styledCell(ws, "License", "slm-bold"), None,
+      self._styledCell(ws, "# of files", "slm-bold")])
+    ws.append([])
+    total = 0
+    for catName, licCounts in summary:
+      ws.append([self._styledCell(ws, f'{catName}:', "slm-bold")])
+      for licName, numfiles in licCounts:
+        if numfiles == 0:
+          continue
+        ws.append([None,
+          self._styledCell(ws, self._getFinalLicenseName(licName, strip_licenseref), "slm-normal"),
+          self._styledCell(ws, numfiles, "slm-normal")])
+        total += numfiles
+    ws.append([])
+    ws.append([self._styledCell(ws, "TOTAL", "slm-bold"), None,
+      self._styledCell(ws, total, "slm-bold")])
+
+  def _addNamedStyles(self, wb):
+    # named styles are registered once and shared by every cell that uses
+    # them, rather than creating a font and alignment for each cell
+    wb.add_named_style(openpyxl.styles.NamedStyle(name="slm-bold",
+      font=openpyxl.styles.Font(size=16, bold=True)))
+    wb.add_named_style(openpyxl.styles.NamedStyle(name="slm-normal",
+      font=openpyxl.styles.Font(size=14),
+      alignment=openpyxl.styles.Alignment(wrap_text=True)))
+
+  def _styledCell(self, ws, value, style):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+  def _getContinuationSheetTitle(self, name, sheetNum):
+    suffix = f" ({sheetNum})"
+    return name[:self.MAX_SHEET_TITLE - len(suffix)] + suffix
+
+  def _getCategoryWorkbookPath(self, path, catName):
+    root, ext = os.path.splitext(path)
+    return f"{root}-{catName.replace(os.sep, '_')}{ext}"
+
+  def _getNoLicenseFoundChecks(self):
+    # figure out which ones we're checking, in priority order
+    checks = []
+    if self._getFinalConfigValue("analyze-thirdparty") == "yes":
+      checks.append(("thirdparty", "No license found - third party directory"))
+    if self._getFinalConfigValue("analyze-emptyfile") == "yes":
+      checks.append(("emptyfile", "No license found - empty file"))
+    if self._getFinalConfigValue("analyze-extensions") == "yes":
+      checks.append(("extension", "No license found - excluded file extension"))
+    return checks
+
   def _annotateNoLicenseFound(self, catNoLicense, nextLicID):
-    # figure out which ones we're checking
-    licExt = None
-    checkExt = (self._getFinalConfigValue("analyze-extensions") == "yes")
-    licEmpty = None
-    checkEmpty = (self._getFinalConfigValue("analyze-emptyfile") == "yes")
-    licThird = None
-    checkThird = (self._getFinalConfigValue("analyze-thirdparty") == "yes")
+    checks = self._getNoLicenseFoundChecks()
+    if checks == [] or len(catNoLicense.licenses) == 0:
+      return catNoLicense
 
     # for now, only looking at the first license in the category
-    lic = list(catNoLicense.licensesSorted.values())[0]
-    for file in lic.filesSorted.values():
-      labeled = False
-      if checkThird and not labeled:
-        if file.findings.get("thirdparty", "N/A") == "yes":
-          # create new "license" if this is the first file we've seen for it
-          if licThird is None:
-            licThird = self._createTempLicense(
-              catID=catNoLicense._id,
-              nextLicID=nextLicID,
-              name="No license found - third party directory"
-            )
-            nextLicID += 1
-            catNoLicense.licensesSorted[licThird._id] = licThird
-          # add file to this "license"
-          licThird.filesSorted[file._id] = file
-          labeled = True
-      if checkEmpty and not labeled:
-        if file.findings.get("emptyfile", "N/A") == "yes":
-          # create new "license" if this is the first file we've seen for it
-          if licEmpty is None:
-            licEmpty = self._createTempLicense(
-              catID=catNoLicense._id,
-              nextLicID=nextLicID,
-              name="No license found - empty file"
-            )
-            nextLicID += 1
-            catNoLicense.licensesSorted[licEmpty._id] = licEmpty
-          # add file to this "license"
-          licEmpty.filesSorted[file._id] = file
-          labeled = True
-      if checkExt and not labeled:
-        if file.findings.get("extension", "N/A") == "yes":
-          # create new "license" if this is the first file we've seen for it
-          if licExt is None:
-            licExt = self._createTempLicense(
-              catID=catNoLicense._id,
-              nextLicID=nextLicID,
-              name="No license found - excluded file extension"
-            )
-            nextLicID += 1
-            catNoLicense.licensesSorted[licExt._id] = licExt
-          # add file to this "license"
-          licExt.filesSorted[file._id] = file
-          labeled = True
-
-    # wait until we're done, so we can go back and remove them now
-    # (can't mutate the filesSorted OrderedDict while iterating)
-    if licThird is not None:
-      for file in licThird.filesSorted.values():
-        # remove from the original license file list
-        del lic.filesSorted[file._id]
-    if licEmpty is not None:
-      for file in licEmpty.filesSorted.values():
-        # remove from the original license file list
-        del lic.filesSorted[file._id]
-    if licExt is not None:
-      for file in licExt.filesSorted.values():
-        # remove from the original license file list
-        del lic.filesSorted[file._id]
+    lic = catNoLicense.licenses[0]
+    remaining = []
+    labeled = {}
+    for file in lic.files:
+      for finding, name in checks:
+        if file.findings.get(finding, "N/A") == "yes":
+          # dicts keep insertion order, so new "licenses" are created in the
+          # order that their first file was seen
+          labeled.setdefault(finding, []).append(file)
+          break
+      else:
+        remaining.append(file)
+
+    # rebuild the category, with a new "license" for each finding with files
+    names = dict(checks)
+    licenses = [ResultLicense(_id=lic._id, name=lic.name, files=tuple(remaining))]
+    licenses.extend(catNoLicense.licenses[1:])
+    for finding, files in labeled.items():
+      licenses.append(self._createTempLicense(
+        nextLicID=nextLicID,
+        name=names[finding],
+        files=tuple(files),
+      ))
+      nextLicID += 1
+    return ResultCategory(_id=catNoLicense._id, name=catNoLicense.name,
+      licenses=tuple(licenses))
 
   def _saveCheck(self, path, replace=False):
-    if type(self.results) != OrderedDict:
+    if self.results is None:
       raise ReportNotReadyError("Cannot call save() before analysis results are set")
     if not self.reportGenerated:
       raise ReportNotReadyError("Cannot call save() before report is generated")
 
-    # check whether requested file already exists
-    if os.path.exists(path) and not replace:
-      raise ReportFileError(f"File already exists at {path}")
+    # check whether requested file (or any per-category file) already exists
+    if not replace:
+      paths = [path] + [self._getCategoryWorkbookPath(path, catName)
+        for catName, catWb in self.categoryWbs]
+      for p in paths:
+        if os.path.exists(p):
+          raise ReportFileError(f"File already exists at {p}")
 
     # check whether we have write permission for this path
     if not os.access(path=os.path.dirname(path), mode=os.W_OK):
@@ -268,6 +431,9 @@ class XlsxReporter:
   def _reset(self):
     self.wb = None
     self.results = None
+    self.streaming = False
+    self.rollup = False
+    self.categoryWbs = []
     self.reportGenerated = False
     self.kwConfig = {}
 
@@ -283,23 +449,52 @@ class XlsxReporter:
 
   def _getResultsMaxLicenseID(self, results):
     maxLicID = 0
-    for cat in results.values():
-      for lic in cat.licensesSorted.values():
+    for cat in results:
+      for lic in cat.licenses:
         if lic._id > maxLicID:
           maxLicID = lic._id
     return maxLicID
 
-  def _createTempLicense(self, catID, nextLicID, name):
-    lic = License()
-    lic._id = nextLicID
-    lic.name = name
-    lic.category_id = catID
-    lic.hasFiles = True
-    lic.filesSorted = OrderedDict()
-    return lic
+  def _createTempLicense(self, nextLicID, name, files):
+    return ResultLicense(_id=nextLicID, name=name, files=files)
 
   def _getFinalLicenseName(self, licName, stripLicenseRef):
     if stripLicenseRef:
       return licName.replace("LicenseRef-", "")
     else:
       return licName
+
+class _StreamedCategorySheets:
+  """Writes one category's file rows to write-only sheets, starting a
+  continuation sheet whenever the current one reaches Excel's row limit."""
+
+  def __init__(self, reporter, wb, catName, strip_licenseref):
+    self.reporter = reporter
+    self.wb = wb
+    self.catName = catName
+    self.strip_licenseref = strip_licenseref
+    self.sheetNum = 0
+    self.ws = None
+    self.row = 0
+    self._startSheet()
+
+  def appendFile(self, path, licName):
+    if self.row >= self.reporter.MAX_SHEET_ROWS:
+      self._startSheet()
+    r = self.reporter
+    self.ws.append([r._styledCell(self.ws, path, "slm-normal"),
+      r._styledCell(self.ws, r._getFinalLicenseName(licName, self.strip_licenseref), "slm-normal")])
+    self.row += 1
+
+  def _startSheet(self):
+    self.sheetNum += 1
+    if self.sheetNum == 1:
+      title = self.catName
+    else:
+      title = self.reporter._getContinuationSheetTitle(self.catName, self.sheetNum)
+    self.ws = self.wb.create_sheet(title)
+    self.ws.column_dimensions['A'].width = 100
+    self.ws.column_dimensions['B'].width = 60
+    self.ws.append([self.reporter._styledCell(self.ws, "File", "slm-bold"),
+      self.reporter._styledCell(self.ws, "License", "slm-bold")])
+    self.row = 1
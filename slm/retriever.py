@@ -18,9 +18,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import calendar
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import errno
+import fnmatch
+import hashlib
 import os
+import re
 import shutil
+import tarfile
+import time
+import zipfile
+
+# extensions of archives that SPDX files can be retrieved from
+ARCHIVE_EXTENSIONS = (".tar.gz", ".tgz", ".tar", ".zip")
+
+# suffix of the partial copy of a file being copied across filesystems
+PARTIAL_SUFFIX = ".slm-partial"
+
+# size of the chunks that files are copied and checksummed in
+COPY_CHUNK_SIZE = 1024 * 1024
 
 class RetrieverConfigError(Exception):
   """Exception raised for errors in SPDX retriever configuration.
@@ -40,6 +59,15 @@ class RetrieverNotReadyError(Exception):
   def __init__(self, message):
     self.message = message
 
+class RetrieverCopyError(Exception):
+  """Exception raised when a copied SPDX file doesn't match its original.
+
+  Attributes:
+    message -- explanation of the error
+  """
+  def __init__(self, message):
+    self.message = message
+
 class Retriever:
 
   def __init__(self):
@@ -58,13 +86,36 @@ class Retriever:
     if self.datestr == "":
       raise RetrieverNotReadyError("Date string not set before call to prepareFiles")
 
-    files = self._getFiles(self.search_dir)
+    # every subproject's search string is found in one pass over each
+    # filename, and the date is only checked once per filename
+    matcher = _SearchMatcher(self.subprojects.keys())
+    dateSearch = _DateSearch(self.datestr)
+    # the search directory is part of every path, so it is only scanned once
+    dirPrefix = os.path.join(self.search_dir, "")
+    dirState, dirFound = matcher.scan(dirPrefix)
+
+    if self.fileList is not None:
+      files = self.fileList
+    else:
+      files = self._getFiles(self.search_dir)
     for file in files:
-      filepath = os.path.join(self.search_dir, file)
-      for spdx_search in self.subprojects.keys():
-        if self._testFilename(filepath, spdx_search, self.datestr):
-          t = self.subprojects[spdx_search]
-          t[2].append(filepath)
+      if self.searchArchives and file.endswith(ARCHIVE_EXTENSIONS):
+        # files inside an archive are checked as if the archive were a
+        # directory, and remembered so that they can be extracted later
+        archivePath = dirPrefix + file
+        try:
+          members = self._getArchiveMembers(archivePath)
+        except (tarfile.TarError, zipfile.BadZipFile, OSError) as e:
+          self.unreadableArchives.append((archivePath, str(e)))
+          continue
+        for memberName in members:
+          filepath = os.path.join(archivePath, memberName)
+          if self._checkCandidate(filepath, os.path.join(file, memberName),
+              matcher, dateSearch, dirState, dirFound):
+            self.archiveMembers[filepath] = (archivePath, memberName)
+      elif self._isIncluded(file):
+        self._checkCandidate(dirPrefix + file, file, matcher, dateSearch,
+          dirState, dirFound)
     self.filesPrepared = True
 
   def createResults(self):
@@ -98,15 +149,52 @@ class Retriever:
       raise RetrieverNotReadyError("Cannot call moveFiles on this Retriever before successfully calling createResults")
     success = self.results.get("success", [])
     newSuccess = []
+    # files in archives are extracted, one pass per archive, after the
+    # other files are moved; the archives themselves are left in place
+    toExtract = {}
+    # files that can't just be renamed because they are on a different
+    # filesystem are copied afterwards, several at a time
+    toCopy = []
     for _id, project, srcPath, dstPath in success:
       if os.path.isfile(dstPath):
         t = (_id, project, f'Cannot move to project {project} (file already present at {dstPath})')
         self.results["error"].append(t)
+      elif srcPath in self.archiveMembers:
+        archivePath, memberName = self.archiveMembers[srcPath]
+        toExtract.setdefault(archivePath, {})[memberName] = dstPath
+        newSuccess.append((_id, project, srcPath, dstPath))
       else:
-        shutil.move(srcPath, dstPath)
+        try:
+          os.rename(srcPath, dstPath)
+        except OSError as e:
+          if e.errno != errno.EXDEV:
+            raise
+          toCopy.append((srcPath, dstPath))
         t = (_id, project, srcPath, dstPath)
         newSuccess.append(t)
-    self.results["success"] = newSuccess
+
+    copyErrors = self._copyFiles(toCopy)
+    extracted = set()
+    extractErrors = {}
+    for archivePath, members in toExtract.items():
+      archiveExtracted, reason = self._extractMembers(archivePath, members)
+      extracted.update(archiveExtracted)
+      if reason is not None:
+        extractErrors[archivePath] = reason
+    self.results["success"] = []
+    for _id, project, srcPath, dstPath in newSuccess:
+      if srcPath in self.archiveMembers and dstPath not in extracted:
+        archivePath = self.archiveMembers[srcPath][0]
+        reason = extractErrors.get(archivePath, "not found in archive")
+        t = (_id, project, f'Cannot extract {srcPath} for project {project} ({reason})')
+        self.results["error"].append(t)
+        self.failedTransfers.append(t)
+      elif srcPath in copyErrors:
+        t = (_id, project, f'Cannot move to project {project} ({copyErrors[srcPath]})')
+        self.results["error"].append(t)
+        self.failedTransfers.append(t)
+      else:
+        self.results["success"].append((_id, project, srcPath, dstPath))
 
   ##### Retriever helper functions
 
@@ -119,39 +207,180 @@ class Retriever:
     spdxSearchLoc = filename.find(spdx_search)
     if spdxSearchLoc == -1:
       return False
-    # check that the date string is also present
-    dateLoc = filename.find(datestr)
-    if dateLoc == -1:
-      return False
     # check that the FULL date string (including day) is present and valid
-    dateToCheck = filename[dateLoc:dateLoc+10]
-    try:
-      dt = datetime.strptime(dateToCheck, "%Y-%m-%d")
-    except ValueError as e:
+    return _DateSearch(datestr).findDay(filename) is not None
+
+  def _checkCandidate(self, filepath, relPath, matcher, dateSearch,
+    dirState, dirFound):
+    # relPath is filepath without the search directory prefix, which has
+    # already been scanned to reach dirState
+    if os.path.splitext(filepath)[1] != ".spdx":
+      return False
+    if dateSearch.findDay(filepath) is None:
       return False
-    return True
+    state, found = matcher.scan(relPath, dirState)
+    for spdx_search in dirFound | found:
+      t = self.subprojects[spdx_search]
+      t[2].append(filepath)
+    return len(dirFound) > 0 or len(found) > 0
+
+  def _isIncluded(self, filename):
+    # if globs are set, a file's name must match at least one of them
+    if self.globs == []:
+      return True
+    name = os.path.basename(filename)
+    return any(fnmatch.fnmatch(name, glob) for glob in self.globs)
 
   def _getFiles(self, search_dir):
+    # returns paths relative to search_dir, walking subdirectories down to
+    # maxDepth levels below it (or all of them, if maxDepth is None)
     files = []
-    for pathname in os.listdir(search_dir):
-      if os.path.isfile(os.path.join(search_dir, pathname)):
-        files.append(pathname)
+    dirs = [("", 0)]
+    while dirs:
+      relDir, depth = dirs.pop()
+      with os.scandir(os.path.join(search_dir, relDir)) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+      subdirs = []
+      for entry in entries:
+        relPath = os.path.join(relDir, entry.name)
+        if entry.is_file():
+          files.append(relPath)
+        elif (entry.is_dir(follow_symlinks=False) and
+            (self.maxDepth is None or depth < self.maxDepth)):
+          subdirs.append((relPath, depth + 1))
+      # visit subdirectories in name order
+      dirs.extend(reversed(subdirs))
     return files
 
+  def _getArchiveMembers(self, archivePath):
+    # only the archive's listing is read, not its contents; members are
+    # returned in archive order, and the globs apply to them too
+    if archivePath.endswith(".zip"):
+      with zipfile.ZipFile(archivePath) as zf:
+        names = [info.filename for info in zf.infolist() if not info.is_dir()]
+    else:
+      with tarfile.open(archivePath, "r|*") as tar:
+        names = [member.name for member in tar if member.isfile()]
+    return [name for name in names if self._isIncluded(name)]
+
+  def _copyFiles(self, toCopy):
+    # copies each (srcPath, dstPath) with _copyVerified in a pool of
+    # threads, since the time goes on waiting for I/O, and only removes
+    # each source once its copy is verified. Returns a dict of error
+    # messages by srcPath, and records totals in copyStats.
+    errors = {}
+    if toCopy == []:
+      return errors
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=self.copyWorkers) as executor:
+      futures = [(srcPath, executor.submit(self._copyVerified, srcPath,
+        dstPath)) for srcPath, dstPath in toCopy]
+      for srcPath, future in futures:
+        try:
+          self.copyStats["bytes"] += future.result()
+          self.copyStats["files"] += 1
+          os.remove(srcPath)
+        except (OSError, RetrieverCopyError) as e:
+          errors[srcPath] = getattr(e, "message", None) or str(e)
+    self.copyStats["seconds"] += time.perf_counter() - start
+    return errors
+
+  def _copyVerified(self, srcPath, dstPath):
+    # copies to a partial file alongside dstPath, checksumming the source
+    # as it is read, then reads the copy back to check that it matches
+    # before renaming it into place. If an earlier copy was interrupted,
+    # the partial file is kept, and copying resumes after the part of it
+    # that still matches the source. Returns the number of bytes copied.
+    partialPath = os.path.join(os.path.dirname(dstPath),
+      f".{os.path.basename(dstPath)}{PARTIAL_SUFFIX}")
+    srcHash = hashlib.sha256()
+    with open(srcPath, "rb") as src:
+      with open(partialPath, "ab+") as dst:
+        dst.seek(0)
+        resumed = 0
+        while True:
+          done = dst.read(COPY_CHUNK_SIZE)
+          if done == b"":
+            break
+          chunk = src.read(len(done))
+          if chunk != done:
+            # doesn't match the source any more, so start again
+            src.seek(0)
+            srcHash = hashlib.sha256()
+            resumed = 0
+            dst.truncate(0)
+            break
+          srcHash.update(chunk)
+          resumed += len(chunk)
+        dst.seek(resumed)
+        dst.truncate(resumed)
+        while True:
+          chunk = src.read(COPY_CHUNK_SIZE)
+          if chunk == b"":
+            break
+          srcHash.update(chunk)
+          dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+        size = dst.tell()
+
+    dstHash = hashlib.sha256()
+    with open(partialPath, "rb") as dst:
+      for chunk in iter(lambda: dst.read(COPY_CHUNK_SIZE), b""):
+        dstHash.update(chunk)
+    if dstHash.digest() != srcHash.digest():
+      os.remove(partialPath)
+      raise RetrieverCopyError(f"copy of {srcPath} did not match the original")
+    shutil.copystat(srcPath, partialPath)
+    os.replace(partialPath, dstPath)
+    return size - resumed
+
+  def _extractMembers(self, archivePath, members):
+    # members maps member names to destination paths. Each member is
+    # streamed straight to its destination, without extracting the rest of
+    # the archive. Returns the set of destination paths written, and the
+    # reason that extraction stopped early, or None.
+    extracted = set()
+    try:
+      if archivePath.endswith(".zip"):
+        with zipfile.ZipFile(archivePath) as zf:
+          for memberName, dstPath in members.items():
+            with zf.open(memberName) as src:
+              self._copyMember(src, dstPath)
+            extracted.add(dstPath)
+      else:
+        # read as a stream, so a compressed archive is only read once
+        with tarfile.open(archivePath, "r|*") as tar:
+          for member in tar:
+            dstPath = members.get(member.name)
+            if dstPath is None or not member.isfile():
+              continue
+            self._copyMember(tar.extractfile(member), dstPath)
+            extracted.add(dstPath)
+    except (tarfile.TarError, zipfile.BadZipFile, KeyError, OSError) as e:
+      return (extracted, str(e))
+    return (extracted, None)
+
+  def _copyMember(self, src, dstPath):
+    # don't leave a partial file behind if the archive turns out to be bad
+    with open(dstPath, "xb") as dst:
+      try:
+        shutil.copyfileobj(src, dst)
+      except Exception:
+        dst.close()
+        os.remove(dstPath)
+        raise
+
   def _makeDstFilename(self, srcPath, spdx_search, datestr, subproject_name):
     # find day in date
     # first, check that the date string is present
-    dateLoc = srcPath.find(datestr)
-    if dateLoc == -1:
+    if srcPath.find(datestr) == -1:
       raise RetrieverNotReadyError(f"Date string {datestr} not found in source path {srcPath}")
     # check that the FULL date string (including day) is present and valid
-    dateToCheck = srcPath[dateLoc:dateLoc+10]
-    try:
-      dt = datetime.strptime(dateToCheck, "%Y-%m-%d")
-    except ValueError as e:
+    daystr = _DateSearch(datestr).findDay(srcPath)
+    if daystr is None:
       raise RetrieverNotReadyError(f"Invalid date string {datestr} found in source path {srcPath}")
 
-    daystr = dateToCheck[8:10]
     filename = f"{subproject_name}-{datestr}-{daystr}.spdx"
     return filename
 
@@ -179,6 +408,30 @@ class Retriever:
       raise RetrieverConfigError(f"{search_dir} is not an existing directory to search for SPDX files")
     self.search_dir = search_dir
 
+  def setMaxDepth(self, maxDepth):
+    if maxDepth is not None and (type(maxDepth) != int or maxDepth < 0):
+      raise RetrieverConfigError("maxDepth must be None or a non-negative integer")
+    self.maxDepth = maxDepth
+
+  def setGlobs(self, globs):
+    for glob in globs:
+      if type(glob) != str or glob == "":
+        raise RetrieverConfigError("globs must be non-empty strings")
+    self.globs = list(globs)
+
+  def setSearchArchives(self, searchArchives):
+    self.searchArchives = searchArchives
+
+  def setCopyWorkers(self, copyWorkers):
+    if type(copyWorkers) != int or copyWorkers < 1:
+      raise RetrieverConfigError("copyWorkers must be a positive integer")
+    self.copyWorkers = copyWorkers
+
+  def setFileList(self, fileList):
+    # if set, only these paths (relative to the search directory) are
+    # checked, instead of listing the search directory
+    self.fileList = None if fileList is None else list(fileList)
+
   def setProjectDir(self, project_dir):
     if not os.path.isdir(project_dir):
       raise RetrieverConfigError(f"{project_dir} is not an existing SLM project directory")
@@ -191,5 +444,99 @@ class Retriever:
     self.datestr = ""
     self.search_dir = ""
     self.project_dir = ""
+    self.maxDepth = 0
+    self.globs = []
+    self.searchArchives = False
+    self.fileList = None
+    self.copyWorkers = 4
     self.filesPrepared = False
     self.results = {}
+    self.archiveMembers = {}
+    self.unreadableArchives = []
+    # totals for files copied across filesystems
+    self.copyStats = {"files": 0, "bytes": 0, "seconds": 0.0}
+    # errors for files that were matched but couldn't be copied or
+    # extracted into their subprojects, also listed in results["error"]
+    self.failedTransfers = []
+
+class _DateSearch:
+  """Finds the day that follows a YYYY-MM date string in filenames. As
+  before, only the first occurrence of the date string counts, and it must
+  be followed by a valid two-digit day of that month."""
+
+  def __init__(self, datestr):
+    self.regex = re.compile(re.escape(datestr) + r"(?:-(\d\d))?")
+    dt = datetime.strptime(datestr, "%Y-%m")
+    self.lastDay = calendar.monthrange(dt.year, dt.month)[1]
+
+  def findDay(self, filename):
+    """Return the two-digit day string, or None if there is no valid one."""
+    m = self.regex.search(filename)
+    if m is None or m.group(1) is None:
+      return None
+    daystr = m.group(1)
+    if not 1 <= int(daystr) <= self.lastDay:
+      return None
+    return daystr
+
+class _SearchMatcher:
+  """Aho-Corasick automaton that finds which of a set of search strings
+  occur in a text, in one pass over the text however many search strings
+  there are."""
+
+  def __init__(self, patterns):
+    # state 0 is the root; each state has its transitions, the state to
+    # fall back to when no transition matches, and the patterns that end
+    # there (including those of the states it falls back to)
+    self.goto = [{}]
+    self.fail = [0]
+    self.out = [frozenset()]
+    for pattern in patterns:
+      self._addPattern(pattern)
+    self._buildFailLinks()
+
+  def scan(self, text, state=0):
+    """
+    Scan text starting from state. Returns the state reached and the set
+    of patterns found, so that a common prefix only has to be scanned once.
+    """
+    goto = self.goto
+    fail = self.fail
+    out = self.out
+    found = set()
+    for ch in text:
+      while state and ch not in goto[state]:
+        state = fail[state]
+      state = goto[state].get(ch, 0)
+      if out[state]:
+        found.update(out[state])
+    return (state, found)
+
+  ##### Helper functions
+
+  def _addPattern(self, pattern):
+    state = 0
+    for ch in pattern:
+      nextState = self.goto[state].get(ch)
+      if nextState is None:
+        nextState = len(self.goto)
+        self.goto.append({})
+        self.fail.append(0)
+        self.out.append(frozenset())
+        self.goto[state][ch] = nextState
+      state = nextState
+    self.out[state] = self.out[state] | {pattern}
+
+  def _buildFailLinks(self):
+    # breadth-first, so each state's fallback is finished before its own
+    queue = deque(self.goto[0].values())
+    while queue:
+      state = queue.popleft()
+      for ch, nextState in self.goto[state].items():
+        queue.append(nextState)
+        f = self.fail[state]
+        while f and ch not in self.goto[f]:
+          f = self.fail[f]
+        f = self.goto[f].get(ch, 0)
+        self.fail[nextState] = f
+        self.out[nextState] = self.out[nextState] | self.out[f]
@@ -24,33 +24,6 @@ import click
 from .__about__ import __version__
 
 from .slmconfig import SLMConfig, BadSLMConfigError
-from .projectdb import ProjectDB, ProjectDBConfigError
-
-from .commands.cmdInit import cmdInit
-from .commands.cmdStatus import cmdStatus
-from .commands.cmdList import cmdList
-from .commands.cmdCreate import cmdCreateProject, cmdCreateSubproject
-from .commands.cmdEditSubproject import cmdEditSubproject
-from .commands.cmdAddCategory import cmdAddCategory
-from .commands.cmdEditCategory import cmdEditCategory
-from .commands.cmdListCategories import cmdListCategories
-from .commands.cmdAddLicense import cmdAddLicense
-from .commands.cmdListLicenses import cmdListLicenses
-from .commands.cmdEditLicense import cmdEditLicense
-from .commands.cmdSetConfig import cmdSetConfig
-from .commands.cmdGetConfig import cmdGetConfig
-from .commands.cmdListConfig import cmdListConfig
-from .commands.cmdUnsetConfig import cmdUnsetConfig
-from .commands.cmdGetConversion import cmdGetConversion
-from .commands.cmdAddConversion import cmdAddConversion
-from .commands.cmdEditConversion import cmdEditConversion
-from .commands.cmdListConversions import cmdListConversions
-from .commands.cmdImportScan import cmdImportScan
-from .commands.cmdListScanResults import cmdListScanResults
-from .commands.cmdListScans import cmdListScans
-from .commands.cmdCreateReport import cmdCreateReport
-from .commands.cmdCreateReports import cmdCreateReports
-from .commands.cmdRetrieveSPDX import cmdRetrieveSPDX
 
 VERSION_MESSAGE = f"spdxLicenseManager (slm) version {__version__}"
 
@@ -91,6 +64,7 @@ def cli(ctx, slmhome, project, subproject, verbose):
   if slmhome is None or project is None:
     db = None
   else:
+    from .projectdb import ProjectDB, ProjectDBConfigError
     db = ProjectDB()
     projectDBRelativePath = mainconfig.getDBRelativePath(project)
     projectDBPath = os.path.join(
@@ -100,6 +74,9 @@ def cli(ctx, slmhome, project, subproject, verbose):
       db.openDB(projectDBPath)
     except ProjectDBConfigError as e:
       sys.exit(str(e.message))
+    # release the connection when the command is done, rather than leaving
+    # it to be garbage-collected later (possibly in some other thread)
+    ctx.call_on_close(db.closeDB)
   ctx.obj['PROJECTDB'] = db
 
 ##### Helpers
@@ -124,10 +101,15 @@ def checkForContext(ctx):
 
 ##### Commands
 
+# each command's module, and the heavier modules that it uses, such as
+# SQLAlchemy, openpyxl and the reporters, are only imported when the
+# command actually runs, to keep startup fast
+
 @cli.command('init', help="Initialize a new SLM data directory")
 @click.argument('newhome')
 @click.pass_context
 def cliInit(ctx, newhome):
+  from .commands.cmdInit import cmdInit
   return cmdInit(ctx, newhome)
 
 ######################
@@ -137,19 +119,29 @@ def cliInit(ctx, newhome):
 @cli.command('list', help="List projects or subprojects")
 @click.pass_context
 def cliList(ctx):
+  from .commands.cmdList import cmdList
   return cmdList(ctx)
 
-@cli.command('status', help="Show status for one month across all projects")
-@click.argument('year_month')
+@cli.command('status', help="Show status for one month, or a range of months, across all projects")
+@click.argument('year_month', required=False)
+@click.option('--from', 'from_month', default=None, help='first month of range, as YYYY-MM')
+@click.option('--to', 'to_month', default=None, help='last month of range, as YYYY-MM')
+@click.option('--format', 'status_format', default='text', help='output format: text, json or csv')
+@click.option('--fail-on-missing', 'fail_on_missing', is_flag=True, help='exit with an error if any SPDX file, scan or report is missing')
+@click.option('--rebuild', is_flag=True, help='rebuild the status index from the project databases and folders first')
 @click.pass_context
-def cliList(ctx, year_month):
-  return cmdStatus(ctx, year_month)
+def cliList(ctx, year_month, from_month, to_month, status_format,
+  fail_on_missing, rebuild):
+  from .commands.cmdStatus import cmdStatus
+  return cmdStatus(ctx, year_month, from_month, to_month, status_format,
+    fail_on_missing, rebuild)
 
 @cli.command('create-project', help="Create a new project")
 @click.argument('name')
 @click.option('--desc', default='NO DESCRIPTION', help='description for new project')
 @click.pass_context
 def cliCreateProject(ctx, name, desc):
+  from .commands.cmdCreate import cmdCreateProject
   return cmdCreateProject(ctx, name, desc)
 
 @cli.command('create-subproject', help="Create a new subproject")
@@ -157,6 +149,7 @@ def cliCreateProject(ctx, name, desc):
 @click.option('--desc', help='description for new subproject')
 @click.pass_context
 def cliCreateSubproject(ctx, name, desc):
+  from .commands.cmdCreate import cmdCreateSubproject
   return cmdCreateSubproject(ctx, name, desc)
 
 @cli.command('edit-subproject', help="Edit a subproject")
@@ -165,6 +158,7 @@ def cliCreateSubproject(ctx, name, desc):
 def cliEditSubproject(ctx, spdx_search):
   checkForContext(ctx)
   subproject = ctx.obj['SUBPROJECT']
+  from .commands.cmdEditSubproject import cmdEditSubproject
   return cmdEditSubproject(ctx, subproject, spdx_search)
 
 ####################################
@@ -177,6 +171,7 @@ def cliEditSubproject(ctx, spdx_search):
 @click.pass_context
 def cliSetConfig(ctx, key, value):
   checkForContext(ctx)
+  from .commands.cmdSetConfig import cmdSetConfig
   return cmdSetConfig(ctx, key, value)
 
 @cli.command('get-config', help="Get configuration value")
@@ -184,12 +179,14 @@ def cliSetConfig(ctx, key, value):
 @click.pass_context
 def cliGetConfig(ctx, key):
   checkForContext(ctx)
+  from .commands.cmdGetConfig import cmdGetConfig
   return cmdGetConfig(ctx, key)
 
 @cli.command('list-config', help="List all configuration values")
 @click.pass_context
 def cliListConfig(ctx):
   checkForContext(ctx)
+  from .commands.cmdListConfig import cmdListConfig
   return cmdListConfig(ctx)
 
 @cli.command('unset-config', help="Remove configuration value")
@@ -197,6 +194,7 @@ def cliListConfig(ctx):
 @click.pass_context
 def cliUnsetConfig(ctx, key):
   checkForContext(ctx)
+  from .commands.cmdUnsetConfig import cmdUnsetConfig
   return cmdUnsetConfig(ctx, key)
 
 #######################
@@ -209,6 +207,7 @@ def cliUnsetConfig(ctx, key):
 @click.pass_context
 def cliAddCategory(ctx, name, order):
   checkForContext(ctx)
+  from .commands.cmdAddCategory import cmdAddCategory
   return cmdAddCategory(ctx, name, order)
 
 @cli.command('edit-category', help="Edit a category of licenses")
@@ -218,12 +217,14 @@ def cliAddCategory(ctx, name, order):
 @click.pass_context
 def cliEditCategory(ctx, name, new_name, sort_before):
   checkForContext(ctx)
+  from .commands.cmdEditCategory import cmdEditCategory
   return cmdEditCategory(ctx, name, new_name, sort_before)
 
 @cli.command('list-categories', help="List categories of licenses")
 @click.pass_context
 def cliListCategories(ctx):
   checkForContext(ctx)
+  from .commands.cmdListCategories import cmdListCategories
   return cmdListCategories(ctx)
 
 ######################
@@ -236,6 +237,7 @@ def cliListCategories(ctx):
 @click.pass_context
 def cliAddLicense(ctx, name, category):
   checkForContext(ctx)
+  from .commands.cmdAddLicense import cmdAddLicense
   return cmdAddLicense(ctx, name, category)
 
 @cli.command('list-licenses', help="List licenses")
@@ -245,6 +247,7 @@ def cliAddLicense(ctx, name, category):
 @click.pass_context
 def cliListLicenses(ctx, by_category, in_category):
   checkForContext(ctx)
+  from .commands.cmdListLicenses import cmdListLicenses
   return cmdListLicenses(ctx, by_category, in_category)
 
 @cli.command('edit-license', help="Edit a license")
@@ -254,6 +257,7 @@ def cliListLicenses(ctx, by_category, in_category):
 @click.pass_context
 def cliEditLicense(ctx, name, new_name, new_cat):
   checkForContext(ctx)
+  from .commands.cmdEditLicense import cmdEditLicense
   return cmdEditLicense(ctx, name, new_name, new_cat)
 
 #########################
@@ -266,6 +270,7 @@ def cliEditLicense(ctx, name, new_name, new_cat):
 @click.pass_context
 def cliAddConversion(ctx, old_text, license_name):
   checkForContext(ctx)
+  from .commands.cmdAddConversion import cmdAddConversion
   return cmdAddConversion(ctx, old_text, license_name)
 
 @cli.command('get-conversion', help="Get a license name conversion")
@@ -273,6 +278,7 @@ def cliAddConversion(ctx, old_text, license_name):
 @click.pass_context
 def cliGetConversion(ctx, old_text):
   checkForContext(ctx)
+  from .commands.cmdGetConversion import cmdGetConversion
   return cmdGetConversion(ctx, old_text)
 
 @cli.command('edit-conversion', help="Edit an existing license name conversion")
@@ -281,12 +287,14 @@ def cliGetConversion(ctx, old_text):
 @click.pass_context
 def cliEditConversion(ctx, old_text, license_name):
   checkForContext(ctx)
+  from .commands.cmdEditConversion import cmdEditConversion
   return cmdEditConversion(ctx, old_text, license_name)
 
 @cli.command('list-conversions', help="List conversions")
 @click.pass_context
 def cliListConversions(ctx):
   checkForContext(ctx)
+  from .commands.cmdListConversions import cmdListConversions
   return cmdListConversions(ctx)
 
 ###################
@@ -301,6 +309,7 @@ def cliListConversions(ctx):
 def cliImportScan(ctx, spdx_path, scan_date, desc):
   checkForContext(ctx)
   subproject = ctx.obj['SUBPROJECT']
+  from .commands.cmdImportScan import cmdImportScan
   return cmdImportScan(ctx, subproject, spdx_path, scan_date, desc)
 
 @cli.command('list-scan-results', help="List all files and licenses in a scan")
@@ -308,6 +317,7 @@ def cliImportScan(ctx, spdx_path, scan_date, desc):
 @click.pass_context
 def cliListScanResults(ctx, scan_id):
   checkForContext(ctx)
+  from .commands.cmdListScanResults import cmdListScanResults
   return cmdListScanResults(ctx, scan_id)
 
 @cli.command('list-scans', help="List scans")
@@ -315,8 +325,41 @@ def cliListScanResults(ctx, scan_id):
 def cliListScans(ctx):
   checkForContext(ctx)
   subproject = ctx.obj['SUBPROJECT']
+  from .commands.cmdListScans import cmdListScans
   return cmdListScans(ctx, subproject=subproject)
 
+@cli.command('stats', help="Show file counts by license across scans")
+@click.option('--scan_id', default=None, help='Scan ID')
+@click.option('--scan_ids', default=None, help='Scan IDs (multiple)')
+@click.pass_context
+def cliStats(ctx, scan_id, scan_ids):
+  checkForContext(ctx)
+  from .commands.cmdStats import cmdStats
+  return cmdStats(ctx, scan_id, scan_ids)
+
+@cli.command('diff-scans', help="Show files added, removed or changed between two scans")
+@click.option('--from', 'from_scan_id', default=None, help='Earlier scan ID')
+@click.option('--to', 'to_scan_id', default=None, help='Later scan ID')
+@click.option('--report_path', default=None, help='Output file path')
+@click.option('--report_format', default=None, help='Report format (json, csv or xlsx)')
+@click.option('-f', '--force', is_flag=True, help='Force overwrite of existing output file')
+@click.pass_context
+def cliDiffScans(ctx, from_scan_id, to_scan_id, report_path, report_format, force):
+  checkForContext(ctx)
+  from .commands.cmdDiffScans import cmdDiffScans
+  return cmdDiffScans(ctx, from_scan_id, to_scan_id, report_path,
+    report_format, force)
+
+@cli.command('trends', help="Show file counts by license for each month")
+@click.option('--from', 'from_month', default=None, help='First month in format YYYY-MM')
+@click.option('--to', 'to_month', default=None, help='Last month in format YYYY-MM')
+@click.pass_context
+def cliTrends(ctx, from_month, to_month):
+  checkForContext(ctx)
+  subproject = ctx.obj['SUBPROJECT']
+  from .commands.cmdTrends import cmdTrends
+  return cmdTrends(ctx, subproject, from_month, to_month)
+
 #####################
 ##### Report commands
 #####################
@@ -325,22 +368,34 @@ def cliListScans(ctx):
 @click.option('--scan_id', default=None, help='Scan ID')
 @click.option('--scan_ids', default=None, help='Scan IDs (multiple)')
 @click.option('--report_path', default=None, help='Output file path')
-@click.option('--report_format', default=None, help='Report format')
+@click.option('--report_format', default=None, help='Report format (xlsx, json, json-compact, ndjson, csv or sqlite)')
 @click.option('--no_summary', is_flag=True, help='Omit summary report')
 @click.option('-f', '--force', is_flag=True, help='Force overwrite of existing output file')
+@click.option('--streaming', is_flag=True, help='Stream files from database while writing report (for very large scans)')
+@click.option('--rollup', is_flag=True, help='List each directory whose files all have the same license as a single row (xlsx and json only)')
 @click.pass_context
-def cliCreateReport(ctx, scan_id, scan_ids, report_path, report_format, no_summary, force):
+def cliCreateReport(ctx, scan_id, scan_ids, report_path, report_format, no_summary, force, streaming, rollup):
   checkForContext(ctx)
   subproject = ctx.obj['SUBPROJECT']
+  from .commands.cmdCreateReport import cmdCreateReport
   return cmdCreateReport(ctx, subproject, scan_id, scan_ids,
-    report_path, report_format, no_summary, force)
+    report_path, report_format, no_summary, force, streaming, rollup)
 
-@cli.command('create-reports', help="Create all reports for current scans")
+@cli.command('create-reports', help="Create all missing or out-of-date reports for current scans")
 @click.option('-f', '--force', is_flag=True, help='Force overwrite of existing reports')
+@click.option('--report_formats', default='xlsx,json', help='Comma-separated report formats (xlsx, json, json-compact, ndjson, csv, sqlite)')
+@click.option('--jobs', default=1, type=int, help='Number of scans to create reports for in parallel')
+@click.option('--since', default=None, help='Only scans from this month onward, in format YYYY-MM')
+@click.option('--timings', is_flag=True, help='Show time spent analyzing, rendering and writing reports')
+@click.option('--pipeline', is_flag=True, help='With one job, write each scan\'s reports in a separate process while the next scan is analyzed')
 @click.pass_context
-def cliCreateReports(ctx, force):
+def cliCreateReports(ctx, force, report_formats, jobs, since, timings,
+  pipeline):
   checkForContext(ctx)
-  return cmdCreateReports(ctx, force)
+  subproject = ctx.obj['SUBPROJECT']
+  from .commands.cmdCreateReports import cmdCreateReports
+  return cmdCreateReports(ctx, subproject, force, report_formats, jobs, since,
+    timings, pipeline)
 
 #############################
 ##### SPDX retrieval commands
@@ -348,7 +403,51 @@ def cliCreateReports(ctx, force):
 
 @cli.command('retrieve-spdx', help="Retrieve SPDX files for a given month")
 @click.option('--month', default=None, help='Month in format YYYY-MM')
+@click.option('--recursive', default=False, is_flag=True, help='Also search subdirectories of the search directory')
+@click.option('--max_depth', default=None, type=int, help='Only search this many levels of subdirectories (implies --recursive)')
+@click.option('--glob', 'globs', multiple=True, help='Only retrieve files whose names match this pattern (can be repeated)')
+@click.option('--archives', default=False, is_flag=True, help='Also retrieve SPDX files from .tar.gz, .tgz, .tar and .zip archives')
+@click.option('--copy_workers', default=4, type=int, help='Number of files to copy at once when the search directory is on another filesystem')
 @click.pass_context
-def cliRetrieveSPDX(ctx, month):
+def cliRetrieveSPDX(ctx, month, recursive, max_depth, globs, archives,
+  copy_workers):
   checkForContext(ctx)
-  return cmdRetrieveSPDX(ctx, month)
+  from .commands.cmdRetrieveSPDX import cmdRetrieveSPDX
+  return cmdRetrieveSPDX(ctx, month, recursive=recursive, max_depth=max_depth,
+    globs=globs, archives=archives, copy_workers=copy_workers)
+
+@cli.command('retrieve-and-import', help="Retrieve SPDX files for a given month and import them as scans")
+@click.option('--month', default=None, help='Month in format YYYY-MM')
+@click.option('--recursive', default=False, is_flag=True, help='Also search subdirectories of the search directory')
+@click.option('--max_depth', default=None, type=int, help='Only search this many levels of subdirectories (implies --recursive)')
+@click.option('--glob', 'globs', multiple=True, help='Only retrieve files whose names match this pattern (can be repeated)')
+@click.option('--archives', default=False, is_flag=True, help='Also retrieve SPDX files from .tar.gz, .tgz, .tar and .zip archives')
+@click.option('--jobs', default=1, type=int, help='Number of SPDX files to parse in parallel')
+@click.option('--copy_workers', default=4, type=int, help='Number of files to copy at once when the search directory is on another filesystem')
+@click.pass_context
+def cliRetrieveAndImport(ctx, month, recursive, max_depth, globs, archives,
+  jobs, copy_workers):
+  checkForContext(ctx)
+  from .commands.cmdRetrieveAndImport import cmdRetrieveAndImport
+  return cmdRetrieveAndImport(ctx, month, recursive=recursive,
+    max_depth=max_depth, globs=globs, archives=archives, jobs=jobs,
+    copy_workers=copy_workers)
+
+@cli.command('watch', help="Watch for new SPDX files, and retrieve and import them as they arrive")
+@click.option('--interval', default=60, type=int, help='Seconds between checks of the search directory')
+@click.option('--settle', default=30, type=int, help='Seconds since a file was last modified before it is retrieved, if not yet seen unchanged')
+@click.option('--once', default=False, is_flag=True, help='Check once and exit, rather than watching')
+@click.option('--recursive', default=False, is_flag=True, help='Also search subdirectories of the search directory')
+@click.option('--max_depth', default=None, type=int, help='Only search this many levels of subdirectories (implies --recursive)')
+@click.option('--glob', 'globs', multiple=True, help='Only retrieve files whose names match this pattern (can be repeated)')
+@click.option('--archives', default=False, is_flag=True, help='Also retrieve SPDX files from .tar.gz, .tgz, .tar and .zip archives')
+@click.option('--jobs', default=1, type=int, help='Number of SPDX files to parse in parallel')
+@click.option('--reports', default=False, is_flag=True, help='Also create xlsx and JSON reports for each new scan')
+@click.pass_context
+def cliWatch(ctx, interval, settle, once, recursive, max_depth, globs,
+  archives, jobs, reports):
+  # watches every project unless --project is given
+  from .commands.cmdWatch import cmdWatch
+  return cmdWatch(ctx, interval=interval, settle=settle, once=once,
+    recursive=recursive, max_depth=max_depth, globs=globs, archives=archives,
+    jobs=jobs, reports=reports)
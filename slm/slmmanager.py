@@ -22,6 +22,7 @@ import os
 from datetime import datetime
 
 from .projectdb import ProjectDB, ProjectDBConfigError
+from .statusIndex import getItemForFilename
 
 class SLMManagerError(Exception):
   """Exception raised for errors related to the SLM manager.
@@ -114,6 +115,57 @@ class SLMManager():
         retval = True
     return retval
 
+  def listFilenames(self, dirPath):
+    # returns a set of the names of the files in dirPath, or an empty set
+    # if it doesn't exist
+    try:
+      with os.scandir(dirPath) as it:
+        return set(entry.name for entry in it if entry.is_file())
+    except FileNotFoundError:
+      return set()
+
+  def getMonthsInRange(self, first_month, last_month):
+    # returns each "YYYY-MM" month from first_month through last_month
+    try:
+      first = datetime.strptime(first_month, "%Y-%m")
+      last = datetime.strptime(last_month, "%Y-%m")
+    except ValueError:
+      raise SLMManagerError("Months must be in the form YYYY-MM")
+    if last < first:
+      raise SLMManagerError(f"{last_month} is before {first_month}")
+    months = []
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+      months.append(f"{year:04d}-{month:02d}")
+      year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+  def getProjectStatusItems(self, project):
+    """
+    Return (subprojects, items) for project, for rebuilding the status
+    index: its subprojects' names, and a (subproject, kind, date) item for
+    each of its scans and each SPDX file and report in its subprojects'
+    folders. Each folder is listed once.
+    """
+    db = ProjectDB()
+    db.openDB(self.getProjectDBPath(project), readonly=True)
+    try:
+      subprojects = [sp.name for sp in db.getSubprojectsAll()]
+      items = set((scan.subproject.name, "scan",
+        scan.scan_dt.strftime("%Y-%m-%d")) for scan in db.getScansAll())
+    finally:
+      db.closeDB()
+
+    for subproject in subprojects:
+      for folder, dirPath in [
+          ("spdx", self.getSubprojectSPDXDir(project, subproject)),
+          ("reports", self.getSubprojectReportsDir(project, subproject))]:
+        for filename in self.listFilenames(dirPath):
+          item = getItemForFilename(subproject, folder, filename)
+          if item is not None:
+            items.add(item)
+    return (subprojects, sorted(items))
+
   def isJSONForMonth(self, project, subproject, year_month):
     retval = False
     repDir = self.getSubprojectReportsDir(project, subproject)
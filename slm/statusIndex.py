@@ -0,0 +1,210 @@
+# statusIndex.py
+#
+# Module for spdxLicenseManager to keep an index of which SPDX files, scans
+# and reports exist for each subproject, for the status command.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import re
+import sqlite3
+
+from .reports.common import atomicReportPath
+
+# matches the date in the name of a subproject's SPDX file or report
+DATE_REGEX = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# the item that each kind of file in a subproject's folders is indexed as,
+# by its folder and extension
+INDEXED_FILES = {
+  ("spdx", "spdx"): "spdx",
+  ("reports", "json"): "json",
+  ("reports", "xlsx"): "xlsx",
+}
+
+class StatusIndex:
+  """Index, in an SQLite file in the SLM home directory, of which SPDX
+  files, scans and reports exist for each subproject and on which date.
+  Commands that create them record them here, so that status can be
+  computed with one query however many projects there are. Changes made
+  outside of slm aren't seen until the index is rebuilt from the project
+  databases and folders. While the index file doesn't exist, nothing is
+  recorded, since it will be rebuilt from scratch when next used."""
+
+  FILENAME = "slm-status.db"
+
+  SCHEMA = [
+    """CREATE TABLE subprojects (
+      project TEXT,
+      subproject TEXT,
+      PRIMARY KEY (project, subproject)
+    )""",
+    """CREATE TABLE items (
+      project TEXT,
+      subproject TEXT,
+      kind TEXT,
+      date TEXT,
+      PRIMARY KEY (project, subproject, kind, date)
+    )""",
+    """CREATE INDEX items_date ON items (date)""",
+  ]
+
+  def __init__(self, slmhome):
+    super(StatusIndex, self).__init__()
+    self.slmhome = slmhome
+    self.path = os.path.join(slmhome, self.FILENAME)
+
+  ##### Main status index functions
+  ##### External usage shouldn't require calling anything except these
+
+  def exists(self):
+    return os.path.isfile(self.path)
+
+  def rebuild(self, projectItems):
+    """
+    Replace the index with projectItems, a list of (project, subprojects,
+    items) where items is a list of (subproject, kind, date). The new index
+    is built in a temporary file, so status never sees a partial one.
+    """
+    with atomicReportPath(self.path) as tmpPath:
+      conn = sqlite3.connect(tmpPath)
+      try:
+        with conn:
+          for statement in self.SCHEMA:
+            conn.execute(statement)
+          for project, subprojects, items in projectItems:
+            self._insert(conn, project, subprojects, items)
+      finally:
+        conn.close()
+
+  def recordSubproject(self, project, subproject):
+    self._record(project, [subproject], [])
+
+  def recordScans(self, project, scans):
+    """Record each (subproject, date) in scans as an imported scan."""
+    self._record(project, [], [(subproject, "scan", date)
+      for subproject, date in scans])
+
+  def recordPaths(self, project, paths):
+    """
+    Record each of paths that is an SPDX file or report in one of
+    project's subproject folders, named for its subproject and date; any
+    other paths are ignored.
+    """
+    items = []
+    for path in paths:
+      item = self.getItemForPath(project, path)
+      if item is not None:
+        items.append(item)
+    self._record(project, [], items)
+
+  def getItemForPath(self, project, path):
+    """
+    Return the (subproject, kind, date) item for path, or None if it isn't
+    an SPDX file or report in one of project's subproject folders.
+    """
+    subprojectsDir = os.path.join(self.slmhome, "projects", project,
+      "subprojects")
+    relPath = os.path.relpath(os.path.abspath(path),
+      os.path.abspath(subprojectsDir))
+    parts = relPath.split(os.sep)
+    if len(parts) != 3:
+      return None
+    subproject, folder, filename = parts
+    return getItemForFilename(subproject, folder, filename)
+
+  def getStatusForMonths(self, projects, months):
+    """
+    Return a status row for each subproject of projects, in the order of
+    projects and then by subproject name, for the sorted list of "YYYY-MM"
+    months: [project, subproject, statuses], where statuses maps each
+    month to (isSPDX, isScan, isJSON, isXLSX). An SPDX file only counts
+    if a scan was imported on the same date. Uses a single query.
+    """
+    conn = sqlite3.connect(self.path)
+    try:
+      cursor = conn.execute("""SELECT s.project, s.subproject, i.kind, i.date
+        FROM subprojects s LEFT JOIN items i
+        ON i.project = s.project AND i.subproject = s.subproject
+          AND i.date BETWEEN ? AND ?
+        ORDER BY s.project, s.subproject""",
+        (f"{months[0]}-01", f"{months[-1]}-31"))
+      found = {}
+      for project, subproject, kind, date in cursor:
+        dates = found.setdefault(project, {}).setdefault(subproject, {})
+        if kind is not None:
+          dates.setdefault(kind, set()).add(date)
+    finally:
+      conn.close()
+
+    rows = []
+    for project in projects:
+      for subproject, dates in found.get(project, {}).items():
+        scanDates = dates.get("scan", set())
+        spdxDates = dates.get("spdx", set()) & scanDates
+        statuses = {}
+        for month in months:
+          statuses[month] = tuple(any(d.startswith(month) for d in ds)
+            for ds in [spdxDates, scanDates, dates.get("json", set()),
+              dates.get("xlsx", set())])
+        rows.append([project, subproject, statuses])
+    return rows
+
+  ##### Helper functions
+
+  def _record(self, project, subprojects, items):
+    if not self.exists():
+      return
+    try:
+      conn = sqlite3.connect(self.path)
+      try:
+        with conn:
+          self._insert(conn, project, subprojects, items)
+      finally:
+        conn.close()
+    except sqlite3.Error:
+      # an index that missed a change is wrong, so remove it to have it
+      # rebuilt when next used
+      try:
+        os.remove(self.path)
+      except FileNotFoundError:
+        pass
+
+  def _insert(self, conn, project, subprojects, items):
+    # an item's subproject is added too, in case the index predates it
+    allSubprojects = set(subprojects)
+    allSubprojects.update(subproject for subproject, kind, date in items)
+    conn.executemany("INSERT OR IGNORE INTO subprojects VALUES (?, ?)",
+      [(project, subproject) for subproject in sorted(allSubprojects)])
+    conn.executemany("INSERT OR IGNORE INTO items VALUES (?, ?, ?, ?)",
+      [(project, subproject, kind, date)
+      for subproject, kind, date in items])
+
+def getItemForFilename(subproject, folder, filename):
+  """
+  Return the (subproject, kind, date) item for a file named filename in
+  subproject's folder ("spdx" or "reports"), or None if it isn't one of
+  subproject's SPDX files or reports, named for its date.
+  """
+  prefix = f"{subproject}-"
+  if not filename.startswith(prefix) or "." not in filename:
+    return None
+  date, ext = filename[len(prefix):].rsplit(".", 1)
+  kind = INDEXED_FILES.get((folder, ext), None)
+  if kind is None or not DATE_REGEX.match(date):
+    return None
+  return (subproject, kind, date)
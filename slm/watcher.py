@@ -0,0 +1,290 @@
+# watcher.py
+#
+# Module for spdxLicenseManager to watch a project's SPDX search directory,
+# and retrieve and import new SPDX files as they arrive.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime
+import json
+import os
+import re
+import time
+
+from .batchImporter import BatchImporter, getRetrievedImportTasks
+from .projectdb import ProjectDBQueryError
+from .reports.common import (REPORT_EXTENSIONS, ReportFileError,
+  atomicReportPath)
+from .reports.freshness import ReportFingerprinter, ReportManifest
+from .reports.pipeline import createScanReports, newStageTimings
+from .retriever import Retriever
+from .statusIndex import StatusIndex
+
+# finds the month of the first YYYY-MM-DD date in a path
+MONTH_REGEX = re.compile(r"(\d{4}-\d{2})-\d{2}")
+
+# report formats created for newly imported scans
+WATCH_REPORT_FORMATS = ["xlsx", "json"]
+
+class WatchLedger:
+  """Records which files in a project's SPDX search directory have already
+  been handled, by their path, size and modification time, in a hidden JSON
+  file in the project directory, so that a restarted watcher doesn't handle
+  them again. A file that is replaced by a different one at the same path
+  is handled again."""
+
+  FILENAME = ".slm-watch.json"
+
+  def __init__(self, projectDir):
+    super(WatchLedger, self).__init__()
+    self.path = os.path.join(projectDir, self.FILENAME)
+    self.entries = {}
+    self.changed = False
+    try:
+      with open(self.path, "r") as f:
+        self.entries = json.load(f)
+    except (FileNotFoundError, ValueError):
+      # no ledger yet, or an unreadable one; treat as empty
+      self.entries = {}
+
+  def isSeen(self, relPath, signature):
+    entry = self.entries.get(relPath, None)
+    return entry is not None and (entry["size"], entry["mtime"]) == signature
+
+  def record(self, relPath, signature, status):
+    size, mtime = signature
+    self.entries[relPath] = {"size": size, "mtime": mtime, "status": status}
+    self.changed = True
+
+  def prune(self, relPaths):
+    # forget files that are no longer in the search directory, such as
+    # those that were moved into a subproject
+    for relPath in list(self.entries.keys()):
+      if relPath not in relPaths:
+        del self.entries[relPath]
+        self.changed = True
+
+  def save(self):
+    if not self.changed:
+      return
+    with atomicReportPath(self.path) as tmpPath:
+      with open(tmpPath, "w") as f:
+        json.dump(self.entries, f, indent=2, sort_keys=True)
+    self.changed = False
+
+class ProjectWatcher:
+  """Polls one project's SPDX search directory. A new file is handled once
+  it is stable: when its size and modification time are unchanged since the
+  previous poll, or it was last modified at least settle seconds ago. Stable
+  files are retrieved into their subprojects, one month at a time, then
+  imported as scans and, if requested, reported on. A file's month comes
+  from the first date in its path, so archives should have the date in
+  their own name or in their directory's."""
+
+  def __init__(self, slmhome, project, *, maxDepth=0, globs=(),
+    archives=False, jobs=1, reports=False, settle=30):
+    super(ProjectWatcher, self).__init__()
+    self.slmhome = slmhome
+    self.project = project
+    self.projectDir = os.path.join(slmhome, "projects", project)
+    self.maxDepth = maxDepth
+    self.globs = globs
+    self.archives = archives
+    self.jobs = jobs
+    self.reports = reports
+    self.settle = settle
+    self.ledger = WatchLedger(self.projectDir)
+    self.statusIndex = StatusIndex(slmhome)
+    # (size, mtime) of each file at the previous poll
+    self.lastSeen = {}
+
+  ##### Main watcher functions
+  ##### External usage shouldn't require calling anything except these
+
+  def poll(self, db):
+    """
+    Check the search directory once, and handle any new stable files.
+    Returns a list of messages describing what was done.
+    """
+    try:
+      search_dir = db.getConfigValue("spdx-search-dir")
+    except ProjectDBQueryError:
+      # nothing to watch for this project
+      return []
+    subprojects = db.getSubprojectsAll()
+    if not os.path.isdir(search_dir) or subprojects == []:
+      return []
+
+    current = self._scanSearchDir(search_dir)
+    now = time.time()
+    ready = []
+    for relPath, signature in current.items():
+      if self.ledger.isSeen(relPath, signature):
+        continue
+      if (self.lastSeen.get(relPath, None) == signature or
+          now - signature[1] >= self.settle):
+        ready.append(relPath)
+    self.lastSeen = current
+    self.ledger.prune(current)
+
+    # retrieve the ready files one month at a time, since a Retriever
+    # handles a single month
+    messages = []
+    byMonth = {}
+    for relPath in sorted(ready):
+      month = self._getMonth(relPath)
+      if month is None:
+        self.ledger.record(relPath, current[relPath], "ignored")
+      else:
+        byMonth.setdefault(month, []).append(relPath)
+    tasks = []
+    for month, relPaths in sorted(byMonth.items()):
+      retriever = self._runRetriever(search_dir, month, relPaths,
+        subprojects)
+      messages.extend(self._getRetrieverMessages(retriever))
+      handled = set()
+      for _id, name, srcPath, dstPath in retriever.results["success"]:
+        handled.add(self._getSourceRelPath(retriever, search_dir, srcPath))
+      for relPath in relPaths:
+        status = "retrieved" if relPath in handled else "not retrieved"
+        self.ledger.record(relPath, current[relPath], status)
+      tasks.extend(getRetrievedImportTasks(retriever))
+
+    # the files are recorded before importing, so that a file whose import
+    # fails is not retrieved again; it is left in its subproject's folder
+    self.ledger.save()
+
+    if tasks != []:
+      messages.extend(self._importFiles(db, tasks))
+    return messages
+
+  ##### Helper functions
+
+  def _scanSearchDir(self, search_dir):
+    # returns the (size, mtime) of each file, by path relative to search_dir
+    files = {}
+    dirs = [("", 0)]
+    while dirs:
+      relDir, depth = dirs.pop()
+      with os.scandir(os.path.join(search_dir, relDir)) as it:
+        for entry in it:
+          relPath = os.path.join(relDir, entry.name)
+          if entry.is_file():
+            st = entry.stat()
+            files[relPath] = (st.st_size, st.st_mtime)
+          elif (entry.is_dir(follow_symlinks=False) and
+              (self.maxDepth is None or depth < self.maxDepth)):
+            dirs.append((relPath, depth + 1))
+    return files
+
+  def _getMonth(self, relPath):
+    m = MONTH_REGEX.search(relPath)
+    if m is None:
+      return None
+    try:
+      datetime.strptime(m.group(1), "%Y-%m")
+    except ValueError:
+      return None
+    return m.group(1)
+
+  def _runRetriever(self, search_dir, month, relPaths, subprojects):
+    retriever = Retriever()
+    retriever.setDatestr(month)
+    retriever.setSearchDir(search_dir)
+    retriever.setProjectDir(self.projectDir)
+    retriever.setGlobs(self.globs)
+    retriever.setSearchArchives(self.archives)
+    retriever.setFileList(relPaths)
+    for subproject in subprojects:
+      retriever.addSubproject(name=subproject.name, _id=subproject._id,
+        spdx_search=subproject.spdx_search)
+    retriever.prepareFiles()
+    retriever.createResults()
+    retriever.moveFiles()
+    self.statusIndex.recordPaths(self.project, [dstPath
+      for _id, name, srcPath, dstPath in retriever.results["success"]])
+    return retriever
+
+  def _getSourceRelPath(self, retriever, search_dir, srcPath):
+    # files in archives are recorded under the archive's path
+    if srcPath in retriever.archiveMembers:
+      srcPath = retriever.archiveMembers[srcPath][0]
+    return os.path.relpath(srcPath, search_dir)
+
+  def _getRetrieverMessages(self, retriever):
+    messages = []
+    for archivePath, reason in retriever.unreadableArchives:
+      messages.append(f"Skipped unreadable archive {archivePath}: {reason}")
+    for _id, name, srcPath, dstPath in retriever.results["success"]:
+      srcFile = os.path.basename(srcPath)
+      dstFile = os.path.basename(dstPath)
+      messages.append(f"Retrieved {srcFile} to {name} (new name: {dstFile})")
+    # only this poll's files were checked, so every other subproject has
+    # no matches; only report problems with the files that were found
+    found = set(name for name, _id, matches in
+      retriever.subprojects.values() if matches != [])
+    for error in retriever.results["error"]:
+      if error[1] in found:
+        messages.append(error[2])
+    return messages
+
+  def _importFiles(self, db, tasks):
+    messages = []
+    outcomes = BatchImporter(db=db, jobs=self.jobs).run(tasks)
+    scan_ids = []
+    imported = []
+    for (name, dstPath, scan_dt, desc), (scan_id, count, error) in zip(tasks,
+        outcomes):
+      dstFile = os.path.basename(dstPath)
+      if error is None:
+        messages.append(f"Imported {count} files from {dstFile} to {name} (scan ID {scan_id})")
+        scan_ids.append(scan_id)
+        imported.append((name, scan_dt))
+      else:
+        messages.append(f"Error importing {dstFile} to {name}: {error}")
+    self.statusIndex.recordScans(self.project, imported)
+    if self.reports:
+      messages.extend(self._createReports(db, scan_ids))
+    return messages
+
+  def _createReports(self, db, scan_ids):
+    messages = []
+    fingerprinter = ReportFingerprinter(db=db)
+    for scan_id in scan_ids:
+      scan = db.getScan(_id=scan_id)
+      subproject_name = scan.subproject.name
+      filename_pref = f"{subproject_name}-{scan.scan_dt.strftime('%Y-%m-%d')}"
+      reportsDir = os.path.join(self.projectDir, "subprojects",
+        subproject_name, "reports")
+      reports = [(fmt, os.path.join(reportsDir,
+        f"{filename_pref}.{REPORT_EXTENSIONS[fmt]}"))
+        for fmt in WATCH_REPORT_FORMATS]
+      created, errors = createScanReports(db, scan_id, reports,
+        newStageTimings())
+      messages.extend(errors)
+
+      # record the new reports, so that create-reports doesn't redo them
+      manifest = ReportManifest(reportsDir)
+      fingerprint = fingerprinter.getScanFingerprint(scan)
+      self.statusIndex.recordPaths(self.project, created)
+      for reportPath in created:
+        messages.append(f"Created report {os.path.basename(reportPath)}")
+        manifest.record(reportPath, fingerprint)
+      try:
+        manifest.save()
+      except ReportFileError as e:
+        messages.append(f"Error recording report fingerprints: {e.message}")
+    return messages
@@ -0,0 +1,131 @@
+# tests/ft_diffscans.py
+#
+# Functional tests for spdxLicenseManager: comparing two scans to see which
+# files were added, removed or changed.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import click
+from click.testing import CliRunner
+
+from testfixtures import TempDirectory
+import csv
+import json
+
+from slm import slm
+
+from helper_sandbox import (setUpSandbox, runSandboxCommands, tearDownSandbox,
+  runcmd, printResultDebug)
+from helper_check import checkForFileExists
+
+class DiffScansFuncTestSuite(unittest.TestCase):
+  """spdxLicenseManager scan diff FT suite."""
+
+  def setUp(self):
+    self.runner = CliRunner()
+    setUpSandbox(self, slm.cli)
+    runSandboxCommands(self, slm.cli)
+
+    # set up temp directory for outputting reports
+    self.reportDir = TempDirectory()
+
+  def tearDown(self):
+    self.reportDir.cleanup()
+    self.reportDir = None
+    tearDownSandbox(self)
+
+  def test_can_print_diff_between_scans(self):
+    # Edith wants to know what changed between the January and February
+    # scans
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1",
+      "--to", "2")
+
+    # She gets a summary line followed by the list of changed files
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual("Changes from scan 1 to scan 2: 22 added, 0 removed, 9 changed", lines[0])
+    self.assertEqual("", lines[1])
+    self.assertEqual(["Status", "File", "Old", "license", "New", "license",
+      "Changes"], lines[2].split())
+    self.assertEqual(["changed", "spdxLicenseManager-master/slm/__configs__.py",
+      "Apache-2.0", "Apache-2.0", "sha1,", "md5"], lines[4].split())
+    self.assertEqual(4 + 22 + 9, len(lines))
+
+  def test_can_save_diff_as_json(self):
+    # Edith wants to save the diff in the other direction as JSON
+    reportPath = self.reportDir.path + "/diff.json"
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "2",
+      "--to", "1", "--report_path", reportPath)
+
+    # It succeeds, and tells her how many files differed
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(f"Changes from scan 2 to scan 1: 0 added, 22 removed, 9 changed\nDiff report successfully created at {reportPath}.\n", result.output)
+    checkForFileExists(self, self.reportDir.path, reportPath)
+    with open(reportPath, "r") as f:
+      rjs = json.load(f)
+    self.assertEqual(31, len(rjs))
+    self.assertEqual({"path": "spdxLicenseManager-master/slm/commands/cmdImportScan.py",
+      "status": "removed", "oldLicense": "Apache-2.0", "newLicense": None,
+      "changes": []}, rjs[1])
+
+  def test_can_save_diff_as_csv_with_explicit_format(self):
+    reportPath = self.reportDir.path + "/diff.txt"
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1",
+      "--to", "2", "--report_path", reportPath, "--report_format", "csv")
+    self.assertEqual(0, result.exit_code)
+    with open(reportPath, "r", newline="") as f:
+      rows = list(csv.reader(f))
+    self.assertEqual(32, len(rows))
+    self.assertEqual(["added",
+      "spdxLicenseManager-master/slm/commands/cmdImportScan.py", "",
+      "Apache-2.0", ""], rows[2])
+
+  def test_can_save_diff_as_xlsx(self):
+    reportPath = self.reportDir.path + "/diff.xlsx"
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1",
+      "--to", "2", "--report_path", reportPath)
+    self.assertEqual(0, result.exit_code)
+    checkForFileExists(self, self.reportDir.path, reportPath)
+
+  def test_will_not_overwrite_existing_diff_without_force(self):
+    reportPath = self.reportDir.write("diff.json", b"[]")
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1",
+      "--to", "2", "--report_path", reportPath)
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual(f"File already exists at {reportPath} (use -f to force overwrite)\n", result.output)
+
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1",
+      "--to", "2", "--report_path", reportPath, "-f")
+    self.assertEqual(0, result.exit_code)
+
+  def test_cannot_diff_without_both_scans(self):
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1")
+    self.assertEqual(1, result.exit_code)
+    self.assertIn('"from" and "to" scan IDs must both be provided', result.output)
+
+  def test_cannot_diff_unknown_scan(self):
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1",
+      "--to", "9")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Scan ID 9 does not exist.\n", result.output)
+
+  def test_cannot_diff_to_unknown_format(self):
+    reportPath = self.reportDir.path + "/diff.pdf"
+    result = runcmd(self, slm.cli, "frotz", "diff-scans", "--from", "1",
+      "--to", "2", "--report_path", reportPath)
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Unknown diff report format: pdf\n", result.output)
@@ -211,3 +211,41 @@ class JSONReportFuncTestSuite(unittest.TestCase):
       json_contents = f.read()
     self.assertIn("spdxLicenseManager-master/tests/ft_init.py", json_contents)
     self.assertIn("spdxSummarizer-master/LICENSE-docs.txt", json_contents)
+
+  def test_can_pretty_print_json_report(self):
+    # Edith wants a JSON report that she can read in a text editor, so she
+    # turns on pretty-printing
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "report-pretty-print", "yes")
+    self.assertEqual(0, result.exit_code)
+
+    reportPath = self.reportDir.path + "/report.json"
+    result = runcmd(self, slm.cli, "frotz", "create-report", "--scan_id", "1",
+      "--report_format", "json", "--report_path", reportPath)
+    self.assertEqual(0, result.exit_code)
+
+    # The report is indented, one entry per line, and still valid JSON
+    with open(reportPath, 'r') as f:
+      json_contents = f.read()
+    lines = json_contents.splitlines()
+    self.assertEqual("[", lines[0])
+    self.assertEqual("  {", lines[1])
+    self.assertEqual('    "name": "Project Licenses",', lines[2])
+    rj = json.loads(json_contents)
+    self.assertEqual("Project Licenses", rj[0]["name"])
+
+  def test_can_create_compact_json_report_with_default_path(self):
+    # Edith wants a smaller JSON report for her downstream tools
+    result = runcmd(self, slm.cli, "frotz", "create-report", "--scan_id", "2",
+      "--report_format", "json-compact")
+    self.assertEqual(0, result.exit_code)
+
+    # It's saved with a .compact.json extension in the default location
+    expectedPath = os.path.join(self.slmhome, "projects", "frotz",
+      "subprojects", "frotz-dim", "reports", "frotz-dim-2018-02-06.compact.json")
+    self.assertEqual(f"Report successfully created at {expectedPath}.\n", result.output)
+    with open(expectedPath, 'r') as f:
+      rj = json.load(f)
+    self.assertEqual("slm-json-compact-2", rj["format"])
+    self.assertEqual(76, len(rj["files"]))
+    self.assertEqual(76, sum(cat["numFiles"] for cat in rj["categories"]))
@@ -19,14 +19,18 @@
 # limitations under the License.
 
 import unittest
+from unittest import mock
 import click
 from click.testing import CliRunner
 
 from testfixtures import TempDirectory
 import os
+import csv
 import json
+import sqlite3
 
 from slm import slm
+from slm.reports.analysis import Analyzer
 
 from helper_sandbox import (setUpSandbox, runSandboxCommands, tearDownSandbox,
   runcmd, printResultDebug)
@@ -140,3 +144,218 @@ class AllReportsFuncTestSuite(unittest.TestCase):
     p4 = os.path.join("projects", "frotz", "subprojects", "frotz-dim",
       "reports", "frotz-dim-2018-02-06.json")
     checkForFileExists(self, self.slmhome, p4)
+
+  def test_can_choose_formats_for_all_reports(self):
+    # Edith's downstream tools want compact JSON and NDJSON reports instead
+    result = runcmd(self, slm.cli, "frotz", "create-reports",
+      "--report_formats", "json-compact,ndjson")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("4 reports successfully created\n", result.output)
+
+    reportsDir = os.path.join("projects", "frotz", "subprojects", "frotz-dim",
+      "reports")
+    checkForFileExists(self, self.slmhome,
+      os.path.join(reportsDir, "frotz-dim-2018-02-06.compact.json"))
+    checkForFileExists(self, self.slmhome,
+      os.path.join(reportsDir, "frotz-dim-2018-02-06.ndjson"))
+    self.assertFalse(os.path.exists(os.path.join(self.slmhome, reportsDir,
+      "frotz-dim-2018-02-06.xlsx")))
+
+    # and the NDJSON report has one line per file
+    with open(os.path.join(self.slmhome, reportsDir,
+        "frotz-dim-2018-02-06.ndjson"), "r") as f:
+      lines = f.read().splitlines()
+    self.assertEqual(76, len(lines))
+    self.assertEqual("Project Licenses", json.loads(lines[0])["category"])
+
+  def test_can_make_csv_and_sqlite_reports(self):
+    # Edith wants CSV files and SQLite databases that she can load into
+    # other tools and query directly
+    result = runcmd(self, slm.cli, "frotz", "create-reports",
+      "--report_formats", "csv,sqlite")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("4 reports successfully created\n", result.output)
+
+    reportsDir = os.path.join(self.slmhome, "projects", "frotz", "subprojects",
+      "frotz-dim", "reports")
+    with open(os.path.join(reportsDir, "frotz-dim-2018-02-06.csv"),
+        newline="") as f:
+      rows = list(csv.reader(f))
+    self.assertEqual(["Category", "License", "File", "Excluded extension",
+      "Third party", "Empty file"], rows[0])
+    self.assertEqual(77, len(rows))
+
+    conn = sqlite3.connect(os.path.join(reportsDir,
+      "frotz-dim-2018-02-06.sqlite"))
+    try:
+      numFiles = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    finally:
+      conn.close()
+    self.assertEqual(76, numFiles)
+
+  def test_can_make_all_reports_in_parallel(self):
+    # Edith's monthly run has many scans, so she spreads the work across
+    # several processes
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--jobs", "2",
+      "--report_formats", "json")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("2 reports successfully created\n", result.output)
+
+    # the reports are the same as if they had been created one at a time
+    reportsDir = os.path.join(self.slmhome, "projects", "frotz", "subprojects",
+      "frotz-dim", "reports")
+    with open(os.path.join(reportsDir, "frotz-dim-2018-02-06.json"), "r") as f:
+      parallelReport = f.read()
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--jobs", "1",
+      "--report_formats", "json", "-f")
+    self.assertEqual(0, result.exit_code)
+    with open(os.path.join(reportsDir, "frotz-dim-2018-02-06.json"), "r") as f:
+      serialReport = f.read()
+    self.assertEqual(serialReport, parallelReport)
+
+  def test_can_make_all_reports_in_a_pipeline(self):
+    # Edith tries overlapping each scan's analysis with the previous scan's
+    # reports, and gets the same reports as the default one at a time
+    reportsDir = os.path.join(self.slmhome, "projects", "frotz", "subprojects",
+      "frotz-dim", "reports")
+    result = runcmd(self, slm.cli, "frotz", "create-reports",
+      "--report_formats", "json")
+    self.assertEqual(0, result.exit_code)
+    with open(os.path.join(reportsDir, "frotz-dim-2018-02-06.json"), "r") as f:
+      serialReport = f.read()
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--pipeline",
+      "--report_formats", "json", "-f")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("2 reports successfully created\n", result.output)
+    with open(os.path.join(reportsDir, "frotz-dim-2018-02-06.json"), "r") as f:
+      pipelinedReport = f.read()
+    self.assertEqual(serialReport, pipelinedReport)
+
+  def test_cannot_make_all_reports_in_a_pipeline_with_several_jobs(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--pipeline",
+      "--jobs", "2")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("--pipeline can only be used with --jobs 1\n",
+      result.output)
+
+  def test_parallel_reports_skip_existing_reports(self):
+    runcmd(self, slm.cli, "frotz", "create-reports")
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--jobs", "2")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("0 reports successfully created\n", result.output)
+
+  def test_cannot_make_all_reports_with_fewer_than_one_job(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--jobs", "0")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Number of jobs must be at least 1, got 0\n",
+      result.output)
+
+  @mock.patch('slm.reports.pipeline.Analyzer')
+  def test_rerun_skips_up_to_date_reports_without_analysis(self, mockAnalyzer):
+    # Edith runs create-reports nightly; when nothing has changed, no scan
+    # should be analyzed again
+    mockAnalyzer.side_effect = Analyzer
+    runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual(2, mockAnalyzer.call_count)
+
+    mockAnalyzer.reset_mock()
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("0 reports successfully created\n", result.output)
+    self.assertEqual(0, mockAnalyzer.call_count)
+
+  def test_out_of_date_reports_are_recreated(self):
+    runcmd(self, slm.cli, "frotz", "create-reports")
+
+    # Edith moves a license to a different category, so the existing
+    # reports no longer match the catalog and are recreated without -f
+    result = runcmd(self, slm.cli, "frotz", "edit-license", "BSD-2-Clause",
+      "--new-cat", "Other")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("4 reports successfully created\n", result.output)
+
+    # and after that, they are up to date again
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual("0 reports successfully created\n", result.output)
+
+  def test_reports_created_by_hand_are_not_replaced(self):
+    # Edith already made one report herself; create-reports leaves it alone
+    reportsDir = os.path.join(self.slmhome, "projects", "frotz",
+      "subprojects", "frotz-dim", "reports")
+    reportPath = os.path.join(reportsDir, "frotz-dim-2018-02-06.json")
+    with open(reportPath, "w") as f:
+      f.write("[]")
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual("3 reports successfully created\n", result.output)
+    with open(reportPath, "r") as f:
+      self.assertEqual("[]", f.read())
+
+  def test_can_make_reports_for_one_subproject(self):
+    result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-dim",
+      "create-reports")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("2 reports successfully created\n", result.output)
+    self.assertFalse(os.path.exists(os.path.join(self.slmhome, "projects",
+      "frotz", "subprojects", "frotz-nuclear", "reports",
+      "frotz-nuclear-2018-01-26.json")))
+
+  def test_cannot_make_reports_for_unknown_subproject(self):
+    result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-bright",
+      "create-reports")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Subproject 'frotz-bright' does not exist.\n",
+      result.output)
+
+  def test_can_make_reports_since_a_month(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--since",
+      "2018-02")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("2 reports successfully created\n", result.output)
+    p = os.path.join("projects", "frotz", "subprojects", "frotz-dim",
+      "reports", "frotz-dim-2018-02-06.xlsx")
+    checkForFileExists(self, self.slmhome, p)
+
+  def test_can_make_reports_since_a_month_without_leading_zero(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--since",
+      "2018-1")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("4 reports successfully created\n", result.output)
+
+  def test_cannot_make_reports_since_invalid_month(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--since",
+      "2018-13")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Invalid format for --since argument (2018-13): should be --since YYYY-MM\n", result.output)
+
+  def test_can_show_timings_for_each_stage(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports", "--timings")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual("4 reports successfully created", lines[0])
+    self.assertRegex(lines[1],
+      r"^Timings: analysis \d+\.\d\ds, render \d+\.\d\ds, write \d+\.\d\ds, total \d+\.\d\ds$")
+
+  @mock.patch('slm.reports.common._isProcessRunning', return_value=False)
+  def test_reports_left_half_written_are_cleaned_up(self, running_mock):
+    # an earlier run was killed while writing a report, leaving only a
+    # temporary file; the report itself was never created
+    reportsDir = os.path.join(self.slmhome, "projects", "frotz", "subprojects",
+      "frotz-dim", "reports")
+    orphan = os.path.join(reportsDir, ".frotz-dim-2018-02-06.json.99999.abc123.slm-tmp")
+    with open(orphan, "w") as f:
+      f.write('[{"name": "Project Lic')
+
+    # Edith reruns create-reports, which cleans it up and creates the report
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual("4 reports successfully created\n", result.output)
+    self.assertFalse(os.path.exists(orphan))
+    with open(os.path.join(reportsDir, "frotz-dim-2018-02-06.json"), "r") as f:
+      self.assertEqual("Project Licenses", json.load(f)[0]["name"])
+
+  def test_cannot_make_all_reports_in_unknown_format(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports",
+      "--report_formats", "xlsx,pdf")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Unknown report format: pdf\n", result.output)
@@ -375,6 +375,41 @@ class XlsxReportFuncTestSuite(unittest.TestCase):
     self.assertEqual("simple/vendor/file3.txt", ws2['A5'].value)
     self.assertEqual("No license found - third party directory", ws2['B5'].value)
 
+  def test_streamed_report_matches_regular_report(self):
+    # Edith has some very large scans, so she wants to try streaming files
+    # from the database while the report is written. She first makes sure
+    # it gives the same results, with third party directories labeled
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "analyze-thirdparty", "yes")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "analyze-thirdparty-dirs", "vendor;thirdparty")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-dim",
+      "import-scan", PATH_SIMPLE_THIRDPARTY_SPDX, "--scan_date", "2017-05-05",
+      "--desc", "frotz-dim scan to exclude thirdparty dirs")
+    self.assertEqual(0, result.exit_code)
+
+    # She creates the report both ways
+    paths = []
+    for name, extra in [("regular", []), ("streamed", ["--streaming"])]:
+      reportPath = self.reportDir.path + f"/{name}.xlsx"
+      result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-dim",
+        "create-report", "--scan_id", "3", "--report_format", "xlsx",
+        "--report_path", reportPath, *extra)
+      self.assertEqual(0, result.exit_code)
+      self.assertEqual(f"Report successfully created at {reportPath}.\n", result.output)
+      paths.append(reportPath)
+
+    # and every sheet has the same contents
+    wbRegular = load_workbook(filename=paths[0])
+    wbStreamed = load_workbook(filename=paths[1])
+    self.assertEqual(wbRegular.sheetnames, wbStreamed.sheetnames)
+    for name in wbRegular.sheetnames:
+      rowsRegular = [[c.value for c in r] for r in wbRegular[name].iter_rows()]
+      rowsStreamed = [[c.value for c in r] for r in wbStreamed[name].iter_rows()]
+      self.assertEqual(rowsRegular, rowsStreamed)
+
   def test_can_configure_to_strip_licenseref_prefixes_in_xlsx_report(self):
     # Edith configures the project so that licenses beginning with "LicenseRef-"
     # will have that prefix stripped from the xlsx report
@@ -478,6 +513,92 @@ class XlsxReportFuncTestSuite(unittest.TestCase):
     self.assertTrue(scan_1)
     self.assertTrue(scan_3)
 
+  def test_can_roll_up_directories_in_report(self):
+    # Edith wants a shorter xlsx report, with each directory whose files all
+    # have the same license listed as a single row
+    reportPath = self.reportDir.path + "/report.xlsx"
+    result = runcmd(self, slm.cli, "frotz", "create-report", "--scan_id", "2",
+      "--report_format", "xlsx", "--report_path", reportPath, "--rollup")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(f"Report successfully created at {reportPath}.\n", result.output)
+
+    # Looking inside the workbook, she sees that the test files directory
+    # is now one row, with the number of files it stands for
+    wb = load_workbook(filename=reportPath)
+    ws = wb["Other"]
+    self.assertEqual("# of files", ws['C1'].value)
+    self.assertEqual("spdxLicenseManager-master/tests/testfiles/**", ws['A2'].value)
+    self.assertEqual("CC0-1.0", ws['B2'].value)
+    self.assertEqual(11, ws['C2'].value)
+
+    # but the summary still counts every file
+    wsSummary = wb["License summary"]
+    totals = [row for row in wsSummary.iter_rows() if row[0].value == "TOTAL"]
+    self.assertEqual(1, len(totals))
+    self.assertEqual(76, totals[0][2].value)
+
+  def test_streamed_rolled_up_report_matches_regular_one(self):
+    # Edith asks for a rolled-up report with streaming too, for a scan with
+    # files with no license in third party directories
+    self._importThirdpartyScan()
+
+    # and gets the same report as without streaming
+    self._checkStreamedReportMatchesRegularOne(["--rollup"])
+
+  def test_streamed_report_rolled_up_by_config_matches_regular_one(self):
+    # Edith sets the project to always roll up directories, and asks for a
+    # streamed report for a scan with files in third party directories
+    self._importThirdpartyScan()
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "report-rollup-dirs", "yes")
+    self.assertEqual(0, result.exit_code)
+
+    # and gets the same report as without streaming
+    self._checkStreamedReportMatchesRegularOne([])
+
+  def _importThirdpartyScan(self):
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "analyze-thirdparty", "yes")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "analyze-thirdparty-dirs", "vendor;thirdparty")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-dim",
+      "import-scan", PATH_SIMPLE_THIRDPARTY_SPDX, "--scan_date", "2017-05-05",
+      "--desc", "frotz-dim scan to exclude thirdparty dirs")
+    self.assertEqual(0, result.exit_code)
+
+  def _checkStreamedReportMatchesRegularOne(self, rollupArgs):
+    paths = []
+    for name, extra in [("regular", []), ("streamed", ["--streaming"])]:
+      reportPath = self.reportDir.path + f"/{name}.xlsx"
+      result = runcmd(self, slm.cli, "frotz", "create-report", "--scan_id",
+        "3", "--report_format", "xlsx", "--report_path", reportPath,
+        *rollupArgs, *extra)
+      self.assertEqual(0, result.exit_code)
+      paths.append(reportPath)
+
+    wbRegular = load_workbook(filename=paths[0])
+    wbStreamed = load_workbook(filename=paths[1])
+    self.assertEqual(wbRegular.sheetnames, wbStreamed.sheetnames)
+    for name in wbRegular.sheetnames:
+      rowsRegular = [[c.value for c in r] for r in wbRegular[name].iter_rows()]
+      rowsStreamed = [[c.value for c in r] for r in wbStreamed[name].iter_rows()]
+      self.assertEqual(rowsRegular, rowsStreamed)
+    # and the rolled-up listing isn't empty
+    self.assertGreater(wbRegular["Attribution"].max_row, 1)
+
+  def test_cannot_roll_up_directories_in_csv_report(self):
+    # Edith tries to roll up directories in a CSV report
+    reportPath = self.reportDir.path + "/report.csv"
+    result = runcmd(self, slm.cli, "frotz", "create-report", "--scan_id", "2",
+      "--report_format", "csv", "--report_path", reportPath, "--rollup")
+
+    # but it fails, because only xlsx and json reports can be rolled up
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Directory roll-up is only available for xlsx and json reports.\n", result.output)
+    self.assertFalse(os.path.isfile(reportPath))
+
   # def test_can_create_report_for_multiple_scans_with_renamed_paths(self):
   #   # Same as prior test, but this time Edith wants to add a prefix before
   #   # all paths in scan 1
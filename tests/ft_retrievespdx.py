@@ -21,12 +21,16 @@
 import unittest
 import click
 from click.testing import CliRunner
+import errno
 import os
 import shutil
+import tarfile
+from unittest import mock
 
 from testfixtures import TempDirectory
 
 from slm import slm
+from slm.retriever import RetrieverCopyError
 
 from helper_sandbox import (setUpSandbox, runSandboxCommands, tearDownSandbox,
   runcmd, printResultDebug)
@@ -158,3 +162,175 @@ class SPDXRetrieveFuncTestSuite(unittest.TestCase):
     self.assertTrue(os.path.isfile(filePath))
     filePath = os.path.join(self.spdxSearchDir.path, SPDX_NO_DATE)
     self.assertTrue(os.path.isfile(filePath))
+
+  def test_can_retrieve_spdx_files_from_nested_directories_and_archives(self):
+    # Edith's scanner farm now delivers each day's scans in its own
+    # directory, bundled into an archive
+    dayDir = os.path.join(self.spdxSearchDir.path, "2018-03-21")
+    os.makedirs(dayDir)
+    archivePath = os.path.join(dayDir, "batch.tar.gz")
+    with tarfile.open(archivePath, "w:gz") as tar:
+      tar.add(os.path.join(self.spdxSearchDir.path, SPDX_CORRECT_FILE),
+        arcname=f"scans/{SPDX_CORRECT_FILE}")
+    os.remove(os.path.join(self.spdxSearchDir.path, SPDX_CORRECT_FILE))
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "spdx-search-dir", self.spdxSearchDir.path)
+    self.assertEqual(0, result.exit_code)
+
+    # Without asking for it, SLM doesn't look inside subdirectories
+    result = runcmd(self, slm.cli, "frotz", "retrieve-spdx",
+      "--month", "2018-03")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("", result.output)
+
+    # but she asks SLM to search subdirectories and archives
+    result = runcmd(self, slm.cli, "frotz", "retrieve-spdx",
+      "--month", "2018-03", "--recursive", "--archives")
+
+    # It works and lets her know
+    self.assertEqual(0, result.exit_code)
+    newName = "frotz-dim-2018-03-21.spdx"
+    self.assertEqual(f"Extracted {SPDX_CORRECT_FILE} from batch.tar.gz to frotz-dim (new name: {newName})\n", result.output)
+
+    # She sees that the file is now present in the subproject's SPDX folder,
+    # and that the archive is still where it was
+    filePath = os.path.join(self.slmhome, "projects", "frotz",
+      "subprojects", "frotz-dim", "spdx", newName)
+    self.assertTrue(os.path.isfile(filePath))
+    self.assertTrue(os.path.isfile(archivePath))
+
+  def test_cannot_retrieve_spdx_files_with_negative_max_depth(self):
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "spdx-search-dir", self.spdxSearchDir.path)
+    self.assertEqual(0, result.exit_code)
+
+    result = runcmd(self, slm.cli, "frotz", "retrieve-spdx",
+      "--month", "2018-03", "--max_depth", "-1")
+
+    # It fails and explains why
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual(f"Invalid --max_depth argument (-1): must be 0 or more\n", result.output)
+
+  def test_can_retrieve_and_import_spdx_files_in_one_step(self):
+    # Edith wants to retrieve this month's SPDX files and import them as
+    # scans in one step. One of them turns out not to be a valid SPDX file
+    with open(os.path.join(self.spdxSearchDir.path,
+        "SPDX2TV_frotz-nuclear-2018-03-22.spdx"), "w") as f:
+      f.write("this is not\nan SPDX file\n")
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "spdx-search-dir", self.spdxSearchDir.path)
+    self.assertEqual(0, result.exit_code)
+
+    result = runcmd(self, slm.cli, "frotz", "retrieve-and-import",
+      "--month", "2018-03", "--jobs", "2")
+
+    # Both files are retrieved, and the valid one is imported; she is told
+    # which one could not be imported
+    self.assertEqual(1, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertIn(f"Moved {SPDX_CORRECT_FILE} to frotz-dim (new name: frotz-dim-2018-03-21.spdx)", lines)
+    self.assertIn(f"Moved SPDX2TV_frotz-nuclear-2018-03-22.spdx to frotz-nuclear (new name: frotz-nuclear-2018-03-22.spdx)", lines)
+    self.assertIn("Imported 91 files from frotz-dim-2018-03-21.spdx to frotz-dim (scan ID 3)", lines)
+    errors = [line for line in lines if line.startswith("Error importing frotz-nuclear-2018-03-22.spdx to frotz-nuclear: ")]
+    self.assertEqual(1, len(errors))
+    self.assertEqual("1 of 2 retrieved files could not be imported; fix the errors above and import them with 'slm import-scan'.", lines[-1])
+
+    # The new scan is dated from the file's name
+    result = runcmd(self, slm.cli, "frotz", "list-scans")
+    self.assertIn("3   frotz-dim      2018-03-21  retrieved from "
+      f"{SPDX_CORRECT_FILE}", result.output)
+
+  def test_cannot_retrieve_and_import_with_zero_jobs(self):
+    result = runcmd(self, slm.cli, "frotz", "retrieve-and-import",
+      "--month", "2018-03", "--jobs", "0")
+
+    # It fails and explains why
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Number of jobs must be at least 1, got 0\n", result.output)
+
+  def test_can_watch_for_new_spdx_files(self):
+    # Edith wants SLM to keep retrieving and importing new SPDX files as
+    # they arrive, and to create reports for them
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "spdx-search-dir", self.spdxSearchDir.path)
+    self.assertEqual(0, result.exit_code)
+
+    # She first checks once, without a project, so every project is watched
+    result = runcmd(self, slm.cli, None, "watch", "--once", "--settle", "0",
+      "--reports")
+
+    # The new file is retrieved, imported and reported on
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(
+      f"frotz: Retrieved {SPDX_CORRECT_FILE} to frotz-dim (new name: frotz-dim-2018-03-21.spdx)\n"
+      "frotz: Imported 91 files from frotz-dim-2018-03-21.spdx to frotz-dim (scan ID 3)\n"
+      "frotz: Created report frotz-dim-2018-03-21.xlsx\n"
+      "frotz: Created report frotz-dim-2018-03-21.json\n", result.output)
+    reportsDir = os.path.join(self.slmhome, "projects", "frotz",
+      "subprojects", "frotz-dim", "reports")
+    self.assertTrue(os.path.isfile(os.path.join(reportsDir,
+      "frotz-dim-2018-03-21.json")))
+
+    # Then she leaves it watching; the files that were not retrieved before
+    # are not handled again, until she stops it
+    with mock.patch("slm.commands.cmdWatch.time.sleep",
+        side_effect=KeyboardInterrupt) as sleep_mock:
+      result = runcmd(self, slm.cli, "frotz", "watch", "--settle", "0",
+        "--interval", "5")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("Stopped watching.\n", result.output)
+    sleep_mock.assert_called_with(5)
+
+  def test_retrieval_fails_if_copy_from_another_filesystem_fails(self):
+    # Edith's network share corrupts a file on its way across
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "spdx-search-dir", self.spdxSearchDir.path)
+    self.assertEqual(0, result.exit_code)
+    srcPath = os.path.join(self.spdxSearchDir.path, SPDX_CORRECT_FILE)
+    with mock.patch("slm.retriever.os.rename",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+      with mock.patch("slm.retriever.Retriever._copyVerified",
+          side_effect=RetrieverCopyError(f"copy of {srcPath} did not match the original")):
+        result = runcmd(self, slm.cli, "frotz", "retrieve-spdx",
+          "--month", "2018-03")
+
+    # It fails, and tells her why
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual([
+      f"Cannot move to project frotz-dim (copy of {srcPath} did not match the original)",
+      "1 SPDX files could not be copied or extracted into their subprojects; see the errors above.",
+    ], result.output.splitlines())
+
+    # and the file is left in the search directory
+    self.assertTrue(os.path.isfile(srcPath))
+
+  def test_cannot_watch_with_invalid_interval(self):
+    result = runcmd(self, slm.cli, "frotz", "watch", "--interval", "0")
+
+    # It fails and explains why
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Invalid --interval argument (0): must be more than 0\n", result.output)
+
+  def test_retrieval_from_another_filesystem_copies_and_reports_speed(self):
+    # Edith's SPDX search directory is on a network share, so the files
+    # can't just be renamed into the subproject folder
+    result = runcmd(self, slm.cli, "frotz", "set-config",
+      "spdx-search-dir", self.spdxSearchDir.path)
+    self.assertEqual(0, result.exit_code)
+    with mock.patch("slm.retriever.os.rename",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+      result = runcmd(self, slm.cli, "frotz", "retrieve-spdx",
+        "--month", "2018-03", "--copy_workers", "2")
+
+    # It works, and tells her how much was copied and how fast
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual(f"Moved {SPDX_CORRECT_FILE} to frotz-dim (new name: frotz-dim-2018-03-21.spdx)", lines[0])
+    self.assertRegex(lines[1], r"^Copied 1 files across filesystems \([0-9.]+ MB in [0-9.]+s, [0-9.]+ MB/s\)$")
+
+    # The file was copied into place and removed from the search directory
+    filePath = os.path.join(self.slmhome, "projects", "frotz",
+      "subprojects", "frotz-dim", "spdx", "frotz-dim-2018-03-21.spdx")
+    self.assertTrue(os.path.isfile(filePath))
+    self.assertFalse(os.path.isfile(os.path.join(self.spdxSearchDir.path,
+      SPDX_CORRECT_FILE)))
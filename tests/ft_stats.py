@@ -0,0 +1,108 @@
+# tests/ft_stats.py
+#
+# Functional tests for spdxLicenseManager: getting file counts by license
+# across one or more scans.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sqlite3
+import unittest
+import click
+from click.testing import CliRunner
+
+from slm import slm
+
+from helper_sandbox import (setUpSandbox, runSandboxCommands, tearDownSandbox,
+  runcmd, printResultDebug)
+
+class StatsFuncTestSuite(unittest.TestCase):
+  """spdxLicenseManager stats FT suite."""
+
+  def setUp(self):
+    self.runner = CliRunner()
+    setUpSandbox(self, slm.cli)
+    runSandboxCommands(self, slm.cli)
+
+  def tearDown(self):
+    tearDownSandbox(self)
+
+  def test_can_get_stats_for_all_scans(self):
+    # Edith wants to know how many files there are for each license, across
+    # all of the project's scans
+    result = runcmd(self, slm.cli, "frotz", "stats")
+
+    # It works, and the licenses are listed in category order, with totals
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(f"""\
+File counts for scans: 1, 2
+
+Category          License             Files
+----------------  ----------------  -------
+Project Licenses  Apache-2.0            109
+Project Licenses  CC-BY-4.0               4
+Other             CC0-1.0                11
+No license found  No license found        6
+TOTAL                                   130
+""", result.output)
+
+  def test_can_get_stats_for_one_scan(self):
+    # Edith just wants stats for the frotz-dim scan
+    result = runcmd(self, slm.cli, "frotz", "stats", "--scan_id", "2")
+
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual("File counts for scans: 2", lines[0])
+    self.assertEqual(["TOTAL", "76"], lines[-1].split())
+
+  def test_stats_includes_findings_if_configured(self):
+    # Edith turns on empty file analysis, and asks for stats again
+    runcmd(self, slm.cli, "frotz", "set-config", "analyze-emptyfile", "yes")
+    result = runcmd(self, slm.cli, "frotz", "stats", "--scan_ids", "1-2")
+
+    # there's now a column for empty files
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertIn("Empty files", lines[2])
+
+  def test_cannot_get_stats_for_unknown_scan(self):
+    result = runcmd(self, slm.cli, "frotz", "stats", "--scan_id", "9")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Scan ID 9 does not exist.\n", result.output)
+
+  def test_stats_adds_missing_index_to_older_database(self):
+    # Edith's project database was created before the files index existed
+    dbPath = os.path.join(self.slmhome, "projects", "frotz", "frotz.db")
+    conn = sqlite3.connect(dbPath)
+    conn.execute("DROP INDEX ix_files_scan_id_path")
+    conn.commit()
+    conn.close()
+
+    # commands that don't query files leave it alone
+    result = runcmd(self, slm.cli, "frotz", "list-scans")
+    self.assertEqual(0, result.exit_code)
+    self.assertNotIn("Adding missing indexes", result.output)
+
+    # but asking for stats adds it, and says so first
+    result = runcmd(self, slm.cli, "frotz", "stats", "--scan_id", "2")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual("Adding missing indexes to the project database (ix_files_scan_id_path); this may take a while for large projects.", lines[0])
+    self.assertEqual("File counts for scans: 2", lines[1])
+
+    # and only the first time
+    result = runcmd(self, slm.cli, "frotz", "stats", "--scan_id", "2")
+    self.assertEqual("File counts for scans: 2", result.output.splitlines()[0])
@@ -21,6 +21,7 @@
 import unittest
 import click
 from click.testing import CliRunner
+import json
 import os
 import shutil
 
@@ -96,3 +97,161 @@ class StatusFuncTestSuite(unittest.TestCase):
     # And the others should still be 0
     self.assertEqual(lines[5].count("*"), 0)
     self.assertEqual(lines[6].count("*"), 0)
+
+  def test_can_get_status_for_range_of_months(self):
+    # Edith is doing a yearly audit, and wants one grid of the status of
+    # every subproject for each month
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, None, "status", "--from", "2017-12",
+      "--to", "2018-02")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+
+    # The range and a legend come first, then a blank line, headers,
+    # header line and one line for each of three subprojects
+    self.assertEqual(len(lines), 8)
+    self.assertEqual(lines[0], "Months: 2017-12 to 2018-02")
+    self.assertEqual(lines[1], "S = SPDX, C = Scan, J = JSON, X = XLSX")
+    self.assertEqual(lines[3].split(),
+      ["Project", "Subproject", "2017-12", "2018-01", "2018-02"])
+
+    # Each month's cell has a letter for each item present
+    self.assertEqual(lines[5].split(),
+      ["frotz", "frotz-dim", "----", "----", "-CJX"])
+    self.assertEqual(lines[6].split(),
+      ["frotz", "frotz-nuclear", "----", "-CJX", "----"])
+    self.assertEqual(lines[7].split(),
+      ["frotz", "frotz-shiny", "----", "----", "----"])
+
+  def test_can_get_status_for_month_without_leading_zero(self):
+    # Edith leaves out the leading zero of the month
+    result = runcmd(self, slm.cli, None, "status", "2018-1")
+
+    # and still gets the status for Jan. 2018, with the frotz-nuclear scan
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual(lines[0], "Month: 2018-01")
+    self.assertIn("frotz-nuclear", lines[5])
+    self.assertEqual(lines[5].count("*"), 1)
+
+  def test_cannot_get_status_for_invalid_month(self):
+    result = runcmd(self, slm.cli, None, "status", "bogus",
+      "--fail-on-missing")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual(result.output, "Months must be in the form YYYY-MM\n")
+
+  def test_cannot_get_status_for_reversed_range_of_months(self):
+    result = runcmd(self, slm.cli, None, "status", "--from", "2018-02",
+      "--to", "2018-01")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual(result.output, "2018-01 is before 2018-02\n")
+
+  def test_cannot_get_status_with_both_month_and_range(self):
+    result = runcmd(self, slm.cli, None, "status", "2018-02", "--from",
+      "2018-01", "--to", "2018-02")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual(result.output,
+      "Cannot give both a month and --from / --to.\n")
+
+  def test_can_get_status_as_json(self):
+    # Edith's monitoring wants status it can read without parsing a table
+    result = runcmd(self, slm.cli, None, "status", "--from", "2018-01",
+      "--to", "2018-02", "--format", "json")
+    self.assertEqual(0, result.exit_code)
+    status = json.loads(result.output)
+    self.assertEqual(status["months"], ["2018-01", "2018-02"])
+    self.assertEqual(len(status["subprojects"]), 3)
+    dim = status["subprojects"][0]
+    self.assertEqual(dim["project"], "frotz")
+    self.assertEqual(dim["subproject"], "frotz-dim")
+    self.assertEqual(dim["months"]["2018-02"],
+      {"spdx": False, "scan": True, "json": False, "xlsx": False})
+    self.assertEqual(dim["months"]["2018-01"],
+      {"spdx": False, "scan": False, "json": False, "xlsx": False})
+
+  def test_can_get_status_as_csv(self):
+    result = runcmd(self, slm.cli, None, "status", "2018-02", "--format",
+      "csv")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(result.output.splitlines(), [
+      "project,subproject,month,spdx,scan,json,xlsx",
+      "frotz,frotz-dim,2018-02,no,yes,no,no",
+      "frotz,frotz-nuclear,2018-02,no,no,no,no",
+      "frotz,frotz-shiny,2018-02,no,no,no,no",
+    ])
+
+  def test_cannot_get_status_in_unknown_format(self):
+    result = runcmd(self, slm.cli, None, "status", "2018-02", "--format",
+      "xml")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual(result.output, "Unknown status format: xml\n")
+
+  def test_status_fails_on_missing_items_only_if_requested(self):
+    # Without the flag, missing items are just shown
+    result = runcmd(self, slm.cli, None, "status", "2018-02", "--format",
+      "csv")
+    self.assertEqual(0, result.exit_code)
+
+    # With it, the status is still output, followed by an error
+    result = runcmd(self, slm.cli, None, "status", "2018-02", "--format",
+      "csv", "--fail-on-missing")
+    self.assertEqual(1, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual(len(lines), 5)
+    self.assertEqual(lines[4],
+      "3 of 3 subproject months are missing an SPDX file, scan or report.")
+
+  def test_status_index_is_updated_by_commands(self):
+    # Edith checks status, which builds the status index
+    result = runcmd(self, slm.cli, None, "status", "2018-02")
+    self.assertEqual(0, result.exit_code)
+    self.assertTrue(os.path.isfile(os.path.join(self.slmhome,
+      "slm-status.db")))
+
+    # She then creates reports, and status shows them without a rebuild
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, None, "status", "2018-02")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertIn("frotz-dim", lines[4])
+    self.assertEqual(lines[4].count("*"), 3)
+
+    # An imported scan shows up too
+    result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-shiny",
+      "import-scan", "tests/testfiles/slm-2018-02-06.spdx", "--scan_date",
+      "2018-02-20", "--desc", "frotz-shiny scan")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, None, "status", "2018-02")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertIn("frotz-shiny", lines[6])
+    self.assertEqual(lines[6].count("*"), 1)
+
+    # And so does a new subproject
+    result = runcmd(self, slm.cli, "frotz", "create-subproject", "frotz-zz")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, None, "status", "2018-02")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual(len(lines), 8)
+    self.assertEqual(lines[7].split(), ["frotz", "frotz-zz"])
+
+  def test_can_rebuild_status_index_to_match_disk(self):
+    result = runcmd(self, slm.cli, "frotz", "create-reports")
+    self.assertEqual(0, result.exit_code)
+    result = runcmd(self, slm.cli, None, "status", "2018-02")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(result.output.splitlines()[4].count("*"), 3)
+
+    # Edith deletes a report by hand, which the index doesn't see
+    os.remove(os.path.join(self.slmhome, "projects", "frotz", "subprojects",
+      "frotz-dim", "reports", "frotz-dim-2018-02-06.json"))
+    result = runcmd(self, slm.cli, None, "status", "2018-02")
+    self.assertEqual(result.output.splitlines()[4].count("*"), 3)
+
+    # until she rebuilds it
+    result = runcmd(self, slm.cli, None, "status", "2018-02", "--rebuild")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(result.output.splitlines()[4].count("*"), 2)
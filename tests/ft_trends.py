@@ -0,0 +1,96 @@
+# tests/ft_trends.py
+#
+# Functional tests for spdxLicenseManager: getting file counts by license
+# for each month.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import click
+from click.testing import CliRunner
+
+from slm import slm
+
+from helper_sandbox import (setUpSandbox, runSandboxCommands, tearDownSandbox,
+  runcmd, printResultDebug)
+
+class TrendsFuncTestSuite(unittest.TestCase):
+  """spdxLicenseManager license trends FT suite."""
+
+  def setUp(self):
+    self.runner = CliRunner()
+    setUpSandbox(self, slm.cli)
+    runSandboxCommands(self, slm.cli)
+
+  def tearDown(self):
+    tearDownSandbox(self)
+
+  def test_can_get_trends_for_whole_project(self):
+    # Edith wants to see how license counts have moved from month to month
+    # across the whole frotz project
+    result = runcmd(self, slm.cli, "frotz", "trends")
+
+    # She sees one column per month, with categories and their licenses
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual(f"""\
+License trends for project frotz
+
+Category          License             2018-01    2018-02
+----------------  ----------------  ---------  ---------
+Project Licenses                           51         62
+                  Apache-2.0               49         60
+                  CC-BY-4.0                 2          2
+Other                                       0         11
+                  CC0-1.0                   0         11
+No license found                            3          3
+                  No license found          3          3
+TOTAL                                      54         76
+""", result.output)
+
+  def test_can_get_trends_for_one_subproject_and_month_range(self):
+    result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-nuclear",
+      "trends", "--from", "2017-06", "--to", "2018-01")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual("License trends for subproject frotz-nuclear", lines[0])
+    self.assertEqual(["Category", "License", "2018-01"], lines[2].split())
+    self.assertEqual(["TOTAL", "54"], lines[-1].split())
+
+  def test_can_get_trends_for_months_without_leading_zeros(self):
+    result = runcmd(self, slm.cli, "frotz", "trends", "--from", "2018-1",
+      "--to", "2018-1")
+    self.assertEqual(0, result.exit_code)
+    lines = result.output.splitlines()
+    self.assertEqual(["Category", "License", "2018-01"], lines[2].split())
+    self.assertEqual(["TOTAL", "54"], lines[-1].split())
+
+  def test_trends_with_no_scans_in_range(self):
+    result = runcmd(self, slm.cli, "frotz", "trends", "--from", "2019-01")
+    self.assertEqual(0, result.exit_code)
+    self.assertEqual("License trends for project frotz\n\nNo scans found.\n",
+      result.output)
+
+  def test_cannot_get_trends_with_invalid_month(self):
+    result = runcmd(self, slm.cli, "frotz", "trends", "--to", "2018")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Invalid format for --to argument (2018): should be --to YYYY-MM\n", result.output)
+
+  def test_cannot_get_trends_for_unknown_subproject(self):
+    result = runcmd(self, slm.cli, "frotz", "--subproject", "frotz-bright",
+      "trends")
+    self.assertEqual(1, result.exit_code)
+    self.assertEqual("Subproject 'frotz-bright' does not exist.\n",
+      result.output)
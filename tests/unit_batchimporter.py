@@ -0,0 +1,120 @@
+# tests/unit_batchimporter.py
+#
+# Unit test for spdxLicenseManager: importing SPDX files in batches.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+import unittest
+
+from slm.batchImporter import (BatchImporter, BatchImportError,
+  importFileDataList, parseSPDXFile)
+from slm.datatypes import Category, License
+from slm.projectdb import ProjectDB
+
+PATH_ALL_KNOWN = "tests/testfiles/simpleAllKnown.spdx"
+PATH_TWO_UNKNOWN = "tests/testfiles/simpleTwoUnknown.spdx"
+PATH_BROKEN_READING = "tests/testfiles/brokenReadingNoColon.spdx"
+PATH_NO_FILE_DATA = "tests/testfiles/brokenImportingNoFileData.spdx"
+
+class BatchImporterTestSuite(unittest.TestCase):
+  """spdxLicenseManager batch SPDX importer unit test suite."""
+
+  def setUp(self):
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+
+    # insert sample data
+    self.db.session.add(Category(_id=1, name="a category", order=1))
+    self.db.session.add(License(_id=1, name="BSD-2-Clause", category_id=1))
+    self.db.session.add(License(_id=2, name="MIT", category_id=1))
+    self.db.session.commit()
+    self.db.addSubproject("sub1", "subproject 1")
+
+  def tearDown(self):
+    self.db.closeDB()
+    self.db = None
+
+  ##### Test cases below
+
+  def test_can_parse_spdx_file(self):
+    fdList = parseSPDXFile(PATH_ALL_KNOWN)
+    self.assertEqual(4, len(fdList))
+
+  def test_parse_raises_error_with_reason(self):
+    with self.assertRaises(BatchImportError) as cm:
+      parseSPDXFile("tests/testfiles/nonexistent.spdx")
+    self.assertEqual("File not found: tests/testfiles/nonexistent.spdx",
+      cm.exception.message)
+    with self.assertRaises(BatchImportError) as cm:
+      parseSPDXFile(PATH_BROKEN_READING)
+    self.assertTrue(cm.exception.message.startswith(f"Error reading {PATH_BROKEN_READING}: "))
+    with self.assertRaises(BatchImportError) as cm:
+      parseSPDXFile(PATH_NO_FILE_DATA)
+    self.assertEqual(f"Error parsing {PATH_NO_FILE_DATA}: No file data found",
+      cm.exception.message)
+
+  def test_can_import_file_data_list_as_new_scan(self):
+    fdList = parseSPDXFile(PATH_ALL_KNOWN)
+    scan_id, count = importFileDataList(self.db, fdList, "sub1", "2018-03-21",
+      "desc")
+    self.assertEqual(4, count)
+    scan = self.db.getScan(_id=scan_id)
+    self.assertEqual("2018-03-21", scan.scan_dt.strftime("%Y-%m-%d"))
+    self.assertEqual(4, len(self.db.getFiles(scan_id=scan_id)))
+
+  def test_failed_import_leaves_no_scan_behind(self):
+    fdList = parseSPDXFile(PATH_TWO_UNKNOWN)
+    with self.assertRaises(BatchImportError) as cm:
+      importFileDataList(self.db, fdList, "sub1", "2018-03-21", "desc")
+    self.assertIn("The following unknown licenses were detected", cm.exception.message)
+    fdList = parseSPDXFile(PATH_ALL_KNOWN)
+    with self.assertRaises(BatchImportError) as cm:
+      importFileDataList(self.db, fdList, "sub1", "2018-03-40", "desc")
+    self.assertEqual("Scan date must be in format YYYY-MM-DD", cm.exception.message)
+    self.assertEqual([], self.db.getScansAll())
+
+  def test_batch_import_reports_each_file_in_order(self):
+    tasks = [
+      ("sub1", PATH_ALL_KNOWN, "2018-03-01", "first"),
+      ("sub1", PATH_TWO_UNKNOWN, "2018-03-02", "second"),
+      ("sub1", PATH_ALL_KNOWN, "2018-03-03", "third"),
+    ]
+    outcomes = BatchImporter(db=self.db).run(tasks)
+    self.assertEqual((1, 4, None), outcomes[0])
+    self.assertIsNone(outcomes[1][0])
+    self.assertIn("The following unknown licenses were detected", outcomes[1][2])
+    self.assertEqual((2, 4, None), outcomes[2])
+
+  def test_batch_import_with_jobs_parses_in_worker_processes(self):
+    tasks = [
+      ("sub1", PATH_ALL_KNOWN, "2018-03-01", "first"),
+      ("sub1", PATH_BROKEN_READING, "2018-03-02", "second"),
+      ("sub1", PATH_ALL_KNOWN, "2018-03-03", "third"),
+    ]
+    outcomes = BatchImporter(db=self.db, jobs=2).run(tasks)
+    self.assertEqual((1, 4, None), outcomes[0])
+    self.assertIsNone(outcomes[1][0])
+    self.assertTrue(outcomes[1][2].startswith(f"Error reading {PATH_BROKEN_READING}: "))
+    self.assertEqual((2, 4, None), outcomes[2])
+    self.assertEqual(["first", "third"],
+      [scan.desc for scan in self.db.getScansAll()])
+
+  def test_batch_error_can_be_pickled(self):
+    e = pickle.loads(pickle.dumps(BatchImportError("oops")))
+    self.assertEqual("oops", e.message)
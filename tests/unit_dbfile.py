@@ -245,3 +245,39 @@ class DBFileUnitTestSuite(unittest.TestCase):
     # confirm that we now have seven files
     files = self.db.getFiles(scan_id=1)
     self.assertEqual(len(files), 7)
+
+  def test_can_count_files_by_license_for_scans(self):
+    counts = self.db.getFilesCountByLicense(scan_ids=[1])
+    self.assertEqual({1: 2, 2: 1, 4: 1}, counts)
+
+  def test_file_count_by_license_is_empty_for_scan_with_no_files(self):
+    counts = self.db.getFilesCountByLicense(scan_ids=[2])
+    self.assertEqual({}, counts)
+
+  def test_can_iterate_files_in_report_order(self):
+    rows = list(self.db.iterFilesOrdered(scan_ids=[1]))
+    # category order first, then license name, then path
+    self.assertEqual([3, 2, 1, 4], [row[0] for row in rows])
+    self.assertEqual((4, 1, 4, 1, "/dir/fileA.c", "123456", "789012",
+      "345678"), rows[3])
+
+  def test_iterating_ordered_files_does_not_load_file_objects(self):
+    list(self.db.iterFilesOrdered(scan_ids=[1]))
+    for obj in self.db.session.identity_map.values():
+      self.assertNotIsInstance(obj, File)
+
+  def test_can_iterate_file_paths(self):
+    paths = sorted(self.db.iterFilePaths(scan_ids=[1]))
+    self.assertEqual(["/dir/fileA.c", "/fileA.c", "/fileB.c", "/fileC.c"],
+      paths)
+
+  def test_can_iterate_files_in_one_scan_by_path(self):
+    rows = list(self.db.iterFilesByPath(scan_id=1))
+    self.assertEqual(["/dir/fileA.c", "/fileA.c", "/fileB.c", "/fileC.c"],
+      [row[0] for row in rows])
+    self.assertEqual(("/fileB.c", 2, None, None, None), rows[2])
+
+  def test_can_count_files_by_scan_and_license(self):
+    self.db.addFile(scan_id=3, path="/fileA.c", license_id=2)
+    counts = self.db.getFilesCountByScanAndLicense(scan_ids=[1, 3])
+    self.assertEqual({(1, 1): 2, (1, 2): 1, (1, 4): 1, (3, 2): 1}, counts)
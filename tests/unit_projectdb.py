@@ -18,11 +18,13 @@
 # limitations under the License.
 
 import os
+import sqlite3
 import unittest
 from unittest import mock
+from sqlalchemy.exc import OperationalError
 from testfixtures import TempDirectory
 
-from slm.projectdb import ProjectDB, ProjectDBConfigError
+from slm.projectdb import ProjectDB, ProjectDBConfigError, ProjectDBUpdateError
 from slm.datatypes import Config
 
 class ProjectDBUnitTestSuite(unittest.TestCase):
@@ -80,6 +82,85 @@ class ProjectDBUnitTestSuite(unittest.TestCase):
       self.assertTrue(dbnew.isInitialized())
       dbnew.closeDB()
 
+  def test_can_open_existing_db_read_only(self):
+    with TempDirectory() as td:
+      dbPath = os.path.join(td.path, "tmp.db")
+      dbnew = ProjectDB()
+      dbnew.createDB(dbPath)
+      dbnew.initializeDBTables()
+      dbnew.closeDB()
+      # reopen it read-only; reads work but writes fail
+      dbnew.openDB(dbPath, readonly=True)
+      self.assertTrue(dbnew.isInitialized())
+      self.assertEqual(dbPath, dbnew.pathToDB)
+      with self.assertRaises(OperationalError):
+        dbnew.session.add(Config(key="frotz", value="yes"))
+        dbnew.commit()
+      dbnew.rollback()
+      dbnew.closeDB()
+
+  def test_can_open_db_read_only_with_uri_characters_in_path(self):
+    with TempDirectory() as td:
+      dbPath = os.path.join(td.path, "frotz #1 100%.db")
+      dbnew = ProjectDB()
+      dbnew.createDB(dbPath)
+      dbnew.initializeDBTables()
+      dbnew.closeDB()
+      dbnew.openDB(dbPath, readonly=True)
+      self.assertTrue(dbnew.isInitialized())
+      dbnew.closeDB()
+
+  def _getFileIndexes(self, dbPath):
+    conn = sqlite3.connect(dbPath)
+    try:
+      return [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='files'")]
+    finally:
+      conn.close()
+
+  def test_can_add_missing_file_index_to_older_db(self):
+    with TempDirectory() as td:
+      dbPath = os.path.join(td.path, "tmp.db")
+      dbnew = ProjectDB()
+      dbnew.createDB(dbPath)
+      dbnew.initializeDBTables()
+      dbnew.closeDB()
+      # drop the index, as if the database predated it
+      conn = sqlite3.connect(dbPath)
+      conn.execute("DROP INDEX ix_files_scan_id_path")
+      conn.commit()
+      conn.close()
+
+      # just opening it leaves it alone
+      dbnew.openDB(dbPath)
+      self.assertEqual(["ix_files_scan_id_path"], dbnew.getMissingIndexes())
+      dbnew.closeDB()
+      self.assertNotIn("ix_files_scan_id_path", self._getFileIndexes(dbPath))
+
+      # but it can be added when asked for
+      dbnew.openDB(dbPath)
+      dbnew.addMissingIndexes()
+      self.assertEqual([], dbnew.getMissingIndexes())
+      dbnew.closeDB()
+      self.assertIn("ix_files_scan_id_path", self._getFileIndexes(dbPath))
+
+  def test_cannot_add_missing_file_index_to_read_only_db(self):
+    with TempDirectory() as td:
+      dbPath = os.path.join(td.path, "tmp.db")
+      dbnew = ProjectDB()
+      dbnew.createDB(dbPath)
+      dbnew.initializeDBTables()
+      dbnew.closeDB()
+      conn = sqlite3.connect(dbPath)
+      conn.execute("DROP INDEX ix_files_scan_id_path")
+      conn.commit()
+      conn.close()
+
+      dbnew.openDB(dbPath, readonly=True)
+      with self.assertRaises(ProjectDBUpdateError):
+        dbnew.addMissingIndexes()
+      dbnew.closeDB()
+
   def test_cannot_open_in_memory_db(self):
     dbnew = ProjectDB()
     with self.assertRaises(ProjectDBConfigError):
@@ -27,6 +27,7 @@ from slm.datatypes import Category, File, License, Scan, Subproject
 from slm.projectdb import ProjectDB, ProjectDBQueryError
 from slm.reports.common import ReportAnalysisError
 from slm.reports.analysis import Analyzer
+from slm.reports.results import ResultCategory, ResultFile, ResultLicense
 
 class ReportAnalysisTestSuite(unittest.TestCase):
   """spdxLicenseManager analysis for reporting unit test suite."""
@@ -652,49 +653,183 @@ class ReportAnalysisTestSuite(unittest.TestCase):
     with self.assertRaises(ReportAnalysisError):
       self.analyzer.runAnalysis(scan_id=1, scan_ids=[1,3])
 
-  ##### create list results from OrderedDict results
+  ##### streaming analysis tests
 
-  def test_cannot_get_list_results_before_results_are_generated(self):
+  def test_cannot_iterate_files_before_analysis(self):
     with self.assertRaises(ReportAnalysisError):
-      self.analyzer.getResultsAsList()
+      list(self.analyzer.iterFiles())
+
+  def test_cannot_iterate_files_if_analysis_was_not_streamed(self):
+    self.analyzer.runAnalysis(scan_id=1)
+    with self.assertRaises(ReportAnalysisError):
+      list(self.analyzer.iterFiles())
+
+  def test_streaming_analysis_does_not_load_files(self):
+    results = self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    self.assertTrue(self.analyzer.streaming)
+    for cat in results.values():
+      for lic in cat.licensesSorted.values():
+        self.assertEqual(OrderedDict(), lic.filesSorted)
+
+  def test_streaming_analysis_adds_file_counts(self):
+    results = self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    cat1 = results[1]
+    self.assertEqual(2, cat1.numFiles)
+    self.assertEqual(1, cat1.licensesSorted[1].numFiles)
+    self.assertEqual(1, cat1.licensesSorted[4].numFiles)
+    self.assertTrue(cat1.hasFiles)
+    cat3 = results[3]
+    self.assertEqual(0, cat3.numFiles)
+    self.assertFalse(cat3.hasFiles)
+    cat4 = results[4]
+    self.assertEqual(6, cat4.numFiles)
+    self.assertEqual(0, cat4.licensesSorted[7].numFiles)
+    self.assertFalse(cat4.licensesSorted[7].hasFiles)
+
+  def test_streamed_files_are_in_category_license_path_order(self):
+    self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    streamed = list(self.analyzer.iterFiles())
+    self.assertEqual(11, len(streamed))
+    self.assertEqual([3, 4, 6, 1, 2, 8, 10, 9, 11, 7, 5],
+      [f._id for cat, lic, f in streamed])
+    cat, lic, f = streamed[0]
+    self.assertEqual("cat", cat.name)
+    self.assertEqual("HarshEULA", lic.name)
+    self.assertIsInstance(f, ResultFile)
+    self.assertEqual("/tmp/f3", f.path)
+    self.assertEqual("abcdef", f.sha1)
+
+  def test_streamed_files_for_multiple_scans_are_grouped_by_scan(self):
+    self.analyzer.runAnalysis(scan_ids=[2, 3], streaming=True)
+    streamed = list(self.analyzer.iterFiles())
+    self.assertEqual([23, 24, 33, 34, 21, 31, 22, 32],
+      [f._id for cat, lic, f in streamed])
+
+  def test_streamed_files_get_findings(self):
+    self.db.setConfigValue(key="analyze-extensions", value="yes")
+    self.db.setConfigValue(key="analyze-extensions-list", value="png")
+    self.db.setConfigValue(key="analyze-thirdparty", value="yes")
+    self.db.setConfigValue(key="analyze-thirdparty-dirs", value="vendor")
+    self.db.setConfigValue(key="analyze-emptyfile", value="yes")
+    self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    findings = {f._id: f.findings for cat, lic, f in self.analyzer.iterFiles()}
+    self.assertEqual({}, findings[1])
+    self.assertEqual({"extension": "yes"}, findings[5])
+    self.assertEqual({"thirdparty": "yes"}, findings[6])
+    self.assertEqual({"extension": "yes", "thirdparty": "yes"}, findings[7])
+    self.assertEqual({"emptyfile": "yes"}, findings[8])
+    self.assertEqual({"emptyfile": "yes", "thirdparty": "yes"}, findings[9])
+
+  def test_streaming_analysis_can_exclude_common_path_prefix(self):
+    self.db.setConfigValue(key="analyze-exclude-path-prefix", value="yes")
+    self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    self.assertEqual("/tmp", self.analyzer.streamPrefix)
+    paths = [f.path for cat, lic, f in self.analyzer.iterFiles()]
+    self.assertIn("/f1", paths)
+    self.assertIn("/nolic/vendor/whatever", paths)
+
+  def test_streaming_analysis_can_exclude_empty_cats_and_lics(self):
+    self.db.setConfigValue(key="analyze-exclude-empty-cats-and-lics", value="yes")
+    results = self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    self.assertNotIn(3, results)
+    self.assertNotIn(7, results[4].licensesSorted)
+
+  ##### create shared result model from analysis
+
+  def test_cannot_get_results_before_results_are_generated(self):
+    with self.assertRaises(ReportAnalysisError):
+      self.analyzer.getResults()
 
     self.analyzer._buildScanCategories()
     with self.assertRaises(ReportAnalysisError):
-      self.analyzer.getResultsAsList()
+      self.analyzer.getResults()
 
     self.analyzer._addFiles(scan_id=1)
     with self.assertRaises(ReportAnalysisError):
-      self.analyzer.getResultsAsList()
+      self.analyzer.getResults()
 
-  def test_can_get_list_results_from_OrderedDict_results(self):
+  def test_can_get_result_model_from_analysis(self):
     self.db.setConfigValue(key="analyze-exclude-empty-cats-and-lics", value="yes")
     self.analyzer.runAnalysis(scan_id=1)
 
-    list_results = self.analyzer.getResultsAsList()
+    results = self.analyzer.getResults()
 
-    # check top-level list of categories
+    # check top-level sequence of categories
     # should be sorted by order and should exclude empty categories
-    self.assertIsInstance(list_results, list)
-    self.assertEqual(len(list_results), 3)
-    cat2 = list_results[0]
-    self.assertIsInstance(cat2, Category)
+    self.assertIsInstance(results, tuple)
+    self.assertEqual(len(results), 3)
+    cat2 = results[0]
+    self.assertIsInstance(cat2, ResultCategory)
     self.assertEqual(cat2.name, "cat")
     self.assertEqual(cat2._id, 2)
+    self.assertEqual(cat2.numFiles, 3)
 
     # check licenses within a category
     # should be sorted alphabetically and should exclude empty licenses
-    cat4 = list_results[2]
-    self.assertIsInstance(cat4.licenses, list)
+    cat4 = results[2]
+    self.assertIsInstance(cat4.licenses, tuple)
     self.assertEqual(len(cat4.licenses), 2)
     lic6 = cat4.licenses[0]
-    self.assertIsInstance(lic6, License)
+    self.assertIsInstance(lic6, ResultLicense)
     self.assertEqual(lic6.name, "Also no license found")
     self.assertEqual(lic6._id, 6)
+    self.assertEqual(lic6.numFiles, 5)
 
     # check files within a license
-    self.assertIsInstance(lic6.files, list)
+    self.assertIsInstance(lic6.files, tuple)
     self.assertEqual(len(lic6.files), 5)
-    self.assertIsInstance(lic6.files[0], File)
+    f = lic6.files[0]
+    self.assertIsInstance(f, ResultFile)
+    self.assertEqual(f.license_id, 6)
+
+  @mock.patch('slm.reports.analysis.FileCounter')
+  def test_result_model_counts_come_from_file_counter(self, counter_mock):
+    counts = counter_mock.return_value.countFiles.return_value
+    counts.licenseCounts = {1: 7}
+    counts.categoryCounts = {1: 7}
+    self.analyzer.runAnalysis(scan_id=1)
+    results = self.analyzer.getResults()
+
+    counter_mock.return_value.countFiles.assert_called_once_with(
+      scan_ids=[1], withFindings=False)
+    cat1 = [cat for cat in results if cat._id == 1][0]
+    self.assertEqual(7, cat1.numFiles)
+    lic1 = [lic for lic in cat1.licenses if lic._id == 1][0]
+    self.assertEqual(7, lic1.numFiles)
+    self.assertEqual(1, len(lic1.files))
+
+  def test_result_model_is_only_built_once(self):
+    self.analyzer.runAnalysis(scan_id=1)
+    results = self.analyzer.getResults()
+    self.assertIs(results, self.analyzer.getResults())
+
+  def test_can_get_streamed_result_model_from_analysis(self):
+    self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    results = self.analyzer.getResults()
+
+    self.assertEqual(4, len(results))
+    # counts are available before any files are read
+    self.assertEqual(6, results[3].numFiles)
+    self.assertEqual([1, 1], [lic.numFiles for lic in results[2].licenses])
+
+    # and files are read license by license, in report order
+    paths = []
+    for cat in results:
+      for lic in cat.licenses:
+        for f in lic.files:
+          self.assertEqual(lic._id, f.license_id)
+          paths.append(f.path)
+    self.assertEqual(11, len(paths))
+    self.assertEqual("/tmp/f3", paths[0])
+    self.assertEqual("/tmp/nolic/image.png", paths[-1])
+
+  def test_streamed_result_model_skips_files_of_skipped_licenses(self):
+    self.analyzer.runAnalysis(scan_id=1, streaming=True)
+    results = self.analyzer.getResults()
+    # skip everything until the last category
+    lic5 = results[3].licenses[2]
+    self.assertEqual("No license found", lic5.name)
+    self.assertEqual([5], [f._id for f in lic5.files])
 
   ##### Split string into separate scan IDs
 
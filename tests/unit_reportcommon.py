@@ -0,0 +1,127 @@
+# tests/unit_reportcommon.py
+#
+# Unit test for spdxLicenseManager: common report helpers.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+from unittest import mock
+from testfixtures import TempDirectory
+
+from slm.reports.common import (TEMP_SUFFIX, atomicReportPath,
+  cleanOrphanedTempFiles)
+
+class ReportCommonTestSuite(unittest.TestCase):
+  """spdxLicenseManager common report helpers unit test suite."""
+
+  def setUp(self):
+    self.td = TempDirectory()
+    self.path = os.path.join(self.td.path, "report.json")
+
+  def tearDown(self):
+    self.td.cleanup()
+
+  def _listDir(self):
+    return sorted(os.listdir(self.td.path))
+
+  ##### Atomic write tests
+
+  def test_atomic_write_writes_temp_file_in_same_directory(self):
+    with atomicReportPath(self.path) as tmpPath:
+      self.assertEqual(self.td.path, os.path.dirname(tmpPath))
+      self.assertTrue(os.path.basename(tmpPath).startswith(
+        f".report.json.{os.getpid()}."))
+      self.assertTrue(tmpPath.endswith(TEMP_SUFFIX))
+      with open(tmpPath, "w") as f:
+        f.write("[]")
+      # nothing is at the final path until the write is complete
+      self.assertFalse(os.path.exists(self.path))
+    self.assertEqual(["report.json"], self._listDir())
+    with open(self.path, "r") as f:
+      self.assertEqual("[]", f.read())
+
+  def test_atomic_write_replaces_existing_file(self):
+    with open(self.path, "w") as f:
+      f.write("old")
+    with atomicReportPath(self.path) as tmpPath:
+      with open(tmpPath, "w") as f:
+        f.write("new")
+    with open(self.path, "r") as f:
+      self.assertEqual("new", f.read())
+
+  @mock.patch('slm.reports.common._getUmask', return_value=0o022)
+  def test_atomic_write_gives_new_file_mode_from_umask(self, umask_mock):
+    with atomicReportPath(self.path) as tmpPath:
+      with open(tmpPath, "w") as f:
+        f.write("[]")
+    self.assertEqual(0o644, os.stat(self.path).st_mode & 0o777)
+
+  def test_atomic_write_keeps_mode_of_replaced_file(self):
+    with open(self.path, "w") as f:
+      f.write("old")
+    os.chmod(self.path, 0o640)
+    with atomicReportPath(self.path) as tmpPath:
+      with open(tmpPath, "w") as f:
+        f.write("new")
+    self.assertEqual(0o640, os.stat(self.path).st_mode & 0o777)
+
+  def test_failed_atomic_write_leaves_existing_file_and_no_temp_file(self):
+    with open(self.path, "w") as f:
+      f.write("old")
+    with self.assertRaises(RuntimeError):
+      with atomicReportPath(self.path) as tmpPath:
+        with open(tmpPath, "w") as f:
+          f.write("partial")
+        raise RuntimeError("killed")
+    self.assertEqual(["report.json"], self._listDir())
+    with open(self.path, "r") as f:
+      self.assertEqual("old", f.read())
+
+  ##### Orphaned temp file tests
+
+  def _makeTempFile(self, pid):
+    filename = f".report.json.{pid}.abc123{TEMP_SUFFIX}"
+    with open(os.path.join(self.td.path, filename), "w") as f:
+      f.write("partial")
+    return filename
+
+  @mock.patch('slm.reports.common._isProcessRunning', return_value=False)
+  def test_can_clean_orphaned_temp_files(self, running_mock):
+    self._makeTempFile(12345)
+    with open(self.path, "w") as f:
+      f.write("[]")
+    self.assertEqual(1, cleanOrphanedTempFiles(self.td.path))
+    self.assertEqual(["report.json"], self._listDir())
+    running_mock.assert_called_with(12345)
+
+  def test_clean_leaves_temp_files_of_running_processes(self):
+    filename = self._makeTempFile(os.getpid())
+    self.assertEqual(0, cleanOrphanedTempFiles(self.td.path))
+    self.assertEqual([filename], self._listDir())
+
+  @mock.patch('slm.reports.common._isProcessRunning', return_value=False)
+  def test_clean_leaves_other_hidden_files(self, running_mock):
+    for filename in [".slm-reports.json", f".odd{TEMP_SUFFIX}",
+        f".report.json.notapid.abc123{TEMP_SUFFIX}"]:
+      with open(os.path.join(self.td.path, filename), "w") as f:
+        f.write("x")
+    self.assertEqual(0, cleanOrphanedTempFiles(self.td.path))
+    self.assertEqual(3, len(self._listDir()))
+
+  def test_clean_ignores_missing_directory(self):
+    self.assertEqual(0, cleanOrphanedTempFiles(
+      os.path.join(self.td.path, "nope")))
@@ -0,0 +1,151 @@
+# tests/unit_reportcounts.py
+#
+# Unit test for spdxLicenseManager: counting files by license and category.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from unittest import mock
+import datetime
+
+from slm.datatypes import Category, File, License, Scan, Subproject
+from slm.projectdb import ProjectDB
+from slm.reports.counts import FileCounter
+
+EMPTY = "d41d8cd98f00b204e9800998ecf8427e"
+
+class ReportCountsTestSuite(unittest.TestCase):
+  """spdxLicenseManager file counting unit test suite."""
+
+  def setUp(self):
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+
+    # insert sample data
+    self.db.session.bulk_save_objects([
+      Category(_id=1, name="a category", order=2),
+      Category(_id=2, name="cat", order=1),
+    ])
+    self.db.session.bulk_save_objects([
+      License(_id=1, name="DoAnything", category_id=1),
+      License(_id=2, name="HarshEULA", category_id=2),
+      License(_id=3, name="NoFiles", category_id=2),
+      License(_id=4, name="DoAnythingNoncommercial", category_id=1),
+    ])
+    self.db.session.bulk_save_objects([
+      Subproject(_id=1, name="sub1", desc="subproject 1"),
+    ])
+    self.db.session.bulk_save_objects([
+      Scan(_id=1, subproject_id=1, scan_dt=datetime.date(2017, 1, 10), desc="1"),
+      Scan(_id=2, subproject_id=1, scan_dt=datetime.date(2017, 2, 10), desc="2"),
+    ])
+    self.db.session.bulk_save_objects([
+      File(_id=1, scan_id=1, license_id=1, path="/tmp/f1", md5=EMPTY),
+      File(_id=2, scan_id=1, license_id=1, path="/tmp/vendor/f2", md5="abc"),
+      File(_id=3, scan_id=1, license_id=2, path="/tmp/vendor/f3", md5=EMPTY),
+      File(_id=4, scan_id=1, license_id=4, path="/tmp/f4", md5=None),
+      File(_id=5, scan_id=2, license_id=2, path="/tmp/f5", md5=None),
+      File(_id=6, scan_id=2, license_id=2, path="/tmp/f6", md5=None),
+    ])
+    self.db.session.bulk_save_objects([
+      Scan(_id=3, subproject_id=1, scan_dt=datetime.date(2017, 3, 10), desc="3"),
+      Scan(_id=4, subproject_id=1, scan_dt=datetime.date(2017, 4, 10), desc="4"),
+    ])
+    self.db.session.bulk_save_objects([
+      File(_id=7, scan_id=3, license_id=1, path="/tmp/vendor/f3", md5=None),
+      File(_id=8, scan_id=4, license_id=1, path="/abs/f8", md5=None),
+      File(_id=9, scan_id=4, license_id=1, path="rel/f9", md5=None),
+    ])
+    self.db.session.commit()
+
+  def tearDown(self):
+    self.db.closeDB()
+    self.db = None
+
+  ##### Test helpers
+
+  def _checkCounts(self, counter):
+    fc = counter.countFiles(scan_ids=[1, 2])
+    self.assertEqual({1: 2, 2: 3, 4: 1}, fc.licenseCounts)
+    self.assertEqual({1: 3, 2: 3}, fc.categoryCounts)
+    self.assertEqual(6, fc.total)
+
+    fc = counter.countFiles(scan_ids=[2])
+    self.assertEqual({2: 2}, fc.licenseCounts)
+    self.assertEqual({2: 2}, fc.categoryCounts)
+
+  def _checkFindingCounts(self, counter):
+    self.db.setConfigValue(key="analyze-emptyfile", value="yes")
+    self.db.setConfigValue(key="analyze-thirdparty", value="yes")
+    self.db.setConfigValue(key="analyze-thirdparty-dirs", value="vendor")
+    fc = counter.countFiles(scan_ids=[1, 2])
+    self.assertEqual({1: 1, 2: 1}, fc.findingCounts["emptyfile"])
+    self.assertEqual({1: 1, 2: 1}, fc.findingCounts["thirdparty"])
+    self.assertEqual({1: 2, 2: 3, 4: 1}, fc.licenseCounts)
+
+  ##### Test cases below
+
+  def test_can_count_files(self):
+    counter = FileCounter(db=self.db)
+    self._checkCounts(counter)
+
+  def test_can_count_findings(self):
+    counter = FileCounter(db=self.db)
+    self._checkFindingCounts(counter)
+
+  @mock.patch('slm.projectdb.ProjectDB.getFilesCountByLicense')
+  def test_counts_without_findings_come_from_db(self, count_mock):
+    count_mock.return_value = {1: 3}
+    counter = FileCounter(db=self.db)
+    fc = counter.countFiles(scan_ids=[1], withFindings=False)
+    count_mock.assert_called_once_with(scan_ids=[1])
+    self.assertEqual({1: 3}, fc.licenseCounts)
+
+  def test_no_findings_counted_unless_configured(self):
+    counter = FileCounter(db=self.db)
+    fc = counter.countFiles(scan_ids=[1])
+    self.assertEqual({}, fc.findingCounts)
+
+  def test_no_findings_counted_if_not_requested(self):
+    self.db.setConfigValue(key="analyze-emptyfile", value="yes")
+    counter = FileCounter(db=self.db)
+    fc = counter.countFiles(scan_ids=[1], withFindings=False)
+    self.assertEqual({}, fc.findingCounts)
+
+  def test_config_can_be_overridden_by_keywords(self):
+    self.db.setConfigValue(key="analyze-emptyfile", value="yes")
+    counter = FileCounter(db=self.db, config={"analyze-emptyfile": "no"})
+    fc = counter.countFiles(scan_ids=[1])
+    self.assertEqual({}, fc.findingCounts)
+
+  def test_can_get_common_path_prefix(self):
+    counter = FileCounter(db=self.db)
+    self.assertEqual("/tmp", counter.getPathPrefix(scan_ids=[1, 2]))
+    self.assertEqual("/tmp/vendor/f3", counter.getPathPrefix(scan_ids=[3]))
+    self.assertEqual("", counter.getPathPrefix(scan_ids=[4]))
+
+  def test_thirdparty_dirs_are_matched_after_stripping_prefix(self):
+    self.db.setConfigValue(key="analyze-thirdparty", value="yes")
+    self.db.setConfigValue(key="analyze-thirdparty-dirs", value="tmp")
+    counter = FileCounter(db=self.db)
+    fc = counter.countFiles(scan_ids=[1, 2])
+    self.assertEqual({1: 2, 2: 3, 4: 1}, fc.findingCounts["thirdparty"])
+
+    self.db.setConfigValue(key="analyze-exclude-path-prefix", value="yes")
+    fc = counter.countFiles(scan_ids=[1, 2])
+    self.assertEqual({}, fc.findingCounts["thirdparty"])
@@ -0,0 +1,111 @@
+# tests/unit_reportcsv.py
+#
+# Unit test for spdxLicenseManager: creating CSV reports.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import io
+import os
+import unittest
+from unittest import mock
+from testfixtures import TempDirectory
+
+from slm.projectdb import ProjectDB
+from slm.reports.common import ReportFileError, ReportNotReadyError
+from slm.reports.csv import CSVReporter
+from slm.reports.results import ResultCategory, ResultFile, ResultLicense
+
+class ReportCSVTestSuite(unittest.TestCase):
+  """spdxLicenseManager CSV reporting unit test suite."""
+
+  def setUp(self):
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+
+    # create reporter
+    self.reporter = CSVReporter(db=self.db)
+
+  def tearDown(self):
+    pass
+
+  ##### Test helpers to mimic results from analysis
+
+  def _getAnalysisResults(self):
+    self.f1 = ResultFile(_id=1, scan_id=1, license_id=2, path="/tmp/f1")
+    self.f2 = ResultFile(_id=2, scan_id=1, license_id=1, path="/tmp/f2, with comma")
+    self.f3 = ResultFile(_id=3, scan_id=1, license_id=6, path="/tmp/vendor/f3",
+      findings={"thirdparty": "yes"})
+    self.f4 = ResultFile(_id=4, scan_id=1, license_id=6, path="/tmp/f4.png",
+      findings={"extension": "yes", "emptyfile": "yes"})
+    self.cat2 = ResultCategory(_id=2, name="catID2", licenses=(
+      ResultLicense(_id=2, name="another lic2cat2", files=(self.f1,)),
+      ResultLicense(_id=1, name="lic1cat2", files=(self.f2,)),
+    ))
+    self.cat4 = ResultCategory(_id=4, name="No license found", licenses=(
+      ResultLicense(_id=6, name="No license found", files=(self.f3, self.f4)),
+    ))
+    return (self.cat2, self.cat4)
+
+  ##### Test cases below
+
+  def test_new_reporter_is_in_reset_state(self):
+    self.assertIsNone(self.reporter.results)
+    self.assertEqual({}, self.reporter.kwConfig)
+
+  def test_writes_one_row_per_file_with_finding_columns(self):
+    f = io.StringIO(newline="")
+    self.reporter._writeResults(f, self._getAnalysisResults())
+    f.seek(0)
+    rows = list(csv.reader(f))
+    self.assertEqual(["Category", "License", "File", "Excluded extension",
+      "Third party", "Empty file"], rows[0])
+    self.assertEqual(["catID2", "another lic2cat2", "/tmp/f1", "", "", ""],
+      rows[1])
+    self.assertEqual(["catID2", "lic1cat2", "/tmp/f2, with comma", "", "", ""],
+      rows[2])
+    self.assertEqual(["No license found", "No license found",
+      "/tmp/vendor/f3", "", "yes", ""], rows[3])
+    self.assertEqual(["No license found", "No license found",
+      "/tmp/f4.png", "yes", "", "yes"], rows[4])
+    self.assertEqual(5, len(rows))
+
+  def test_can_save_csv_report(self):
+    self.reporter.setResults(self._getAnalysisResults())
+    with TempDirectory() as td:
+      path = os.path.join(td.path, "report.csv")
+      self.reporter.save(path=path)
+      with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    self.assertEqual(5, len(rows))
+
+  def test_save_fails_if_results_not_ready(self):
+    with self.assertRaises(ReportNotReadyError):
+      self.reporter.save(path="/tmp/fake/whatever.csv")
+
+  @mock.patch('slm.reports.csv.os.path.exists', return_value=True)
+  def test_save_check_raises_exception_if_file_already_exists(self, os_exists):
+    self.reporter.setResults(self._getAnalysisResults())
+    with self.assertRaises(ReportFileError):
+      self.reporter._saveCheck(path="/tmp/fake/existing.csv")
+
+  @mock.patch('slm.reports.csv.os.access', return_value=False)
+  def test_save_check_fails_if_no_write_permission_for_path(self, os_access):
+    self.reporter.setResults(self._getAnalysisResults())
+    with self.assertRaises(ReportFileError):
+      self.reporter._saveCheck(path="/tmp/readonly/report.csv")
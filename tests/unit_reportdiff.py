@@ -0,0 +1,222 @@
+# tests/unit_reportdiff.py
+#
+# Unit test for spdxLicenseManager: comparing scans and creating diff
+# reports.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+import os
+import unittest
+import datetime
+import openpyxl
+from testfixtures import TempDirectory
+
+from slm.projectdb import ProjectDB
+from slm.datatypes import Category, File, License, Scan, Subproject
+from slm.reports.common import (ReportAnalysisError, ReportFileError,
+  ReportNotReadyError)
+from slm.reports.diff import DiffReporter, ScanDiffer
+
+class ReportDiffTestSuite(unittest.TestCase):
+  """spdxLicenseManager scan diff unit test suite."""
+
+  def setUp(self):
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+
+    # insert sample data
+    self.insertSampleData()
+
+    self.differ = ScanDiffer(db=self.db)
+    self.reporter = DiffReporter()
+
+    # and a temp directory for output files
+    self.td = TempDirectory()
+
+  def tearDown(self):
+    self.td.cleanup()
+    self.db.closeDB()
+    self.db = None
+
+  def insertSampleData(self):
+    self.db.session.bulk_save_objects([
+      Category(_id=1, name="a category", order=1),
+      License(_id=1, name="DoAnything", category_id=1),
+      License(_id=2, name="HarshEULA", category_id=1),
+      Subproject(_id=1, name="sub1", desc="subproject 1"),
+      Scan(_id=1, subproject_id=1, scan_dt=datetime.date(2017, 1, 10),
+        desc="January scan"),
+      Scan(_id=2, subproject_id=1, scan_dt=datetime.date(2017, 2, 10),
+        desc="February scan"),
+    ])
+    self.db.session.bulk_save_objects([
+      # in both scans, unchanged
+      File(_id=1, scan_id=1, path="/same.c", license_id=1, md5="aa"),
+      File(_id=2, scan_id=2, path="/same.c", license_id=1, md5="aa"),
+      # only in first scan
+      File(_id=3, scan_id=1, path="/gone.c", license_id=1, md5="bb"),
+      # only in second scan
+      File(_id=4, scan_id=2, path="/new.c", license_id=2, md5="cc"),
+      # in both, license changed
+      File(_id=5, scan_id=1, path="/relicensed.c", license_id=1, md5="dd"),
+      File(_id=6, scan_id=2, path="/relicensed.c", license_id=2, md5="dd"),
+      # in both, contents changed
+      File(_id=7, scan_id=1, path="/edited.c", license_id=2, md5="ee"),
+      File(_id=8, scan_id=2, path="/edited.c", license_id=2, md5="ff"),
+      # in both, checksum missing from one scan
+      File(_id=9, scan_id=1, path="/unknown.c", license_id=1, md5=None),
+      File(_id=10, scan_id=2, path="/unknown.c", license_id=1, md5="gg"),
+    ])
+    self.db.session.commit()
+
+  def _getDiffs(self):
+    return list(self.differ.iterDiff(1, 2))
+
+  ##### Diff engine tests
+
+  def test_diff_finds_added_removed_and_changed_files_in_path_order(self):
+    diffs = self._getDiffs()
+    self.assertEqual(
+      [("/edited.c", "changed"), ("/gone.c", "removed"),
+       ("/new.c", "added"), ("/relicensed.c", "changed")],
+      [(df.path, df.status) for df in diffs])
+
+  def test_diff_records_license_names_and_changes(self):
+    edited, gone, new, relicensed = self._getDiffs()
+    self.assertEqual(("md5",), edited.changes)
+    self.assertEqual("DoAnything", gone.oldLicense)
+    self.assertIsNone(gone.newLicense)
+    self.assertIsNone(new.oldLicense)
+    self.assertEqual("HarshEULA", new.newLicense)
+    self.assertEqual(("license",), relicensed.changes)
+    self.assertEqual("DoAnything", relicensed.oldLicense)
+    self.assertEqual("HarshEULA", relicensed.newLicense)
+
+  def test_diff_in_reverse_swaps_added_and_removed(self):
+    diffs = list(self.differ.iterDiff(2, 1))
+    statuses = {df.path: df.status for df in diffs}
+    self.assertEqual("added", statuses["/gone.c"])
+    self.assertEqual("removed", statuses["/new.c"])
+
+  def _addVersionedScans(self):
+    self.db.session.bulk_save_objects([
+      Scan(_id=3, subproject_id=1, scan_dt=datetime.date(2017, 3, 10),
+        desc="March scan"),
+      Scan(_id=4, subproject_id=1, scan_dt=datetime.date(2017, 4, 10),
+        desc="April scan"),
+    ])
+    self.db.session.bulk_save_objects([
+      File(_id=11, scan_id=3, path="/tmp/frotz-1.2/a.c", license_id=1, md5="aa"),
+      File(_id=12, scan_id=3, path="/tmp/frotz-1.2/src/b.c", license_id=1, md5="bb"),
+      File(_id=13, scan_id=4, path="/tmp/frotz-1.3/a.c", license_id=1, md5="aa"),
+      File(_id=14, scan_id=4, path="/tmp/frotz-1.3/src/b.c", license_id=2, md5="bb"),
+      File(_id=15, scan_id=4, path="/tmp/frotz-1.3/src/c.c", license_id=1, md5="cc"),
+    ])
+    self.db.session.commit()
+
+  def test_diff_strips_each_scans_path_prefix_if_configured(self):
+    self._addVersionedScans()
+    self.db.setConfigValue(key="analyze-exclude-path-prefix", value="yes")
+    diffs = list(self.differ.iterDiff(3, 4))
+    self.assertEqual(
+      [("/src/b.c", "changed"), ("/src/c.c", "added")],
+      [(df.path, df.status) for df in diffs])
+    self.assertEqual(("license",), diffs[0].changes)
+
+  def test_diff_keeps_path_prefix_unless_configured(self):
+    self._addVersionedScans()
+    diffs = list(self.differ.iterDiff(3, 4))
+    self.assertEqual(5, len(diffs))
+    self.assertEqual("/tmp/frotz-1.2/a.c", diffs[0].path)
+    self.assertEqual("removed", diffs[0].status)
+
+  def test_diff_of_scan_with_itself_is_empty(self):
+    self.assertEqual([], list(self.differ.iterDiff(1, 1)))
+
+  def test_diff_fails_for_unknown_scan(self):
+    with self.assertRaises(ReportAnalysisError):
+      list(self.differ.iterDiff(1, 17))
+
+  def test_diff_files_are_read_only(self):
+    df = self._getDiffs()[0]
+    with self.assertRaises(AttributeError):
+      df.status = "added"
+
+  ##### Diff reporter tests
+
+  def test_save_fails_if_diff_not_set(self):
+    with self.assertRaises(ReportNotReadyError):
+      self.reporter.save(path=os.path.join(self.td.path, "diff.json"),
+        report_format="json")
+
+  def test_save_fails_for_unknown_format(self):
+    self.reporter.setDiff(self.differ.iterDiff(1, 2))
+    with self.assertRaises(ReportFileError):
+      self.reporter.save(path=os.path.join(self.td.path, "diff.txt"),
+        report_format="txt")
+
+  def test_save_fails_if_file_exists_unless_replacing(self):
+    path = self.td.write("diff.json", b"[]")
+    self.reporter.setDiff(self.differ.iterDiff(1, 2))
+    with self.assertRaises(ReportFileError):
+      self.reporter.save(path=path, report_format="json")
+    self.reporter.save(path=path, report_format="json", replace=True)
+    with open(path) as f:
+      self.assertEqual(4, len(json.load(f)))
+
+  def test_can_save_json_diff_and_get_counts(self):
+    path = os.path.join(self.td.path, "diff.json")
+    self.reporter.setDiff(self.differ.iterDiff(1, 2))
+    self.reporter.save(path=path, report_format="json")
+    with open(path) as f:
+      rjs = json.load(f)
+    self.assertEqual({"path": "/relicensed.c", "status": "changed",
+      "oldLicense": "DoAnything", "newLicense": "HarshEULA",
+      "changes": ["license"]}, rjs[3])
+    self.assertEqual({"added": 1, "removed": 1, "changed": 2},
+      self.reporter.counts)
+
+  def test_can_save_empty_json_diff(self):
+    path = os.path.join(self.td.path, "diff.json")
+    self.reporter.setDiff(self.differ.iterDiff(1, 1))
+    self.reporter.save(path=path, report_format="json")
+    with open(path) as f:
+      self.assertEqual([], json.load(f))
+
+  def test_can_save_csv_diff(self):
+    path = os.path.join(self.td.path, "diff.csv")
+    self.reporter.setDiff(self.differ.iterDiff(1, 2))
+    self.reporter.save(path=path, report_format="csv")
+    with open(path, newline="") as f:
+      rows = list(csv.reader(f))
+    self.assertEqual(["Status", "File", "Old license", "New license",
+      "Changes"], rows[0])
+    self.assertEqual(["added", "/new.c", "", "HarshEULA", ""], rows[3])
+
+  def test_can_save_xlsx_diff(self):
+    path = os.path.join(self.td.path, "diff.xlsx")
+    self.reporter.setDiff(self.differ.iterDiff(1, 2))
+    self.reporter.save(path=path, report_format="xlsx")
+    wb = openpyxl.load_workbook(path)
+    ws = wb["Scan diff"]
+    self.assertEqual("Status", ws["A1"].value)
+    self.assertEqual("removed", ws["A3"].value)
+    self.assertEqual("/gone.c", ws["B3"].value)
+    self.assertEqual("DoAnything", ws["C3"].value)
@@ -0,0 +1,134 @@
+# tests/unit_reportfreshness.py
+#
+# Unit test for spdxLicenseManager: checking whether reports are up to date.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+import datetime
+from testfixtures import TempDirectory
+
+from slm.projectdb import ProjectDB
+from slm.datatypes import Category, License, Scan, Subproject
+from slm.reports.freshness import ReportFingerprinter, ReportManifest
+
+class ReportFreshnessTestSuite(unittest.TestCase):
+  """spdxLicenseManager report freshness unit test suite."""
+
+  def setUp(self):
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+
+    # insert sample data
+    self.insertSampleData()
+
+    # and a temp directory to hold reports
+    self.td = TempDirectory()
+    self.reportPath = os.path.join(self.td.path, "sub1-2017-01-10.json")
+
+  def tearDown(self):
+    self.td.cleanup()
+    self.db.closeDB()
+    self.db = None
+
+  def insertSampleData(self):
+    self.db.session.bulk_save_objects([
+      Category(_id=1, name="a category", order=1),
+      Category(_id=2, name="cat", order=2),
+      License(_id=1, name="DoAnything", category_id=1),
+      License(_id=2, name="HarshEULA", category_id=2),
+      Subproject(_id=1, name="sub1", desc="subproject 1"),
+      Scan(_id=1, subproject_id=1, scan_dt=datetime.date(2017, 1, 10),
+        desc="sub1 January scan"),
+      Scan(_id=2, subproject_id=1, scan_dt=datetime.date(2017, 2, 10),
+        desc="sub1 February scan"),
+    ])
+    self.db.session.commit()
+
+  def _getFingerprint(self, scan_id):
+    return ReportFingerprinter(db=self.db).getScanFingerprint(
+      self.db.getScan(_id=scan_id))
+
+  def _touchReport(self):
+    with open(self.reportPath, "w") as f:
+      f.write("[]")
+
+  ##### Fingerprint tests
+
+  def test_fingerprint_is_stable(self):
+    self.assertEqual(self._getFingerprint(1), self._getFingerprint(1))
+
+  def test_fingerprint_differs_between_scans(self):
+    self.assertNotEqual(self._getFingerprint(1), self._getFingerprint(2))
+
+  def test_fingerprint_changes_when_license_category_changes(self):
+    before = self._getFingerprint(1)
+    self.db.changeLicenseCategory("HarshEULA", "a category")
+    self.assertNotEqual(before, self._getFingerprint(1))
+
+  def test_fingerprint_changes_when_config_changes(self):
+    before = self._getFingerprint(1)
+    self.db.setConfigValue(key="report-include-summary", value="no")
+    self.assertNotEqual(before, self._getFingerprint(1))
+
+  def test_fingerprint_ignores_config_that_does_not_affect_reports(self):
+    before = self._getFingerprint(1)
+    self.db.setConfigValue(key="spdx-search-dir", value="/tmp/elsewhere")
+    self.assertEqual(before, self._getFingerprint(1))
+
+  def test_fingerprint_changes_when_analyzer_config_changes(self):
+    before = self._getFingerprint(1)
+    self.db.setConfigValue(key="analyze-thirdparty", value="yes")
+    self.assertNotEqual(before, self._getFingerprint(1))
+
+  ##### Manifest tests
+
+  def test_missing_report_is_not_up_to_date(self):
+    manifest = ReportManifest(self.td.path)
+    self.assertFalse(manifest.isUpToDate(self.reportPath, "abc"))
+
+  def test_existing_report_with_no_fingerprint_is_up_to_date(self):
+    self._touchReport()
+    manifest = ReportManifest(self.td.path)
+    self.assertTrue(manifest.isUpToDate(self.reportPath, "abc"))
+
+  def test_report_is_stale_if_fingerprint_differs(self):
+    self._touchReport()
+    manifest = ReportManifest(self.td.path)
+    manifest.record(self.reportPath, "abc")
+    self.assertTrue(manifest.isUpToDate(self.reportPath, "abc"))
+    self.assertFalse(manifest.isUpToDate(self.reportPath, "def"))
+
+  def test_manifest_is_saved_and_reloaded(self):
+    self._touchReport()
+    manifest = ReportManifest(self.td.path)
+    manifest.record(self.reportPath, "abc")
+    manifest.save()
+    reloaded = ReportManifest(self.td.path)
+    self.assertEqual({"sub1-2017-01-10.json": "abc"}, reloaded.fingerprints)
+
+  def test_unchanged_manifest_is_not_written(self):
+    ReportManifest(self.td.path).save()
+    self.assertFalse(os.path.exists(
+      os.path.join(self.td.path, ReportManifest.FILENAME)))
+
+  def test_unreadable_manifest_is_treated_as_empty(self):
+    with open(os.path.join(self.td.path, ReportManifest.FILENAME), "w") as f:
+      f.write("not json")
+    self.assertEqual({}, ReportManifest(self.td.path).fingerprints)
@@ -22,12 +22,14 @@ import unittest
 from unittest import mock
 from collections import OrderedDict
 import datetime
+import io
 import json
+from testfixtures import TempDirectory
 
-from slm.datatypes import Category, File, License, Scan, Subproject
 from slm.projectdb import ProjectDB, ProjectDBQueryError
 from slm.reports.common import ReportFileError, ReportNotReadyError
-from slm.reports.json import JSONReporter
+from slm.reports.json import JSONCompactReporter, JSONReporter, NDJSONReporter
+from slm.reports.results import ResultCategory, ResultFile, ResultLicense
 
 class ReportJSONTestSuite(unittest.TestCase):
   """spdxLicenseManager JSON reporting unit test suite."""
@@ -46,137 +48,67 @@ class ReportJSONTestSuite(unittest.TestCase):
 
   ##### Test helpers to mimic results from analysis
 
-  def _buildCategories(self, results):
-    self.cat2 = Category()
-    self.cat2._id = 2
-    self.cat2.name = "catID2"
-    self.cat2.licenses = []
-    results.append(self.cat2)
-
-    self.cat1 = Category()
-    self.cat1._id = 1
-    self.cat1.name = "catID1"
-    self.cat1.licenses = []
-    results.append(self.cat1)
-
-    self.cat4 = Category()
-    self.cat4._id = 4
-    self.cat4.name = "No license found"
-    self.cat4.licenses = []
-    results.append(self.cat4)
-
-  def _buildLicenses(self, results):
-    # should sort alphabetically before lic1cat2 in reports
-    self.lic2cat2 = License()
-    self.lic2cat2._id = 2
-    self.lic2cat2.name = "another lic2cat2"
-    self.lic2cat2.files = []
-    self.cat2.licenses.append(self.lic2cat2)
-
-    self.lic1cat2 = License()
-    self.lic1cat2._id = 1
-    self.lic1cat2.name = "lic1cat2"
-    self.lic1cat2.files = []
-    self.cat2.licenses.append(self.lic1cat2)
-
-    self.lic5cat1 = License()
-    self.lic5cat1._id = 5
-    self.lic5cat1.name = "a license"
-    self.lic5cat1.files = []
-    self.cat1.licenses.append(self.lic5cat1)
-
-    # no license found option, for analysis outputs
-    self.noLicFound = License()
-    self.noLicFound._id = 6
-    self.noLicFound.name = "No license found"
-    self.noLicFound.files = []
-    self.cat4.licenses.append(self.noLicFound)
-
-  def _buildFiles(self, results):
+  def _buildFiles(self):
     # should sort alphabetically by path before f1
-    self.f2 = File()
-    self.f2._id = 2
-    self.f2.path = "/first/tmp/f2"
-    self.f2.scan_id = 1
-    self.f2.findings = {}
-    self.lic2cat2.files.append(self.f2)
-
-    self.f1 = File()
-    self.f1._id = 1
-    self.f1.path = "/tmp/f1"
-    self.f1.scan_id = 1
-    self.f1.findings = {}
-    self.lic2cat2.files.append(self.f1)
+    self.f2 = ResultFile(_id=2, scan_id=1, license_id=2, path="/first/tmp/f2")
+    self.f1 = ResultFile(_id=1, scan_id=1, license_id=2, path="/tmp/f1")
 
     # should sort after f2 and f1 b/c license ID sorts after theirs
-    self.f3 = File()
-    self.f3._id = 3
-    self.f3.path = "/earliest/tmp/f3"
-    self.f3.scan_id = 1
-    self.f3.findings = {}
-    self.lic1cat2.files.append(self.f3)
-
-    self.f4 = File()
-    self.f4._id = 4
-    self.f4.path = "/tmp/f4"
-    self.f4.scan_id = 1
-    self.f4.findings = {}
-    self.lic1cat2.files.append(self.f4)
-
-    self.f5 = File()
-    self.f5._id = 5
-    self.f5.path = "/tmp/f5"
-    self.f5.scan_id = 1
-    self.f5.findings = {}
-    self.lic5cat1.files.append(self.f5)
-
-    self.f6 = File()
-    self.f6._id = 6
-    self.f6.path = "/tmp/f6.png"
-    self.f6.scan_id = 1
-    self.f6.findings = {
-      "extension": "yes",
-    }
-    self.noLicFound.files.append(self.f6)
+    self.f3 = ResultFile(_id=3, scan_id=1, license_id=1, path="/earliest/tmp/f3")
+    self.f4 = ResultFile(_id=4, scan_id=1, license_id=1, path="/tmp/f4")
+    self.f5 = ResultFile(_id=5, scan_id=1, license_id=5, path="/tmp/f5")
+    self.f6 = ResultFile(_id=6, scan_id=1, license_id=6, path="/tmp/f6.png",
+      findings={"extension": "yes"})
 
     # add some more files for testing findings
-    self.f7 = File()
-    self.f7._id = 7
-    self.f7.path = "/tmp/__init__.py"
-    self.f7.scan_id = 1
-    self.f7.findings = {
-      "emptyfile": "yes",
-    }
-    self.noLicFound.files.append(self.f7)
-
-    self.f8 = File()
-    self.f8._id = 8
-    self.f8.path = "/tmp/vendor/dep.py"
-    self.f8.scan_id = 1
-    self.f8.findings = {
-      "thirdparty": "yes",
-    }
-    self.noLicFound.files.append(self.f8)
+    self.f7 = ResultFile(_id=7, scan_id=1, license_id=6,
+      path="/tmp/__init__.py", findings={"emptyfile": "yes"})
+    self.f8 = ResultFile(_id=8, scan_id=1, license_id=6,
+      path="/tmp/vendor/dep.py", findings={"thirdparty": "yes"})
+    self.f9 = ResultFile(_id=9, scan_id=1, license_id=6, path="/tmp/code.py")
 
-    self.f9 = File()
-    self.f9._id = 9
-    self.f9.path = "/tmp/code.py"
-    self.f9.scan_id = 1
-    self.f9.findings = {}
-    self.noLicFound.files.append(self.f9)
+  def _buildLicenses(self):
+    # should sort alphabetically before lic1cat2 in reports
+    self.lic2cat2 = ResultLicense(_id=2, name="another lic2cat2",
+      files=(self.f2, self.f1))
+    self.lic1cat2 = ResultLicense(_id=1, name="lic1cat2",
+      files=(self.f3, self.f4))
+    self.lic5cat1 = ResultLicense(_id=5, name="a license", files=(self.f5,))
+
+    # no license found option, for analysis outputs
+    self.noLicFound = ResultLicense(_id=6, name="No license found",
+      files=(self.f6, self.f7, self.f8, self.f9))
+
+  def _buildCategories(self):
+    self.cat2 = ResultCategory(_id=2, name="catID2",
+      licenses=(self.lic2cat2, self.lic1cat2))
+    self.cat1 = ResultCategory(_id=1, name="catID1", licenses=(self.lic5cat1,))
+    self.cat4 = ResultCategory(_id=4, name="No license found",
+      licenses=(self.noLicFound,))
 
   def _getAnalysisResults(self):
-    results = []
-    self._buildCategories(results)
-    self._buildLicenses(results)
-    self._buildFiles(results)
-    return results
+    self._buildFiles()
+    self._buildLicenses()
+    self._buildCategories()
+    return (self.cat2, self.cat1, self.cat4)
+
+  def _toPlainJSON(self, results):
+    # expected report contents, built up in memory for json.dumps()
+    def fileJSON(f):
+      d = {"path": f.path, "_id": f._id}
+      if f.findings != {}:
+        d["findings"] = dict(f.findings)
+      return d
+    return [{"name": cat.name, "_id": cat._id,
+      "licenses": [{"name": lic.name, "_id": lic._id,
+        "files": [fileJSON(f) for f in lic.files],
+        "numFiles": lic.numFiles} for lic in cat.licenses],
+      "numFiles": cat.numFiles} for cat in results]
 
   ##### Test cases below
 
   def test_new_reporter_is_in_reset_state(self):
     self.assertIsNone(self.reporter.results)
-    self.assertIsNone(self.reporter.rjs)
     self.assertFalse(self.reporter.reportSaved)
     self.assertEqual({}, self.reporter.kwConfig)
 
@@ -202,60 +134,11 @@ class ReportJSONTestSuite(unittest.TestCase):
 
   ##### Reporter setup function tests
 
-  def test_can_set_results_and_create_empty_string_for_json(self):
+  def test_can_set_results(self):
     results = self._getAnalysisResults()
     self.reporter.setResults(results)
-    self.assertIsInstance(self.reporter.rjs, str)
-    self.assertEqual(self.reporter.rjs, "")
     self.assertEqual(self.reporter.results, results)
 
-  ##### Reporter custom JSON encoder tests
-
-  def test_encoder_creates_correct_values(self):
-    results = self._getAnalysisResults()
-    enc = self.reporter.SLMJSONEncoder()
-
-    # here's a file with findings
-    enc_f6 = enc.default(self.f6)
-    self.assertEqual(enc_f6["path"], "/tmp/f6.png")
-    self.assertEqual(enc_f6["_id"], 6)
-    self.assertEqual(enc_f6["findings"], {"extension": "yes"})
-
-    # here's a file with no findings
-    enc_f5 = enc.default(self.f5)
-    self.assertEqual(enc_f5["path"], "/tmp/f5")
-    self.assertEqual(enc_f5["_id"], 5)
-    with self.assertRaises(KeyError):
-      na = enc_f5["findings"]
-
-    # here's a license
-    enc_lic1 = enc.default(self.lic1cat2)
-    self.assertEqual(enc_lic1["name"], "lic1cat2")
-    self.assertEqual(enc_lic1["_id"], 1)
-    self.assertEqual(enc_lic1["numFiles"], 2)
-    self.assertEqual(enc_lic1["files"], self.lic1cat2.files)
-
-    # here's a category
-    enc_cat2 = enc.default(self.cat2)
-    self.assertEqual(enc_cat2["name"], "catID2")
-    self.assertEqual(enc_cat2["_id"], 2)
-    self.assertEqual(enc_cat2["numFiles"], 4)
-    self.assertEqual(enc_cat2["licenses"], self.cat2.licenses)
-
-  ##### Reporter helpers
-
-  def test_helper_can_get_number_of_files_for_license(self):
-    results = self._getAnalysisResults()
-    enc = self.reporter.SLMJSONEncoder()
-    numFiles = enc._getNumFilesForLicense(self.lic1cat2)
-    self.assertEqual(numFiles, 2)
-
-  def test_helper_can_get_number_of_files_for_category(self):
-    results = self._getAnalysisResults()
-    enc = self.reporter.SLMJSONEncoder()
-    numFiles = enc._getNumFilesForCategory(self.cat2)
-    self.assertEqual(numFiles, 4)
-
   ##### Reporter generate function tests
 
   def test_save_report_fails_if_results_not_ready(self):
@@ -263,19 +146,74 @@ class ReportJSONTestSuite(unittest.TestCase):
       self.reporter.save(path="/tmp/fake/whatever.json")
     self.assertFalse(self.reporter.reportSaved)
 
+  @mock.patch('slm.reports.json.atomicReportPath')
   @mock.patch('slm.reports.json.open')
-  @mock.patch('slm.reports.json.json.dump')
-  def test_save_calls_functions_to_save(self, dump_mock, open_mock):
+  @mock.patch('slm.reports.json.JSONReporter._writeResults')
+  def test_save_calls_functions_to_save(self, write_mock, open_mock, atomic_mock):
     outfile = "/tmp/newfile.json"
+    atomic_mock.return_value.__enter__.return_value = "/tmp/.newfile.json.tmp"
     results = self._getAnalysisResults()
     self.reporter.setResults(results)
     self.reporter.save(path=outfile)
 
-    dump_mock.assert_called()
-    args = dump_mock.call_args
-    self.assertEqual(args[0][0], results)
-    self.assertEqual(args[1], {"cls": JSONReporter.SLMJSONEncoder})
-    open_mock.assert_called_with(outfile, "w")
+    write_mock.assert_called()
+    args = write_mock.call_args
+    self.assertEqual(args[0][1], results)
+    self.assertEqual(args[1], {"indent": None})
+    # the report is written to a temporary file, which then replaces outfile
+    atomic_mock.assert_called_with(outfile)
+    open_mock.assert_called_with("/tmp/.newfile.json.tmp", "w")
+
+  @mock.patch('slm.reports.json.atomicReportPath')
+  @mock.patch('slm.reports.json.open')
+  @mock.patch('slm.reports.json.JSONReporter._writeResults')
+  def test_save_indents_if_pretty_print_config_set(self, write_mock, open_mock,
+    atomic_mock):
+    self.db.setConfigValue(key="report-pretty-print", value="yes")
+    self.reporter.setResults(self._getAnalysisResults())
+    self.reporter.save(path="/tmp/newfile.json")
+    self.assertEqual(write_mock.call_args[1], {"indent": 2})
+
+  ##### Reporter streaming writer tests
+
+  def test_streamed_output_matches_json_dump(self):
+    results = self._getAnalysisResults()
+    f = io.StringIO()
+    self.reporter._writeResults(f, results)
+    expected = json.dumps(self._toPlainJSON(results))
+    self.assertEqual(expected, f.getvalue())
+
+  def test_streamed_pretty_printed_output_matches_json_dump(self):
+    results = self._getAnalysisResults()
+    f = io.StringIO()
+    self.reporter._writeResults(f, results, indent=2)
+    expected = json.dumps(self._toPlainJSON(results), indent=2)
+    self.assertEqual(expected, f.getvalue())
+
+  def test_streamed_output_handles_empty_lists(self):
+    emptyLic = ResultLicense(_id=3, name="empty", files=())
+    results = (ResultCategory(_id=5, name="empty", licenses=(emptyLic,)),)
+    for indent in [None, 2]:
+      f = io.StringIO()
+      self.reporter._writeResults(f, results, indent=indent)
+      expected = json.dumps(self._toPlainJSON(results),
+        indent=indent)
+      self.assertEqual(expected, f.getvalue())
+
+  def test_streamed_output_uses_precomputed_counts_and_reads_files_once(self):
+    # files are only available through a one-shot iterator, as with
+    # streamed analysis results
+    self._getAnalysisResults()
+    files = iter([self.f1, self.f2])
+    lic = ResultLicense(_id=2, name="lic", files=files, numFiles=2)
+    cat = ResultCategory(_id=1, name="cat", licenses=(lic,))
+    f = io.StringIO()
+    self.reporter._writeResults(f, (cat,))
+    rjs = json.loads(f.getvalue())
+    self.assertEqual(2, rjs[0]["numFiles"])
+    self.assertEqual(2, rjs[0]["licenses"][0]["numFiles"])
+    self.assertEqual(["/tmp/f1", "/first/tmp/f2"],
+      [fl["path"] for fl in rjs[0]["licenses"][0]["files"]])
 
   ##### Reporter save function tests
 
@@ -313,9 +251,11 @@ class ReportJSONTestSuite(unittest.TestCase):
     with self.assertRaises(ReportNotReadyError):
       self.reporter._saveCheck(path="whatever")
 
+  @mock.patch('slm.reports.json.atomicReportPath')
   @mock.patch('slm.reports.json.open')
   @mock.patch('slm.reports.json.JSONReporter._saveCheck')
-  def test_save_calls_save_checker(self, check_mock, open_mock):
+  def test_save_calls_save_checker(self, check_mock, open_mock, atomic_mock):
+    atomic_mock.return_value.__enter__.return_value = ".something.tmp"
     results = self._getAnalysisResults()
     self.reporter.setResults(results)
     path = "something"
@@ -324,4 +264,112 @@ class ReportJSONTestSuite(unittest.TestCase):
     self.reporter.save(path=path, replace=replace)
 
     check_mock.assert_called_with(path=path, replace=replace)
-    open_mock.assert_called_with(path, "w")
+    atomic_mock.assert_called_with(path)
+    open_mock.assert_called_with(".something.tmp", "w")
+
+  def test_save_rolls_up_directories_if_config_set(self):
+    results = (ResultCategory(_id=1, name="cat", licenses=(
+      ResultLicense(_id=1, name="lic", files=(
+        ResultFile(_id=1, scan_id=1, license_id=1, path="README"),
+        ResultFile(_id=2, scan_id=1, license_id=1, path="lib/a.c"),
+        ResultFile(_id=3, scan_id=1, license_id=1, path="lib/b.c"),
+      )),
+    )),)
+    reporter = JSONReporter(db=self.db, config={"report-rollup-dirs": "yes"})
+    reporter.setResults(results)
+    with TempDirectory() as td:
+      path = os.path.join(td.path, "report.json")
+      reporter.save(path=path)
+      with open(path) as f:
+        rj = json.load(f)
+    lic = rj[0]["licenses"][0]
+    self.assertEqual(3, lic["numFiles"])
+    self.assertEqual([
+      {"path": "README", "_id": 1},
+      {"path": "lib/**", "numFiles": 2},
+    ], lic["files"])
+
+  def test_ndjson_ignores_rollup_config(self):
+    reporter = NDJSONReporter(db=self.db, config={"report-rollup-dirs": "yes"})
+    reporter.setResults(self._getAnalysisResults())
+    with TempDirectory() as td:
+      path = os.path.join(td.path, "report.ndjson")
+      reporter.save(path=path)
+      with open(path) as f:
+        self.assertEqual(9, len(f.read().splitlines()))
+
+  ##### Compact JSON and NDJSON reporter tests
+
+  def test_can_write_compact_json_report(self):
+    results = self._getAnalysisResults()
+    reporter = JSONCompactReporter(db=self.db)
+    f = io.StringIO()
+    reporter._writeResults(f, results)
+    rjs = json.loads(f.getvalue())
+
+    self.assertEqual("slm-json-compact-2", rjs["format"])
+    self.assertEqual([
+      {"name": "catID2", "_id": 2, "numFiles": 4},
+      {"name": "catID1", "_id": 1, "numFiles": 1},
+      {"name": "No license found", "_id": 4, "numFiles": 4},
+    ], rjs["categories"])
+    self.assertEqual({"name": "lic1cat2", "_id": 1, "category": 0,
+      "numFiles": 2}, rjs["licenses"][1])
+    self.assertEqual(["extension", "thirdparty", "emptyfile"], rjs["findings"])
+    self.assertEqual(["dir", "name", "_id", "license", "findings"],
+      rjs["fileColumns"])
+    self.assertEqual(["/first/tmp/", "/tmp/", "/earliest/tmp/", "/tmp/vendor/"],
+      rjs["dirs"])
+    self.assertEqual([
+      [0, "f2", 2, 0, 0],
+      [1, "f1", 1, 0, 0],
+      [2, "f3", 3, 1, 0],
+      [1, "f4", 4, 1, 0],
+      [1, "f5", 5, 2, 0],
+      [1, "f6.png", 6, 3, 1],
+      [1, "__init__.py", 7, 3, 4],
+      [3, "dep.py", 8, 3, 2],
+      [1, "code.py", 9, 3, 0],
+    ], rjs["files"])
+
+  def test_compact_json_paths_can_be_rebuilt(self):
+    results = (ResultCategory(_id=1, name="cat", licenses=(
+      ResultLicense(_id=1, name="lic", files=(
+        ResultFile(_id=1, scan_id=1, license_id=1, path="README"),
+        ResultFile(_id=2, scan_id=1, license_id=1, path="src/a/b.c"),
+        ResultFile(_id=3, scan_id=1, license_id=1, path="/x.c"),
+        ResultFile(_id=4, scan_id=1, license_id=1, path="x.c"),
+        ResultFile(_id=5, scan_id=1, license_id=1, path="/src/a/b.c"),
+      )),
+    )),)
+    f = io.StringIO()
+    JSONCompactReporter(db=self.db)._writeResults(f, results)
+    rjs = json.loads(f.getvalue())
+    paths = [rjs["dirs"][d] + name
+      for d, name, _id, lic, findings in rjs["files"]]
+    self.assertEqual(["README", "src/a/b.c", "/x.c", "x.c", "/src/a/b.c"],
+      paths)
+
+  def test_compact_json_ignores_pretty_print(self):
+    self.db.setConfigValue(key="report-pretty-print", value="yes")
+    reporter = JSONCompactReporter(db=self.db)
+    reporter.setResults(self._getAnalysisResults())
+    with TempDirectory() as td:
+      path = os.path.join(td.path, "report.compact.json")
+      reporter.save(path=path)
+      with open(path) as f:
+        self.assertEqual(1, len(f.read().splitlines()))
+
+  def test_can_write_ndjson_report(self):
+    results = self._getAnalysisResults()
+    f = io.StringIO()
+    NDJSONReporter(db=self.db)._writeResults(f, results)
+    lines = f.getvalue().splitlines()
+    self.assertEqual(9, len(lines))
+    self.assertEqual({"path": "/first/tmp/f2", "_id": 2,
+      "license": "another lic2cat2", "category": "catID2", "findings": {}},
+      json.loads(lines[0]))
+    self.assertEqual({"path": "/tmp/vendor/dep.py", "_id": 8,
+      "license": "No license found", "category": "No license found",
+      "findings": {"thirdparty": "yes"}}, json.loads(lines[7]))
+    self.assertTrue(f.getvalue().endswith("\n"))
@@ -0,0 +1,125 @@
+# tests/unit_reportpipeline.py
+#
+# Unit test for spdxLicenseManager: pipelined creation of many reports.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import unittest
+from unittest import mock
+from testfixtures import TempDirectory
+
+from slm.projectdb import ProjectDB
+from slm.reports.pipeline import (ReportPipeline, STAGES, createScanReports,
+  newStageTimings)
+
+class ReportPipelineTestSuite(unittest.TestCase):
+  """spdxLicenseManager report pipeline unit test suite."""
+
+  def setUp(self):
+    # the pipeline's report stage opens its own connection, so the
+    # database needs to be on disk
+    self.td = TempDirectory()
+    self.db = ProjectDB()
+    self.db.createDB(os.path.join(self.td.path, "frotz.db"))
+    self.db.initializeDBTables()
+    self.db.closeDB()
+    self.db.openDB(os.path.join(self.td.path, "frotz.db"))
+
+    # insert sample data
+    self.insertSampleData()
+
+  def tearDown(self):
+    self.db.closeDB()
+    self.db = None
+    self.td.cleanup()
+
+  def insertSampleData(self):
+    self.db.addCategory("a category")
+    self.db.addLicense("DoAnything", "a category")
+    self.db.addSubproject("sub1", "subproject 1")
+    for scan_dt_str, numFiles in [("2017-01-10", 2), ("2017-02-10", 3),
+        ("2017-03-10", 1)]:
+      scan = self.db.addScan("sub1", scan_dt_str, f"scan {scan_dt_str}")
+      self.db.addBulkFiles(scan_id=scan, file_tuples=[
+        (f"/file{i}", 1, None, None, None) for i in range(numFiles)])
+
+  def _getTask(self, scan_id):
+    return (scan_id, [("json", os.path.join(self.td.path, f"{scan_id}.json"))])
+
+  def _loadNumFiles(self, scan_id):
+    with open(os.path.join(self.td.path, f"{scan_id}.json"), "r") as f:
+      return json.load(f)[0]["numFiles"]
+
+  ##### Test cases below
+
+  def test_can_create_one_scans_reports(self):
+    timings = newStageTimings()
+    scan_id, reports = self._getTask(2)
+    created, errors = createScanReports(self.db, scan_id, reports, timings)
+    self.assertEqual([reports[0][1]], created)
+    self.assertEqual([], errors)
+    self.assertEqual(3, self._loadNumFiles(2))
+
+  def test_pipeline_creates_reports_for_all_scans_in_order(self):
+    pipeline = ReportPipeline(db=self.db, queueSize=1)
+    tasks = [self._getTask(3), self._getTask(1), self._getTask(2)]
+    outcomes = pipeline.run(tasks)
+    self.assertEqual([([reports[0][1]], []) for scan_id, reports in tasks],
+      outcomes)
+    self.assertEqual(2, self._loadNumFiles(1))
+    self.assertEqual(3, self._loadNumFiles(2))
+    self.assertEqual(1, self._loadNumFiles(3))
+
+  @mock.patch('slm.reports.pipeline.ProcessPoolExecutor')
+  def test_pipeline_without_overlap_runs_in_process(self, mockExecutor):
+    pipeline = ReportPipeline(db=self.db, overlap=False)
+    tasks = [self._getTask(3), self._getTask(1)]
+    outcomes = pipeline.run(tasks)
+    self.assertEqual([([reports[0][1]], []) for scan_id, reports in tasks],
+      outcomes)
+    self.assertEqual(0, mockExecutor.call_count)
+    self.assertEqual(2, self._loadNumFiles(1))
+
+  def test_pipeline_records_time_for_each_stage(self):
+    pipeline = ReportPipeline(db=self.db)
+    pipeline.run([self._getTask(1)])
+    self.assertEqual(STAGES, list(pipeline.timings.keys()))
+    for stage in STAGES:
+      self.assertGreater(pipeline.timings[stage], 0.0)
+
+  def test_pipeline_with_no_tasks_does_nothing(self):
+    self.assertEqual([], ReportPipeline(db=self.db).run([]))
+
+  def test_failed_analysis_does_not_stop_other_scans(self):
+    pipeline = ReportPipeline(db=self.db)
+    outcomes = pipeline.run([self._getTask(1), self._getTask(17),
+      self._getTask(2)])
+    self.assertEqual(1, len(outcomes[0][0]))
+    self.assertEqual(([], ["Error creating reports for scan 17: Scan ID 17 does not exist"]),
+      outcomes[1])
+    self.assertEqual(1, len(outcomes[2][0]))
+
+  @mock.patch('slm.reports.pipeline.JSONReporter.save',
+    side_effect=RuntimeError("disk on fire"))
+  def test_failed_report_does_not_stop_other_scans(self, mockSave):
+    pipeline = ReportPipeline(db=self.db)
+    outcomes = pipeline.run([self._getTask(1), self._getTask(2)])
+    self.assertEqual([
+      ([], ["Error creating reports for scan 1: disk on fire"]),
+      ([], ["Error creating reports for scan 2: disk on fire"]),
+    ], outcomes)
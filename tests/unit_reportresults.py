@@ -0,0 +1,104 @@
+# tests/unit_reportresults.py
+#
+# Unit test for spdxLicenseManager: shared result model for reports.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+import unittest
+
+from slm.reports.results import ResultCategory, ResultFile, ResultLicense
+
+class ReportResultsTestSuite(unittest.TestCase):
+  """spdxLicenseManager report result model unit test suite."""
+
+  def setUp(self):
+    self.f1 = ResultFile(_id=1, scan_id=1, license_id=2, path="/tmp/f1",
+      md5="abcdef")
+    self.f2 = ResultFile(_id=2, scan_id=1, license_id=2, path="/tmp/f2",
+      findings={"extension": "yes"})
+    self.lic2 = ResultLicense(_id=2, name="MIT", files=(self.f1, self.f2))
+    self.lic3 = ResultLicense(_id=3, name="Zlib", files=())
+    self.cat1 = ResultCategory(_id=1, name="Attribution",
+      licenses=(self.lic2, self.lic3))
+
+  def test_file_has_expected_values(self):
+    self.assertEqual(1, self.f1._id)
+    self.assertEqual(1, self.f1.scan_id)
+    self.assertEqual(2, self.f1.license_id)
+    self.assertEqual("/tmp/f1", self.f1.path)
+    self.assertEqual("abcdef", self.f1.md5)
+    self.assertIsNone(self.f1.sha1)
+    self.assertIsNone(self.f1.sha256)
+    self.assertEqual({}, self.f1.findings)
+    self.assertEqual({"extension": "yes"}, self.f2.findings)
+
+  def test_license_counts_files_if_not_given(self):
+    self.assertEqual(2, self.lic2.numFiles)
+    self.assertTrue(self.lic2.hasFiles)
+    self.assertEqual(0, self.lic3.numFiles)
+    self.assertFalse(self.lic3.hasFiles)
+
+  def test_license_can_take_precomputed_count(self):
+    lic = ResultLicense(_id=4, name="BSD-2-Clause", files=iter([]), numFiles=17)
+    self.assertEqual(17, lic.numFiles)
+    self.assertTrue(lic.hasFiles)
+
+  def test_category_counts_files_across_licenses(self):
+    self.assertEqual(2, self.cat1.numFiles)
+    self.assertTrue(self.cat1.hasFiles)
+    emptyCat = ResultCategory(_id=2, name="Other", licenses=(self.lic3,))
+    self.assertEqual(0, emptyCat.numFiles)
+    self.assertFalse(emptyCat.hasFiles)
+
+  def test_results_cannot_be_modified(self):
+    with self.assertRaises(AttributeError):
+      self.f1.path = "/tmp/other"
+    with self.assertRaises(AttributeError):
+      self.lic2.name = "Apache-2.0"
+    with self.assertRaises(AttributeError):
+      del self.cat1.licenses
+
+  def test_file_findings_cannot_be_modified(self):
+    with self.assertRaises(TypeError):
+      self.f2.findings["thirdparty"] = "yes"
+    with self.assertRaises(TypeError):
+      self.f1.findings["extension"] = "yes"
+
+  def test_file_findings_are_copied(self):
+    findings = {"extension": "yes"}
+    f = ResultFile(_id=3, scan_id=1, license_id=2, path="/tmp/f3",
+      findings=findings)
+    findings["emptyfile"] = "yes"
+    self.assertEqual({"extension": "yes"}, f.findings)
+
+  def test_results_use_slots(self):
+    for obj in [self.f1, self.lic2, self.cat1]:
+      self.assertFalse(hasattr(obj, "__dict__"))
+      with self.assertRaises(AttributeError):
+        object.__setattr__(obj, "extra", "nope")
+
+  def test_results_can_be_pickled(self):
+    cat = pickle.loads(pickle.dumps(self.cat1))
+    self.assertEqual("Attribution", cat.name)
+    self.assertEqual(2, cat.numFiles)
+    f2 = cat.licenses[0].files[1]
+    self.assertEqual("/tmp/f2", f2.path)
+    self.assertEqual({"extension": "yes"}, f2.findings)
+    with self.assertRaises(AttributeError):
+      f2.path = "/tmp/other"
+    with self.assertRaises(TypeError):
+      f2.findings["thirdparty"] = "yes"
@@ -0,0 +1,136 @@
+# tests/unit_reportrollup.py
+#
+# Unit test for spdxLicenseManager: rolling up directories in reports.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from slm.reports.results import (ResultCategory, ResultDirectory, ResultFile,
+  ResultLicense)
+from slm.reports.rollup import rollUpResults
+
+class ReportRollupTestSuite(unittest.TestCase):
+  """spdxLicenseManager directory roll-up unit test suite."""
+
+  def setUp(self):
+    self.nextID = 1
+
+  ##### Test helpers to mimic results from analysis
+
+  def _file(self, path, license_id, findings=None):
+    f = ResultFile(_id=self.nextID, scan_id=1, license_id=license_id,
+      path=path, findings=findings)
+    self.nextID += 1
+    return f
+
+  def _results(self, mitPaths, gplPaths, gplFindings=None):
+    mit = tuple(self._file(p, 1) for p in sorted(mitPaths))
+    gpl = tuple(self._file(p, 2, gplFindings) for p in sorted(gplPaths))
+    return (
+      ResultCategory(_id=1, name="Attribution", licenses=(
+        ResultLicense(_id=1, name="MIT", files=mit),
+      )),
+      ResultCategory(_id=2, name="Copyleft", licenses=(
+        ResultLicense(_id=2, name="GPL-2.0", files=gpl),
+        ResultLicense(_id=3, name="GPL-3.0", files=()),
+      )),
+    )
+
+  def _rows(self, lic):
+    return [(row.path, row.numFiles) for row in lic.files]
+
+  ##### Test cases below
+
+  def test_rolls_up_highest_directory_with_one_license(self):
+    results = self._results(
+      ["vendor/foo/a.c", "vendor/foo/b/c.c", "vendor/foo/b/d.c",
+       "vendor/bar/one.c", "src/x.c", "README"],
+      ["src/y.c", "vendor/baz/q.c", "vendor/baz/r.c"])
+    rolled = rollUpResults(results)
+    mit = rolled[0].licenses[0]
+    gpl = rolled[1].licenses[0]
+    self.assertEqual([("README", 1), ("src/x.c", 1), ("vendor/bar/one.c", 1),
+      ("vendor/foo/**", 3)], self._rows(mit))
+    self.assertEqual([("src/y.c", 1), ("vendor/baz/**", 2)], self._rows(gpl))
+
+  def test_rolled_up_rows_are_directories_with_license(self):
+    rolled = rollUpResults(self._results(["lib/a.c", "lib/b.c"], ["x.c"]))
+    row = rolled[0].licenses[0].files[0]
+    self.assertIsInstance(row, ResultDirectory)
+    self.assertEqual("lib/**", row.path)
+    self.assertEqual(1, row.license_id)
+    self.assertEqual(2, row.numFiles)
+
+  def test_keeps_original_counts(self):
+    rolled = rollUpResults(self._results(["lib/a.c", "lib/b.c"], ["x.c"]))
+    self.assertEqual(2, rolled[0].numFiles)
+    self.assertEqual(2, rolled[0].licenses[0].numFiles)
+    self.assertEqual(1, rolled[1].numFiles)
+    self.assertEqual(0, rolled[1].licenses[1].numFiles)
+
+  def test_does_not_roll_up_directory_with_one_file(self):
+    rolled = rollUpResults(self._results(["lib/a.c"], ["src/y.c"]))
+    self.assertEqual([("lib/a.c", 1)], self._rows(rolled[0].licenses[0]))
+
+  def test_does_not_roll_up_whole_tree(self):
+    rolled = rollUpResults(self._results(["a.c", "b.c"], []))
+    self.assertEqual([("a.c", 1), ("b.c", 1)], self._rows(rolled[0].licenses[0]))
+
+  def test_rolls_up_top_directory_of_absolute_paths(self):
+    rolled = rollUpResults(self._results(["/tmp/a.c", "/tmp/b.c"], []))
+    self.assertEqual([("/tmp/**", 2)], self._rows(rolled[0].licenses[0]))
+
+  def test_mixed_subdirectory_stops_parent_roll_up(self):
+    results = self._results(["lib/a.c", "lib/sub/b.c", "lib/sub/c.c"],
+      ["lib/sub/d.c"])
+    rolled = rollUpResults(results)
+    self.assertEqual([("lib/a.c", 1), ("lib/sub/b.c", 1), ("lib/sub/c.c", 1)],
+      self._rows(rolled[0].licenses[0]))
+    self.assertEqual([("lib/sub/d.c", 1)], self._rows(rolled[1].licenses[0]))
+
+  def test_similar_directory_names_are_kept_apart(self):
+    # "lib-extra" sorts between "lib/..." paths by string order
+    rolled = rollUpResults(self._results(["lib/a.c", "lib/b.c",
+      "lib-extra/c.c", "lib-extra/d.c"], ["lib.c"]))
+    self.assertEqual([("lib-extra/**", 2), ("lib/**", 2)],
+      self._rows(rolled[0].licenses[0]))
+
+  def test_can_roll_up_by_findings(self):
+    results = self._results(["x.c"], ["vendor/a.c", "vendor/b.c"],
+      gplFindings={"thirdparty": "yes"})
+    rolled = rollUpResults(results)
+    row = rolled[1].licenses[0].files[0]
+    self.assertEqual("vendor/**", row.path)
+    self.assertEqual({"thirdparty": "yes"}, row.findings)
+
+  def test_different_findings_stop_roll_up_only_if_by_findings(self):
+    results = self._results([], ["vendor/a.c"], gplFindings={"thirdparty": "yes"})
+    gpl = results[1].licenses[0]
+    files = gpl.files + (self._file("vendor/b.c", 2),)
+    results = (results[0], ResultCategory(_id=2, name="Copyleft",
+      licenses=(ResultLicense(_id=2, name="GPL-2.0", files=files),)))
+    self.assertEqual([("vendor/a.c", 1), ("vendor/b.c", 1)],
+      self._rows(rollUpResults(results)[1].licenses[0]))
+    self.assertEqual([("vendor/**", 2)],
+      self._rows(rollUpResults(results, byFindings=False)[1].licenses[0]))
+
+  def test_can_roll_up_streamed_files(self):
+    mit = ResultLicense(_id=1, name="MIT", numFiles=2,
+      files=iter([self._file("lib/a.c", 1), self._file("lib/b.c", 1)]))
+    results = (ResultCategory(_id=1, name="Attribution", licenses=(mit,)),)
+    rolled = rollUpResults(results)
+    self.assertEqual([("lib/**", 2)], self._rows(rolled[0].licenses[0]))
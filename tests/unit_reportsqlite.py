@@ -0,0 +1,132 @@
+# tests/unit_reportsqlite.py
+#
+# Unit test for spdxLicenseManager: exporting results to SQLite databases.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sqlite3
+import unittest
+from unittest import mock
+from testfixtures import TempDirectory
+
+from slm.projectdb import ProjectDB
+from slm.reports.common import ReportFileError, ReportNotReadyError
+from slm.reports.sqlite import SQLiteReporter
+from slm.reports.results import ResultCategory, ResultFile, ResultLicense
+
+class ReportSQLiteTestSuite(unittest.TestCase):
+  """spdxLicenseManager SQLite export unit test suite."""
+
+  def setUp(self):
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+
+    # create reporter
+    self.reporter = SQLiteReporter(db=self.db)
+
+    # and a temp directory for output files
+    self.td = TempDirectory()
+    self.path = os.path.join(self.td.path, "report.sqlite")
+
+  def tearDown(self):
+    self.td.cleanup()
+
+  ##### Test helpers to mimic results from analysis
+
+  def _getAnalysisResults(self):
+    self.f1 = ResultFile(_id=1, scan_id=1, license_id=2, path="/tmp/f1",
+      sha1="aa", md5="bb", sha256="cc")
+    self.f2 = ResultFile(_id=2, scan_id=3, license_id=1, path="/tmp/f2")
+    self.f3 = ResultFile(_id=3, scan_id=1, license_id=6, path="/tmp/f4.png",
+      findings={"extension": "yes", "emptyfile": "yes"})
+    self.cat2 = ResultCategory(_id=2, name="catID2", licenses=(
+      ResultLicense(_id=2, name="another lic2cat2", files=(self.f1,)),
+      ResultLicense(_id=1, name="lic1cat2", files=(self.f2,)),
+      ResultLicense(_id=3, name="nope lic3cat2", files=()),
+    ))
+    self.cat4 = ResultCategory(_id=4, name="No license found", licenses=(
+      ResultLicense(_id=6, name="No license found", files=(self.f3,)),
+    ))
+    return (self.cat2, self.cat4)
+
+  def _saveAndQuery(self, *queries):
+    self.reporter.setResults(self._getAnalysisResults())
+    self.reporter.save(path=self.path)
+    conn = sqlite3.connect(self.path)
+    try:
+      return [conn.execute(q).fetchall() for q in queries]
+    finally:
+      conn.close()
+
+  ##### Test cases below
+
+  def test_new_reporter_is_in_reset_state(self):
+    self.assertIsNone(self.reporter.results)
+    self.assertEqual({}, self.reporter.kwConfig)
+
+  def test_exports_categories_and_licenses_in_report_order(self):
+    cats, lics = self._saveAndQuery(
+      "SELECT * FROM categories ORDER BY report_order",
+      "SELECT * FROM licenses ORDER BY report_order")
+    self.assertEqual([(2, "catID2", 0, 2), (4, "No license found", 1, 1)],
+      cats)
+    self.assertEqual([
+      (2, "another lic2cat2", 2, 0, 1),
+      (1, "lic1cat2", 2, 1, 1),
+      (3, "nope lic3cat2", 2, 2, 0),
+      (6, "No license found", 4, 3, 1),
+    ], lics)
+
+  def test_exports_files_and_findings(self):
+    files, findings = self._saveAndQuery(
+      "SELECT * FROM files ORDER BY _id",
+      "SELECT * FROM findings ORDER BY file_id, finding")
+    self.assertEqual([
+      (1, 1, 2, "/tmp/f1", "aa", "bb", "cc"),
+      (2, 3, 1, "/tmp/f2", None, None, None),
+      (3, 1, 6, "/tmp/f4.png", None, None, None),
+    ], files)
+    self.assertEqual([(3, "emptyfile", "yes"), (3, "extension", "yes")],
+      findings)
+
+  @mock.patch.object(SQLiteReporter, 'BATCH_SIZE', 2)
+  def test_exports_all_files_across_batches(self):
+    count, = self._saveAndQuery("SELECT COUNT(*) FROM files")
+    self.assertEqual([(3,)], count)
+
+  def test_replacing_export_starts_from_empty_database(self):
+    self._saveAndQuery("SELECT 1")
+    reporter = SQLiteReporter(db=self.db)
+    reporter.setResults(self._getAnalysisResults())
+    with self.assertRaises(ReportFileError):
+      reporter.save(path=self.path)
+    reporter.save(path=self.path, replace=True)
+    conn = sqlite3.connect(self.path)
+    self.assertEqual([(3,)], conn.execute("SELECT COUNT(*) FROM files").fetchall())
+    conn.close()
+
+  def test_save_fails_if_results_not_ready(self):
+    with self.assertRaises(ReportNotReadyError):
+      self.reporter.save(path=self.path)
+
+  @mock.patch('slm.reports.sqlite.os.access', return_value=False)
+  def test_save_check_fails_if_no_write_permission_for_path(self, os_access):
+    self.reporter.setResults(self._getAnalysisResults())
+    with self.assertRaises(ReportFileError):
+      self.reporter._saveCheck(path="/tmp/readonly/report.sqlite")
@@ -0,0 +1,106 @@
+# tests/unit_reporttrends.py
+#
+# Unit test for spdxLicenseManager: counting files by license per month.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import datetime
+
+from slm.projectdb import ProjectDB
+from slm.datatypes import Category, File, License, Scan, Subproject
+from slm.reports.common import ReportAnalysisError
+from slm.reports.trends import TrendCounter
+
+class ReportTrendsTestSuite(unittest.TestCase):
+  """spdxLicenseManager license trends unit test suite."""
+
+  def setUp(self):
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+
+    # insert sample data
+    self.insertSampleData()
+
+    self.counter = TrendCounter(db=self.db)
+
+  def tearDown(self):
+    self.db.closeDB()
+    self.db = None
+
+  def insertSampleData(self):
+    self.db.session.bulk_save_objects([
+      Category(_id=1, name="a category", order=1),
+      Category(_id=2, name="cat", order=2),
+      License(_id=1, name="DoAnything", category_id=1),
+      License(_id=2, name="HarshEULA", category_id=2),
+      License(_id=3, name="DoAnythingNoncommercial", category_id=1),
+      Subproject(_id=1, name="sub1", desc="subproject 1"),
+      Subproject(_id=2, name="sub2", desc="subproject 2"),
+      Scan(_id=1, subproject_id=1, scan_dt=datetime.date(2017, 1, 10),
+        desc="sub1 January scan"),
+      Scan(_id=2, subproject_id=2, scan_dt=datetime.date(2017, 1, 12),
+        desc="sub2 January scan"),
+      Scan(_id=3, subproject_id=1, scan_dt=datetime.date(2017, 2, 10),
+        desc="sub1 February scan"),
+      # rescan later in February replaces the earlier one
+      Scan(_id=4, subproject_id=1, scan_dt=datetime.date(2017, 2, 20),
+        desc="sub1 February rescan"),
+    ])
+    self.db.session.bulk_save_objects([
+      File(_id=1, scan_id=1, path="/a.c", license_id=1),
+      File(_id=2, scan_id=1, path="/b.c", license_id=2),
+      File(_id=3, scan_id=2, path="/a.c", license_id=1),
+      File(_id=4, scan_id=3, path="/a.c", license_id=1),
+      File(_id=5, scan_id=4, path="/a.c", license_id=1),
+      File(_id=6, scan_id=4, path="/b.c", license_id=3),
+      File(_id=7, scan_id=4, path="/c.c", license_id=3),
+    ])
+    self.db.session.commit()
+
+  def test_can_count_trends_for_subproject(self):
+    trends = self.counter.countTrends(subproject="sub1")
+    self.assertEqual(["2017-01", "2017-02"], trends.months)
+    self.assertEqual({"2017-01": [1], "2017-02": [4]}, trends.scanIDs)
+    self.assertEqual({1: {"2017-01": 1, "2017-02": 1}, 2: {"2017-01": 1},
+      3: {"2017-02": 2}}, trends.licenseCounts)
+    self.assertEqual({1: {"2017-01": 1, "2017-02": 3}, 2: {"2017-01": 1}},
+      trends.categoryCounts)
+    self.assertEqual({"2017-01": 2, "2017-02": 3}, trends.totals)
+
+  def test_can_count_trends_across_whole_project(self):
+    trends = self.counter.countTrends()
+    self.assertEqual({"2017-01": [1, 2], "2017-02": [4]}, trends.scanIDs)
+    self.assertEqual({"2017-01": 2, "2017-02": 1}, trends.licenseCounts[1])
+    self.assertEqual({"2017-01": 3, "2017-02": 3}, trends.totals)
+
+  def test_can_limit_trends_to_month_range(self):
+    trends = self.counter.countTrends(fromMonth="2017-02", toMonth="2017-12")
+    self.assertEqual(["2017-02"], trends.months)
+    trends = self.counter.countTrends(toMonth="2017-01")
+    self.assertEqual(["2017-01"], trends.months)
+
+  def test_trends_are_empty_if_no_scans_in_range(self):
+    trends = self.counter.countTrends(fromMonth="2018-01")
+    self.assertEqual([], trends.months)
+    self.assertEqual({}, trends.licenseCounts)
+    self.assertEqual({}, trends.totals)
+
+  def test_cannot_count_trends_for_unknown_subproject(self):
+    with self.assertRaises(ReportAnalysisError):
+      self.counter.countTrends(subproject="subX")
@@ -23,12 +23,14 @@ from unittest import mock
 from collections import OrderedDict
 import datetime
 
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
+from testfixtures import TempDirectory
 
-from slm.datatypes import Category, File, License, Scan, Subproject
 from slm.projectdb import ProjectDB, ProjectDBQueryError
-from slm.reports.common import ReportFileError, ReportNotReadyError
+from slm.reports.common import (ReportAnalysisError, ReportFileError,
+  ReportNotReadyError)
 from slm.reports.xlsx import XlsxReporter
+from slm.reports.results import ResultCategory, ResultFile, ResultLicense
 
 class ReportXlsxTestSuite(unittest.TestCase):
   """spdxLicenseManager Xlsx reporting unit test suite."""
@@ -47,181 +49,55 @@ class ReportXlsxTestSuite(unittest.TestCase):
 
   ##### Test helpers to mimic results from analysis
 
-  def _buildCategories(self, results):
-    self.cat2 = Category()
-    self.cat2._id = 2
-    self.cat2.name = "catID2"
-    self.cat2.order = 1
-    self.cat2.licensesSorted = OrderedDict()
-    self.cat2.hasFiles = True
-    results[2] = self.cat2
+  def _buildFiles(self):
+    # should sort alphabetically by path before f1
+    self.f2 = ResultFile(_id=2, scan_id=1, license_id=2, path="/first/tmp/f2")
+    self.f1 = ResultFile(_id=1, scan_id=1, license_id=2, path="/tmp/f1")
 
-    # no files, cat3 should not appear in reports
-    self.cat3 = Category()
-    self.cat3._id = 3
-    self.cat3.name = "catID3"
-    self.cat3.order = 2
-    self.cat3.licensesSorted = OrderedDict()
-    self.cat3.hasFiles = False
-    results[3] = self.cat3
-
-    self.cat1 = Category()
-    self.cat1._id = 1
-    self.cat1.name = "catID1"
-    self.cat1.order = 3
-    self.cat1.licensesSorted = OrderedDict()
-    self.cat1.hasFiles = True
-    results[1] = self.cat1
-
-    self.cat4 = Category()
-    self.cat4._id = 4
-    self.cat4.name = "No license found"
-    self.cat4.order = 4
-    self.cat4.licensesSorted = OrderedDict()
-    self.cat4.hasFiles = True
-    results[4] = self.cat4
-
-  def _buildLicenses(self, results):
-    # should sort alphabetically before lic1cat2 in reports
-    self.lic2cat2 = License()
-    self.lic2cat2._id = 2
-    self.lic2cat2.name = "another lic2cat2"
-    self.lic2cat2.category_id = 2
-    self.lic2cat2.filesSorted = OrderedDict()
-    self.lic2cat2.hasFiles = True
-    self.cat2.licensesSorted[2] = self.lic2cat2
-
-    self.lic1cat2 = License()
-    self.lic1cat2._id = 1
-    self.lic1cat2.name = "lic1cat2"
-    self.lic1cat2.category_id = 2
-    self.lic1cat2.filesSorted = OrderedDict()
-    self.lic1cat2.hasFiles = True
-    self.cat2.licensesSorted[1] = self.lic1cat2
+    # should sort after f2 and f1 b/c license ID sorts after theirs
+    self.f3 = ResultFile(_id=3, scan_id=1, license_id=1, path="/earliest/tmp/f3")
+    self.f4 = ResultFile(_id=4, scan_id=1, license_id=1, path="/tmp/f4")
+    self.f5 = ResultFile(_id=5, scan_id=1, license_id=5, path="/tmp/f5")
+    self.f6 = ResultFile(_id=6, scan_id=1, license_id=6, path="/tmp/f6.png",
+      findings={"extension": "yes"})
 
-    # no files, lic3cat2 should not appear in reports
-    self.lic3cat2 = License()
-    self.lic3cat2._id = 3
-    self.lic3cat2.name = "nope lic3cat2"
-    self.lic3cat2.category_id = 2
-    self.lic3cat2.filesSorted = OrderedDict()
-    self.lic3cat2.hasFiles = False
-    self.cat2.licensesSorted[3] = self.lic3cat2
+    # add some more files for testing findings
+    self.f7 = ResultFile(_id=7, scan_id=1, license_id=6,
+      path="/tmp/__init__.py", findings={"emptyfile": "yes"})
+    self.f8 = ResultFile(_id=8, scan_id=1, license_id=6,
+      path="/tmp/vendor/dep.py", findings={"thirdparty": "yes"})
+    self.f9 = ResultFile(_id=9, scan_id=1, license_id=6, path="/tmp/code.py")
 
+  def _buildLicenses(self):
+    # should sort alphabetically before lic1cat2 in reports
+    self.lic2cat2 = ResultLicense(_id=2, name="another lic2cat2",
+      files=(self.f2, self.f1))
+    self.lic1cat2 = ResultLicense(_id=1, name="lic1cat2",
+      files=(self.f3, self.f4))
+    # no files, lic3cat2 should not appear in reports
+    self.lic3cat2 = ResultLicense(_id=3, name="nope lic3cat2", files=())
     # no files, lic4cat3 should not appear in reports
-    self.lic4cat3 = License()
-    self.lic4cat3._id = 4
-    self.lic4cat3.name = "nope lic4cat3"
-    self.lic4cat3.category_id = 3
-    self.lic4cat3.filesSorted = OrderedDict()
-    self.lic4cat3.hasFiles = False
-    self.cat3.licensesSorted[4] = self.lic4cat3
-
-    self.lic5cat1 = License()
-    self.lic5cat1._id = 5
-    self.lic5cat1.name = "a license"
-    self.lic5cat1.category_id = 1
-    self.lic5cat1.filesSorted = OrderedDict()
-    self.lic5cat1.hasFiles = True
-    self.cat1.licensesSorted[5] = self.lic5cat1
+    self.lic4cat3 = ResultLicense(_id=4, name="nope lic4cat3", files=())
+    self.lic5cat1 = ResultLicense(_id=5, name="a license", files=(self.f5,))
 
     # no license found option, for analysis outputs
-    self.noLicFound = License()
-    self.noLicFound._id = 6
-    self.noLicFound.name = "No license found"
-    self.noLicFound.category_id = 4
-    self.noLicFound.filesSorted = OrderedDict()
-    self.noLicFound.hasFiles = True
-    self.cat4.licensesSorted[6] = self.noLicFound
-
-  def _buildFiles(self, results):
-    # should sort alphabetically by path before f1
-    self.f2 = File()
-    self.f2._id = 2
-    self.f2.path = "/first/tmp/f2"
-    self.f2.scan_id = 1
-    self.f2.license_id = 2
-    self.f2.findings = {}
-    self.lic2cat2.filesSorted[2] = self.f2
-
-    self.f1 = File()
-    self.f1._id = 1
-    self.f1.path = "/tmp/f1"
-    self.f1.scan_id = 1
-    self.f1.license_id = 2
-    self.f1.findings = {}
-    self.lic2cat2.filesSorted[1] = self.f1
-
-    # should sort after f2 and f1 b/c license ID sorts after theirs
-    self.f3 = File()
-    self.f3._id = 3
-    self.f3.path = "/earliest/tmp/f3"
-    self.f3.scan_id = 1
-    self.f3.license_id = 1
-    self.f3.findings = {}
-    self.lic1cat2.filesSorted[3] = self.f3
-
-    self.f4 = File()
-    self.f4._id = 4
-    self.f4.path = "/tmp/f4"
-    self.f4.scan_id = 1
-    self.f4.license_id = 1
-    self.f4.findings = {}
-    self.lic1cat2.filesSorted[4] = self.f4
-
-    self.f5 = File()
-    self.f5._id = 5
-    self.f5.path = "/tmp/f5"
-    self.f5.scan_id = 1
-    self.f5.license_id = 5
-    self.f5.findings = {}
-    self.lic5cat1.filesSorted[5] = self.f5
-
-    self.f6 = File()
-    self.f6._id = 6
-    self.f6.path = "/tmp/f6.png"
-    self.f6.scan_id = 1
-    self.f6.license_id = 6
-    self.f6.findings = {
-      "extension": "yes",
-    }
-    self.noLicFound.filesSorted[6] = self.f6
-
-    # add some more files for testing findings
-    self.f7 = File()
-    self.f7._id = 7
-    self.f7.path = "/tmp/__init__.py"
-    self.f7.scan_id = 1
-    self.f7.license_id = 6
-    self.f7.findings = {
-      "emptyfile": "yes",
-    }
-    self.noLicFound.filesSorted[7] = self.f7
-
-    self.f8 = File()
-    self.f8._id = 8
-    self.f8.path = "/tmp/vendor/dep.py"
-    self.f8.scan_id = 1
-    self.f8.license_id = 6
-    self.f8.findings = {
-      "thirdparty": "yes",
-    }
-    self.noLicFound.filesSorted[8] = self.f8
+    self.noLicFound = ResultLicense(_id=6, name="No license found",
+      files=(self.f6, self.f7, self.f8, self.f9))
 
-    self.f9 = File()
-    self.f9._id = 9
-    self.f9.path = "/tmp/code.py"
-    self.f9.scan_id = 1
-    self.f9.license_id = 6
-    self.f9.findings = {}
-    self.noLicFound.filesSorted[9] = self.f9
+  def _buildCategories(self):
+    self.cat2 = ResultCategory(_id=2, name="catID2",
+      licenses=(self.lic2cat2, self.lic1cat2, self.lic3cat2))
+    # no files, cat3 should not appear in reports
+    self.cat3 = ResultCategory(_id=3, name="catID3", licenses=(self.lic4cat3,))
+    self.cat1 = ResultCategory(_id=1, name="catID1", licenses=(self.lic5cat1,))
+    self.cat4 = ResultCategory(_id=4, name="No license found",
+      licenses=(self.noLicFound,))
 
   def _getAnalysisResults(self):
-    results = OrderedDict()
-    self._buildCategories(results)
-    self._buildLicenses(results)
-    self._buildFiles(results)
-    return results
+    self._buildFiles()
+    self._buildLicenses()
+    self._buildCategories()
+    return (self.cat2, self.cat3, self.cat1, self.cat4)
 
   ##### Test cases below
 
@@ -438,33 +314,245 @@ class ReportXlsxTestSuite(unittest.TestCase):
     results = self._getAnalysisResults()
 
     # hand the "No license found" category to the annotate function
-    self.reporter._annotateNoLicenseFound(
+    newCat = self.reporter._annotateNoLicenseFound(
       catNoLicense=self.cat4,
       nextLicID=7,
     )
 
-    # check that it has been modified as expected, with new licenses,
-    # and with the expected files within those licenses
+    # check that a modified copy was returned as expected, with new
+    # licenses, and with the expected files within those licenses
+    self.assertEqual(4, newCat._id)
+    self.assertEqual("No license found", newCat.name)
+    self.assertEqual(4, len(newCat.licenses))
+    self.assertEqual(4, newCat.numFiles)
+
+    noLic = newCat.licenses[0]
+    self.assertEqual("No license found", noLic.name)
+    self.assertEqual((self.f9,), noLic.files)
 
     # this will temporarily get assigned the next available license ID
     # (only in memory, not committed to db)
-    noLicExt = self.cat4.licensesSorted[7]
+    noLicExt = newCat.licenses[1]
+    self.assertEqual(7, noLicExt._id)
     self.assertEqual("No license found - excluded file extension", noLicExt.name)
-    self.assertEqual(4, noLicExt.category_id)
     self.assertTrue(noLicExt.hasFiles)
-    self.assertEqual(noLicExt.filesSorted[6], self.f6)
+    self.assertEqual((self.f6,), noLicExt.files)
 
-    noLicEmpty = self.cat4.licensesSorted[8]
+    noLicEmpty = newCat.licenses[2]
+    self.assertEqual(8, noLicEmpty._id)
     self.assertEqual("No license found - empty file", noLicEmpty.name)
-    self.assertEqual(4, noLicEmpty.category_id)
     self.assertTrue(noLicEmpty.hasFiles)
-    self.assertEqual(noLicEmpty.filesSorted[7], self.f7)
+    self.assertEqual((self.f7,), noLicEmpty.files)
 
-    noLicThird = self.cat4.licensesSorted[9]
+    noLicThird = newCat.licenses[3]
+    self.assertEqual(9, noLicThird._id)
     self.assertEqual("No license found - third party directory", noLicThird.name)
-    self.assertEqual(4, noLicThird.category_id)
     self.assertTrue(noLicThird.hasFiles)
-    self.assertEqual(noLicThird.filesSorted[8], self.f8)
+    self.assertEqual((self.f8,), noLicThird.files)
+
+    # and the original shared results were not modified
+    self.assertEqual((self.noLicFound,), self.cat4.licenses)
+    self.assertEqual(4, len(self.noLicFound.files))
+
+  def test_set_results_annotates_no_lic_found_cat_without_modifying_results(self):
+    self.db.setConfigValue(key="analyze-extensions", value="yes")
+    results = self._getAnalysisResults()
+    self.reporter.setResults(results)
+    self.assertIs(self.cat2, self.reporter.results[0])
+    newCat = self.reporter.results[3]
+    self.assertIsNot(self.cat4, newCat)
+    self.assertEqual("No license found - excluded file extension",
+      newCat.licenses[1].name)
+    self.assertEqual((self.noLicFound,), self.cat4.licenses)
+
+  ##### Reporter streaming (write-only) tests
+
+  def _generateAndReloadStreamed(self, results):
+    self.reporter.setResults(results, streaming=True)
+    self.reporter.generate()
+    with TempDirectory() as td:
+      path = os.path.join(td.path, "report.xlsx")
+      self.reporter.save(path=path)
+      return load_workbook(path)
+
+  def test_can_generate_rolled_up_file_listings_if_config_set(self):
+    results = (ResultCategory(_id=1, name="cat", licenses=(
+      ResultLicense(_id=1, name="lic", files=(
+        ResultFile(_id=1, scan_id=1, license_id=1, path="README"),
+        ResultFile(_id=2, scan_id=1, license_id=1, path="lib/a.c"),
+        ResultFile(_id=3, scan_id=1, license_id=1, path="lib/b.c"),
+      )),
+    )),)
+    reporter = XlsxReporter(db=self.db, config={"report-rollup-dirs": "yes"})
+    reporter.setResults(results)
+    reporter.generate()
+
+    ws = reporter.wb['cat']
+    self.assertEqual("# of files", ws['C1'].value)
+    self.assertEqual("README", ws['A2'].value)
+    self.assertEqual(1, ws['C2'].value)
+    self.assertEqual("lib/**", ws['A3'].value)
+    self.assertEqual("lic", ws['B3'].value)
+    self.assertEqual(2, ws['C3'].value)
+    self.assertIsNone(ws['A4'].value)
+
+  def test_cannot_roll_up_streamed_results(self):
+    reporter = XlsxReporter(db=self.db, config={"report-rollup-dirs": "yes"})
+    # rolling up reads the results more than once, so it can't be streamed
+    with self.assertRaises(ReportAnalysisError):
+      reporter.setResults(self._getAnalysisResults(), streaming=True)
+
+  def test_can_set_results_for_streaming_with_write_only_workbook(self):
+    results = self._getAnalysisResults()
+    self.reporter.setResults(results, streaming=True)
+    self.assertTrue(self.reporter.wb.write_only)
+    self.assertTrue(self.reporter.streaming)
+    # streamed results aren't annotated until they are written
+    self.assertIs(results, self.reporter.results)
+
+  def test_can_generate_streamed_report_with_summary(self):
+    self.db.setConfigValue(key="report-include-summary", value="yes")
+    wb = self._generateAndReloadStreamed(self._getAnalysisResults())
+    self.assertEqual(
+      ["License summary", "catID2", "catID1", "No license found"],
+      wb.sheetnames
+    )
+    # file listings are the same as for non-streamed reports
+    ws = wb["catID2"]
+    self.assertEqual("File", ws['A1'].value)
+    self.assertEqual(16, ws['A1'].font.size)
+    self.assertTrue(ws['A1'].font.bold)
+    self.assertEqual("/first/tmp/f2", ws['A2'].value)
+    self.assertEqual("another lic2cat2", ws['B2'].value)
+    self.assertEqual(14, ws['A2'].font.size)
+    self.assertFalse(ws['A2'].font.bold)
+    self.assertTrue(ws['A2'].alignment.wrap_text)
+    self.assertEqual("/tmp/f4", ws['A5'].value)
+    self.assertEqual("lic1cat2", ws['B5'].value)
+    self.assertEqual(100, ws.column_dimensions["A"].width)
+    # and so is the summary sheet, though it was written last
+    ws = wb["License summary"]
+    self.assertEqual("License", ws['A1'].value)
+    self.assertEqual("# of files", ws['C1'].value)
+    self.assertEqual("catID2:", ws['A3'].value)
+    self.assertEqual("another lic2cat2", ws['B4'].value)
+    self.assertEqual(2, ws['C4'].value)
+    self.assertEqual("No license found", ws['B9'].value)
+    self.assertEqual(4, ws['C9'].value)
+    self.assertEqual("TOTAL", ws['A11'].value)
+    self.assertEqual(9, ws['C11'].value)
+    self.assertTrue(ws['C11'].font.bold)
+
+  def test_streamed_report_splits_no_lic_found_cat_for_findings(self):
+    self.db.setConfigValue(key="report-include-summary", value="yes")
+    self.db.setConfigValue(key="analyze-extensions", value="yes")
+    self.db.setConfigValue(key="analyze-thirdparty", value="yes")
+    wb = self._generateAndReloadStreamed(self._getAnalysisResults())
+    ws = wb["No license found"]
+    self.assertEqual(
+      [("/tmp/__init__.py", "No license found"),
+       ("/tmp/code.py", "No license found"),
+       ("/tmp/f6.png", "No license found - excluded file extension"),
+       ("/tmp/vendor/dep.py", "No license found - third party directory")],
+      [(ws[f'A{row}'].value, ws[f'B{row}'].value) for row in range(2, 6)])
+    ws = wb["License summary"]
+    self.assertEqual("No license found", ws['B9'].value)
+    self.assertEqual(2, ws['C9'].value)
+    self.assertEqual("No license found - excluded file extension", ws['B10'].value)
+    self.assertEqual(1, ws['C10'].value)
+    self.assertEqual("No license found - third party directory", ws['B11'].value)
+    self.assertEqual(1, ws['C11'].value)
+    self.assertEqual(9, ws['C13'].value)
+
+  def test_streamed_report_with_no_files_still_has_a_sheet(self):
+    wb = self._generateAndReloadStreamed(())
+    self.assertEqual(1, len(wb.sheetnames))
+
+  ##### Reporter sheet splitting tests
+
+  @mock.patch.object(XlsxReporter, 'MAX_SHEET_ROWS', 2)
+  def test_file_listings_roll_over_to_continuation_sheets(self):
+    results = self._getAnalysisResults()
+    self.reporter.setResults(results)
+    self.reporter.generate()
+    wb = self.reporter.wb
+    # continuation sheets come right after the category's first sheet
+    self.assertEqual(["catID2", "catID2 (2)", "catID2 (3)", "catID2 (4)",
+      "catID1", "No license found", "No license found (2)",
+      "No license found (3)", "No license found (4)"], wb.sheetnames)
+    ws = wb["catID2 (2)"]
+    self.assertEqual("File", ws['A1'].value)
+    self.assertTrue(ws['A1'].font.bold)
+    self.assertEqual("/tmp/f1", ws['A2'].value)
+    self.assertEqual("another lic2cat2", ws['B2'].value)
+    self.assertIsNone(ws['A3'].value)
+    self.assertEqual("/tmp/f4", wb["catID2 (4)"]['A2'].value)
+
+  @mock.patch.object(XlsxReporter, 'MAX_SHEET_ROWS', 3)
+  def test_streamed_file_listings_roll_over_to_continuation_sheets(self):
+    wb = self._generateAndReloadStreamed(self._getAnalysisResults())
+    self.assertEqual(["catID2", "catID2 (2)", "catID1", "No license found",
+      "No license found (2)"], wb.sheetnames)
+    ws = wb["catID2 (2)"]
+    self.assertEqual("File", ws['A1'].value)
+    self.assertEqual("/earliest/tmp/f3", ws['A2'].value)
+    self.assertEqual("/tmp/f4", ws['A3'].value)
+    self.assertEqual("lic1cat2", ws['B3'].value)
+
+  def test_continuation_sheet_titles_fit_excel_limit(self):
+    self.assertEqual("Copyleft (2)",
+      self.reporter._getContinuationSheetTitle("Copyleft", 2))
+    title = self.reporter._getContinuationSheetTitle("A" * 40, 12)
+    self.assertEqual(31, len(title))
+    self.assertTrue(title.endswith("A (12)"))
+
+  def test_can_get_category_workbook_path(self):
+    self.assertEqual("/tmp/reports/report-Copyleft.xlsx",
+      self.reporter._getCategoryWorkbookPath("/tmp/reports/report.xlsx",
+        "Copyleft"))
+    self.assertEqual("/tmp/report-Weak_strong.xlsx",
+      self.reporter._getCategoryWorkbookPath("/tmp/report.xlsx",
+        "Weak/strong"))
+
+  def _saveAndReloadSplit(self, streaming):
+    self.db.setConfigValue(key="report-xlsx-split-categories", value="yes")
+    self.reporter.setResults(self._getAnalysisResults(), streaming=streaming)
+    self.reporter.generate()
+    with TempDirectory() as td:
+      self.reporter.save(path=os.path.join(td.path, "report.xlsx"))
+      wbs = {}
+      for name in ["report", "report-catID2", "report-catID1",
+          "report-No license found"]:
+        wbs[name] = load_workbook(os.path.join(td.path, f"{name}.xlsx"))
+      self.assertEqual(4, len(os.listdir(td.path)))
+      return wbs
+
+  def test_can_write_one_workbook_per_category(self):
+    wbs = self._saveAndReloadSplit(streaming=False)
+    # main workbook always has the summary, even though it wasn't configured
+    self.assertEqual(["License summary"], wbs["report"].sheetnames)
+    self.assertEqual(9, wbs["report"]["License summary"]['C11'].value)
+    self.assertEqual(["catID2"], wbs["report-catID2"].sheetnames)
+    self.assertEqual("/tmp/f4", wbs["report-catID2"]["catID2"]['A5'].value)
+    self.assertEqual(["No license found"],
+      wbs["report-No license found"].sheetnames)
+
+  def test_can_write_one_workbook_per_category_when_streaming(self):
+    wbs = self._saveAndReloadSplit(streaming=True)
+    self.assertEqual(["License summary"], wbs["report"].sheetnames)
+    self.assertEqual(9, wbs["report"]["License summary"]['C11'].value)
+    self.assertEqual(["catID2"], wbs["report-catID2"].sheetnames)
+    self.assertEqual("/tmp/f4", wbs["report-catID2"]["catID2"]['A5'].value)
+    self.assertEqual("/tmp/f5", wbs["report-catID1"]["catID1"]['A2'].value)
+
+  def test_save_check_fails_if_category_workbook_already_exists(self):
+    self.db.setConfigValue(key="report-xlsx-split-categories", value="yes")
+    self.reporter.setResults(self._getAnalysisResults())
+    self.reporter.generate()
+    with TempDirectory() as td:
+      td.write("report-catID1.xlsx", b"")
+      with self.assertRaises(ReportFileError):
+        self.reporter._saveCheck(path=os.path.join(td.path, "report.xlsx"))
 
   ##### Reporter save function tests
 
@@ -508,9 +596,11 @@ class ReportXlsxTestSuite(unittest.TestCase):
     with self.assertRaises(ReportNotReadyError):
       self.reporter._saveCheck(path="whatever")
 
+  @mock.patch('slm.reports.xlsx.atomicReportPath')
   @mock.patch('slm.reports.xlsx.openpyxl.workbook.Workbook.save')
   @mock.patch('slm.reports.xlsx.XlsxReporter._saveCheck')
-  def test_save_calls_save_checker(self, check_mock, save_mock):
+  def test_save_calls_save_checker(self, check_mock, save_mock, atomic_mock):
+    atomic_mock.return_value.__enter__.return_value = ".something.tmp"
     results = self._getAnalysisResults()
     self.reporter.setResults(results)
     self.reporter.generate()
@@ -519,7 +609,8 @@ class ReportXlsxTestSuite(unittest.TestCase):
     replace = True
     self.reporter.save(path=path, replace=replace)
     check_mock.assert_called_with(path=path, replace=replace)
-    save_mock.assert_called_with(path)
+    atomic_mock.assert_called_with(path)
+    save_mock.assert_called_with(".something.tmp")
 
   ##### Reporter misc helper function tests
 
@@ -529,13 +620,14 @@ class ReportXlsxTestSuite(unittest.TestCase):
     self.assertEqual(6, maxLicID)
 
   def test_can_create_temp_license(self):
-    lic = self.reporter._createTempLicense(catID=4, nextLicID=7,
-      name="No license found - blah")
+    results = self._getAnalysisResults()
+    lic = self.reporter._createTempLicense(nextLicID=7,
+      name="No license found - blah", files=(self.f6,))
+    self.assertIsInstance(lic, ResultLicense)
     self.assertEqual(7, lic._id)
-    self.assertEqual(4, lic.category_id)
     self.assertEqual("No license found - blah", lic.name)
     self.assertTrue(lic.hasFiles)
-    self.assertEqual(OrderedDict(), lic.filesSorted)
+    self.assertEqual((self.f6,), lic.files)
 
   def test_will_strip_licenseref_prefix_if_requested(self):
     licName = "LicenseRef-blah-1 AND Apache-2.0 AND LicenseRef-hi"
@@ -17,12 +17,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import errno
+import io
 import os
+import tarfile
 import unittest
 from unittest import mock
+import zipfile
+from testfixtures import TempDirectory
 
 from slm.retriever import (Retriever, RetrieverConfigError,
-  RetrieverNotReadyError)
+  RetrieverNotReadyError, _DateSearch, _SearchMatcher)
 from slm.datatypes import Subproject
 
 ##### helper for testing _getFiles and prepareFiles
@@ -30,8 +35,21 @@ TFILES = ['fileone.spdx', 'filetwo', 'hello.sC.blah2018-03-17.blah.spdx']
 TDIRS  = ['dirone', 'dirtwo', 'dirthree']
 TALL   = TFILES + TDIRS
 
-def side_effect_isfile(path):
-  return os.path.split(path)[1] in TFILES
+def fake_scandir(names, files):
+  # returns a replacement for os.scandir listing names in a flat directory,
+  # where only those in files are files and the rest are directories
+  def scandir(path):
+    entries = []
+    for name in names:
+      entry = mock.Mock()
+      entry.name = name
+      entry.is_file.return_value = name in files
+      entry.is_dir.return_value = name not in files
+      entries.append(entry)
+    it = mock.MagicMock()
+    it.__enter__.return_value = iter(entries)
+    return it
+  return scandir
 
 ##### helper for testing createResults
 MOVEFILES = [
@@ -178,42 +196,37 @@ class RetrieverTestSuite(unittest.TestCase):
     # no .spdx extension
     self.assertFalse(self.retriever._testFilename(filename="hello-2018-03-08", spdx_search=spdx_search, datestr=datestr))
 
-  @mock.patch("slm.retriever.os.path.isfile", side_effect=side_effect_isfile)
-  @mock.patch("slm.retriever.os.listdir", return_value=TALL)
-  def test_can_get_files_from_search_directory(self, mock_listdir, mock_isfile):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(TALL, TFILES))
+  def test_can_get_files_from_search_directory(self, mock_scandir):
     files = self.retriever._getFiles(search_dir="/tmp/fake/whatever")
     self.assertEqual(TFILES, files)
 
   @mock.patch("slm.retriever.os.path.isdir", return_value=True)
-  @mock.patch("slm.retriever.os.path.isfile", side_effect=side_effect_isfile)
-  @mock.patch("slm.retriever.os.listdir", return_value=TALL)
-  def test_prepare_fails_if_subprojects_not_set(self, mock_listdir, mock_isfile, mock_isdir):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(TALL, TFILES))
+  def test_prepare_fails_if_subprojects_not_set(self, mock_scandir, mock_isdir):
     self.retriever.setSearchDir('/tmp/fake/whatever')
     self.retriever.setDatestr(datestr='2018-03')
     with self.assertRaises(RetrieverNotReadyError):
       self.retriever.prepareFiles()
 
   @mock.patch("slm.retriever.os.path.isdir", return_value=True)
-  @mock.patch("slm.retriever.os.path.isfile", side_effect=side_effect_isfile)
-  @mock.patch("slm.retriever.os.listdir", return_value=TALL)
-  def test_prepare_fails_if_datestr_not_set(self, mock_listdir, mock_isfile, mock_isdir):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(TALL, TFILES))
+  def test_prepare_fails_if_datestr_not_set(self, mock_scandir, mock_isdir):
     self.retriever.setSearchDir('/tmp/fake/whatever')
     self.retriever.addSubproject(name='subC', spdx_search='sC', _id=1)
     with self.assertRaises(RetrieverNotReadyError):
       self.retriever.prepareFiles()
 
-  @mock.patch("slm.retriever.os.path.isfile", side_effect=side_effect_isfile)
-  @mock.patch("slm.retriever.os.listdir", return_value=TALL)
-  def test_prepare_fails_if_search_dir_not_set(self, mock_listdir, mock_isfile):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(TALL, TFILES))
+  def test_prepare_fails_if_search_dir_not_set(self, mock_scandir):
     self.retriever.setDatestr(datestr='2018-03')
     self.retriever.addSubproject(name='subC', spdx_search='sC', _id=1)
     with self.assertRaises(RetrieverNotReadyError):
       self.retriever.prepareFiles()
 
   @mock.patch("slm.retriever.os.path.isdir", return_value=True)
-  @mock.patch("slm.retriever.os.path.isfile", side_effect=side_effect_isfile)
-  @mock.patch("slm.retriever.os.listdir", return_value=TALL)
-  def test_cannot_prepare_files_twice(self, mock_listdir, mock_isfile, mock_isdir):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(TALL, TFILES))
+  def test_cannot_prepare_files_twice(self, mock_scandir, mock_isdir):
     self.retriever.setSearchDir('/tmp/fake/whatever')
     self.retriever.addSubproject(name='subC', spdx_search='sC', _id=1)
     self.retriever.setDatestr(datestr='2018-03')
@@ -222,25 +235,26 @@ class RetrieverTestSuite(unittest.TestCase):
       self.retriever.prepareFiles()
 
   @mock.patch("slm.retriever.os.path.isdir", return_value=True)
-  @mock.patch("slm.retriever.os.path.isfile", side_effect=side_effect_isfile)
-  @mock.patch("slm.retriever.os.listdir", return_value=TALL)
-  @mock.patch("slm.retriever.Retriever._testFilename")
-  def test_prepare_calls_tester_for_each_file_in_search_directory(self, mock_testfilename, mock_listdir, mock_isfile, mock_isdir):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(TALL, TFILES))
+  def test_prepare_matches_every_subproject_found_in_each_filename(self, mock_scandir, mock_isdir):
     self.retriever.setSearchDir('/tmp/fake/whatever')
-    self.retriever.addSubproject(name='subC', spdx_search='sC', _id=1)
+    # overlapping search strings, one spanning the directory and filename,
+    # and one only found in the directory
+    for _id, spdx_search in enumerate(['sC', 'o.sC', 'hello.s', 'ever/hel',
+        'fake', 'one', 'nope'], start=1):
+      self.retriever.addSubproject(name=f'sub{_id}', spdx_search=spdx_search,
+        _id=_id)
     self.retriever.setDatestr(datestr='2018-03')
     self.retriever.prepareFiles()
-    expected = [
-      mock.call('/tmp/fake/whatever/fileone.spdx', 'sC', '2018-03'),
-      mock.call('/tmp/fake/whatever/filetwo', 'sC', '2018-03'),
-      mock.call('/tmp/fake/whatever/hello.sC.blah2018-03-17.blah.spdx', 'sC', '2018-03'),
-    ]
-    self.assertEqual(expected, mock_testfilename.call_args_list)
+    matched = {spdx_search: matches for spdx_search, (name, _id, matches)
+      in self.retriever.subprojects.items()}
+    path = '/tmp/fake/whatever/hello.sC.blah2018-03-17.blah.spdx'
+    self.assertEqual({'sC': [path], 'o.sC': [path], 'hello.s': [path],
+      'ever/hel': [path], 'fake': [path], 'one': [], 'nope': []}, matched)
 
   @mock.patch("slm.retriever.os.path.isdir", return_value=True)
-  @mock.patch("slm.retriever.os.path.isfile", side_effect=side_effect_isfile)
-  @mock.patch("slm.retriever.os.listdir", return_value=TALL)
-  def test_prepare_adds_matches_to_subproject(self, mock_listdir, mock_isfile, mock_isdir):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(TALL, TFILES))
+  def test_prepare_adds_matches_to_subproject(self, mock_scandir, mock_isdir):
     self.retriever.setSearchDir('/tmp/fake/whatever')
     self.retriever.addSubproject(name='subC', spdx_search='sC', _id=1)
     self.retriever.setDatestr(datestr='2018-03')
@@ -251,6 +265,164 @@ class RetrieverTestSuite(unittest.TestCase):
       self.retriever.subprojects
     )
 
+  def _makeNestedSearchDir(self, td):
+    td.write("top-hello-2018-03-01.spdx", b"top")
+    td.write("day02/hello-2018-03-02.spdx", b"day02")
+    td.write("day02/deeper/hello-2018-03-03.spdx", b"deeper")
+    td.write("day02/notes.txt", b"notes")
+    # a tar.gz and a zip drop, each with a nested SPDX file
+    tarPath = os.path.join(td.path, "day02", "batch.tar.gz")
+    with tarfile.open(tarPath, "w:gz") as tar:
+      data = b"from tar"
+      info = tarfile.TarInfo("out/goodbye-2018-03-04.spdx")
+      info.size = len(data)
+      tar.addfile(info, io.BytesIO(data))
+    zipPath = os.path.join(td.path, "batch.zip")
+    with zipfile.ZipFile(zipPath, "w") as zf:
+      zf.writestr("out/bonjour-2018-03-05.spdx", b"from zip")
+      zf.writestr("out/readme.txt", b"readme")
+    return (tarPath, zipPath)
+
+  def test_get_files_only_lists_top_level_by_default(self):
+    with TempDirectory() as td:
+      self._makeNestedSearchDir(td)
+      files = self.retriever._getFiles(search_dir=td.path)
+    self.assertEqual(["batch.zip", "top-hello-2018-03-01.spdx"], files)
+
+  def test_get_files_can_walk_subdirectories_to_max_depth(self):
+    with TempDirectory() as td:
+      self._makeNestedSearchDir(td)
+      self.retriever.setMaxDepth(1)
+      files = self.retriever._getFiles(search_dir=td.path)
+      self.assertEqual(["batch.zip", "top-hello-2018-03-01.spdx",
+        "day02/batch.tar.gz", "day02/hello-2018-03-02.spdx",
+        "day02/notes.txt"], files)
+      self.retriever.setMaxDepth(None)
+      files = self.retriever._getFiles(search_dir=td.path)
+      self.assertIn("day02/deeper/hello-2018-03-03.spdx", files)
+
+  def test_cannot_set_invalid_max_depth_or_globs(self):
+    with self.assertRaises(RetrieverConfigError):
+      self.retriever.setMaxDepth(-1)
+    with self.assertRaises(RetrieverConfigError):
+      self.retriever.setMaxDepth("2")
+    with self.assertRaises(RetrieverConfigError):
+      self.retriever.setGlobs(["*.spdx", ""])
+
+  def test_prepare_only_includes_files_matching_globs(self):
+    with TempDirectory() as td:
+      self._makeNestedSearchDir(td)
+      self.retriever.setSearchDir(td.path)
+      self.retriever.setMaxDepth(None)
+      self.retriever.setGlobs(["*-03-02.spdx", "*-03-03.spdx"])
+      self.retriever.addSubproject(name='hello', spdx_search='hello', _id=1)
+      self.retriever.setDatestr(datestr='2018-03')
+      self.retriever.prepareFiles()
+      matches = self.retriever.subprojects['hello'][2]
+      self.assertEqual([os.path.join(td.path, "day02/hello-2018-03-02.spdx"),
+        os.path.join(td.path, "day02/deeper/hello-2018-03-03.spdx")], matches)
+
+  def test_prepare_ignores_archives_unless_requested(self):
+    with TempDirectory() as td:
+      self._makeNestedSearchDir(td)
+      self.retriever.setSearchDir(td.path)
+      self.retriever.setMaxDepth(None)
+      self.retriever.addSubproject(name='goodbye', spdx_search='goodbye', _id=1)
+      self.retriever.setDatestr(datestr='2018-03')
+      self.retriever.prepareFiles()
+    self.assertEqual([], self.retriever.subprojects['goodbye'][2])
+    self.assertEqual({}, self.retriever.archiveMembers)
+
+  def test_can_retrieve_spdx_files_from_archives(self):
+    with TempDirectory() as td, TempDirectory() as projectDir:
+      tarPath, zipPath = self._makeNestedSearchDir(td)
+      for name in ['goodbye', 'bonjour']:
+        projectDir.makedir(f"subprojects/{name}/spdx")
+      self.retriever.setSearchDir(td.path)
+      self.retriever.setProjectDir(projectDir.path)
+      self.retriever.setMaxDepth(None)
+      self.retriever.setSearchArchives(True)
+      self.retriever.addSubproject(name='goodbye', spdx_search='goodbye', _id=1)
+      self.retriever.addSubproject(name='bonjour', spdx_search='bonjour', _id=2)
+      self.retriever.setDatestr(datestr='2018-03')
+      self.retriever.prepareFiles()
+
+      tarMember = os.path.join(tarPath, "out/goodbye-2018-03-04.spdx")
+      zipMember = os.path.join(zipPath, "out/bonjour-2018-03-05.spdx")
+      self.assertEqual({
+        tarMember: (tarPath, "out/goodbye-2018-03-04.spdx"),
+        zipMember: (zipPath, "out/bonjour-2018-03-05.spdx"),
+      }, self.retriever.archiveMembers)
+
+      self.retriever.createResults()
+      self.retriever.moveFiles()
+      self.assertEqual([], self.retriever.results["error"])
+      self.assertEqual(2, len(self.retriever.results["success"]))
+      self.assertEqual(b"from tar", projectDir.read(
+        "subprojects/goodbye/spdx/goodbye-2018-03-04.spdx"))
+      self.assertEqual(b"from zip", projectDir.read(
+        "subprojects/bonjour/spdx/bonjour-2018-03-05.spdx"))
+      # and the archives are left in place
+      self.assertTrue(os.path.isfile(tarPath))
+      self.assertTrue(os.path.isfile(zipPath))
+
+  def test_failed_extraction_is_reported_with_its_reason(self):
+    with TempDirectory() as td, TempDirectory() as projectDir:
+      tarPath, zipPath = self._makeNestedSearchDir(td)
+      projectDir.makedir("subprojects/bonjour/spdx")
+      self.retriever.setSearchDir(td.path)
+      self.retriever.setProjectDir(projectDir.path)
+      self.retriever.setMaxDepth(None)
+      self.retriever.setSearchArchives(True)
+      self.retriever.addSubproject(name='bonjour', spdx_search='bonjour', _id=2)
+      self.retriever.setDatestr(datestr='2018-03')
+      self.retriever.prepareFiles()
+      self.retriever.createResults()
+      # the archive is damaged after it was listed
+      with open(zipPath, "wb") as f:
+        f.write(b"not a zip any more")
+      self.retriever.moveFiles()
+
+      zipMember = os.path.join(zipPath, "out/bonjour-2018-03-05.spdx")
+      self.assertEqual([], self.retriever.results["success"])
+      self.assertEqual(1, len(self.retriever.failedTransfers))
+      _id, name, message = self.retriever.failedTransfers[0]
+      self.assertEqual('bonjour', name)
+      self.assertEqual(f'Cannot extract {zipMember} for project bonjour (File is not a zip file)', message)
+      self.assertEqual(self.retriever.failedTransfers,
+        self.retriever.results["error"])
+
+  def test_prepare_skips_unreadable_archives(self):
+    with TempDirectory() as td:
+      td.write("broken.tar.gz", b"not really a tarball")
+      self.retriever.setSearchDir(td.path)
+      self.retriever.setSearchArchives(True)
+      self.retriever.addSubproject(name='hello', spdx_search='hello', _id=1)
+      self.retriever.setDatestr(datestr='2018-03')
+      self.retriever.prepareFiles()
+      self.assertEqual(1, len(self.retriever.unreadableArchives))
+      self.assertEqual(os.path.join(td.path, "broken.tar.gz"),
+        self.retriever.unreadableArchives[0][0])
+
+  def test_search_matcher_finds_all_patterns_in_one_scan(self):
+    matcher = _SearchMatcher(['he', 'she', 'his', 'hers', 'x'])
+    state, found = matcher.scan("ushers")
+    self.assertEqual({'he', 'she', 'hers'}, found)
+    state, found = matcher.scan("is", matcher.scan("h")[0])
+    self.assertEqual({'his'}, found)
+    self.assertEqual(set(), matcher.scan("")[1])
+
+  def test_date_search_finds_valid_day_after_first_date_string(self):
+    dateSearch = _DateSearch("2018-02")
+    self.assertEqual("28", dateSearch.findDay("a-2018-02-28.spdx"))
+    self.assertEqual("05", dateSearch.findDay("2018-02-05-2018-02-09.spdx"))
+    self.assertIsNone(dateSearch.findDay("a-2018-02-29.spdx"))
+    self.assertIsNone(dateSearch.findDay("a-2018-02-00.spdx"))
+    self.assertIsNone(dateSearch.findDay("a-2018-02-5.spdx"))
+    self.assertIsNone(dateSearch.findDay("a-2018-02.spdx"))
+    # only the first occurrence counts
+    self.assertIsNone(dateSearch.findDay("2018-02.2018-02-05.spdx"))
+
   def test_create_results_fails_if_files_not_prepared(self):
     with self.assertRaises(RetrieverNotReadyError):
       self.retriever.createResults()
@@ -261,9 +433,8 @@ class RetrieverTestSuite(unittest.TestCase):
       self.retriever.createResults()
 
   @mock.patch("slm.retriever.os.path.isdir", return_value=True)
-  @mock.patch("slm.retriever.os.path.isfile", return_value=True)
-  @mock.patch("slm.retriever.os.listdir", return_value=MOVEFILES)
-  def test_create_results_fails_if_project_dir_not_set(self, mock_listdir, mock_isfile, mock_isdir):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(MOVEFILES, MOVEFILES))
+  def test_create_results_fails_if_project_dir_not_set(self, mock_scandir, mock_isdir):
     for name, _id, spdx_search in MOVE_SUBPROJECTS:
       self.retriever.addSubproject(name=name, _id=_id, spdx_search=spdx_search)
     self.retriever.setSearchDir('/tmp/fake/src')
@@ -273,9 +444,8 @@ class RetrieverTestSuite(unittest.TestCase):
       self.retriever.createResults()
 
   @mock.patch("slm.retriever.os.path.isdir", return_value=True)
-  @mock.patch("slm.retriever.os.path.isfile", return_value=True)
-  @mock.patch("slm.retriever.os.listdir", return_value=MOVEFILES)
-  def test_can_create_results_actions(self, mock_listdir, mock_isfile, mock_isdir):
+  @mock.patch("slm.retriever.os.scandir", side_effect=fake_scandir(MOVEFILES, MOVEFILES))
+  def test_can_create_results_actions(self, mock_scandir, mock_isdir):
     for name, _id, spdx_search in MOVE_SUBPROJECTS:
       self.retriever.addSubproject(name, _id=_id, spdx_search=spdx_search)
     self.retriever.setSearchDir('/tmp/fake/src')
@@ -313,7 +483,7 @@ class RetrieverTestSuite(unittest.TestCase):
       self.retriever._makeDstFilename(srcPath="2018-03-40.spdx",
         spdx_search='a', datestr="2018-03", subproject_name='b')
 
-  @mock.patch("slm.retriever.shutil.move")
+  @mock.patch("slm.retriever.os.rename")
   def test_can_move_files(self, mock_move):
     self.retriever.results["success"] = [
       (1, 'hello', '/tmp/fake/src/junk.hello.junk.2018-03-12.spdx', '/tmp/fake/dst/subprojects/hello/spdx/hello-2018-03-12.spdx')
@@ -322,13 +492,80 @@ class RetrieverTestSuite(unittest.TestCase):
     self.retriever.moveFiles()
     mock_move.assert_called_with('/tmp/fake/src/junk.hello.junk.2018-03-12.spdx', '/tmp/fake/dst/subprojects/hello/spdx/hello-2018-03-12.spdx')
 
-  @mock.patch("slm.retriever.shutil.move")
+  def _setUpCrossFilesystemMove(self, src, dst, contents):
+    # the rename fails as it would across filesystems, so the file is copied
+    with open(os.path.join(src.path, "hello-2018-03-12.spdx"), "wb") as f:
+      f.write(contents)
+    self.retriever.results["success"] = [
+      (1, 'hello', os.path.join(src.path, "hello-2018-03-12.spdx"),
+        os.path.join(dst.path, "hello-2018-03-12.spdx"))
+    ]
+    self.retriever.results["error"] = []
+    return mock.patch("slm.retriever.os.rename",
+      side_effect=OSError(errno.EXDEV, "Invalid cross-device link"))
+
+  def test_can_move_files_across_filesystems_with_verified_copy(self):
+    contents = b"SPDXVersion: SPDX-2.1\n" * 100000
+    with TempDirectory() as src, TempDirectory() as dst:
+      with self._setUpCrossFilesystemMove(src, dst, contents):
+        self.retriever.setCopyWorkers(2)
+        self.retriever.moveFiles()
+      self.assertEqual([], self.retriever.results["error"])
+      self.assertEqual(1, len(self.retriever.results["success"]))
+      self.assertEqual(contents, dst.read("hello-2018-03-12.spdx"))
+      self.assertEqual(["hello-2018-03-12.spdx"], os.listdir(dst.path))
+      self.assertEqual([], os.listdir(src.path))
+    self.assertEqual(1, self.retriever.copyStats["files"])
+    self.assertEqual(len(contents), self.retriever.copyStats["bytes"])
+
+  def test_copy_resumes_from_matching_partial_file(self):
+    contents = b"0123456789" * 1000
+    with TempDirectory() as src, TempDirectory() as dst:
+      dst.write(".hello-2018-03-12.spdx.slm-partial", contents[:4000])
+      with self._setUpCrossFilesystemMove(src, dst, contents):
+        self.retriever.moveFiles()
+      self.assertEqual(contents, dst.read("hello-2018-03-12.spdx"))
+    # only the rest of the file was copied
+    self.assertEqual(6000, self.retriever.copyStats["bytes"])
+
+  def test_copy_starts_again_if_partial_file_does_not_match(self):
+    contents = b"0123456789" * 1000
+    with TempDirectory() as src, TempDirectory() as dst:
+      dst.write(".hello-2018-03-12.spdx.slm-partial", b"something else")
+      with self._setUpCrossFilesystemMove(src, dst, contents):
+        self.retriever.moveFiles()
+      self.assertEqual(contents, dst.read("hello-2018-03-12.spdx"))
+    self.assertEqual(10000, self.retriever.copyStats["bytes"])
+
+  def test_source_is_kept_if_copy_does_not_verify(self):
+    with TempDirectory() as src, TempDirectory() as dst:
+      srcPath = os.path.join(src.path, "hello-2018-03-12.spdx")
+      with self._setUpCrossFilesystemMove(src, dst, b"contents"):
+        # the copy is corrupted on its way to the destination
+        realOpen = open
+        def corruptingOpen(path, mode="r", *args, **kwargs):
+          f = realOpen(path, mode, *args, **kwargs)
+          if mode == "ab+":
+            realWrite = f.write
+            f.write = lambda b: realWrite(b.upper())
+          return f
+        with mock.patch("builtins.open", side_effect=corruptingOpen):
+          self.retriever.moveFiles()
+      self.assertEqual([(1, 'hello', f'Cannot move to project hello (copy of {srcPath} did not match the original)')],
+        self.retriever.results["error"])
+      self.assertEqual([], self.retriever.results["success"])
+      self.assertTrue(os.path.isfile(srcPath))
+      self.assertEqual([], os.listdir(dst.path))
+      self.assertEqual(self.retriever.results["error"],
+        self.retriever.failedTransfers)
+
+  @mock.patch("slm.retriever.os.rename")
   def test_cannot_move_files_before_results_are_set(self, mock_move):
     with self.assertRaises(RetrieverNotReadyError):
       self.retriever.moveFiles()
 
   @mock.patch("slm.retriever.os.path.isfile", return_value=True)
-  @mock.patch("slm.retriever.shutil.move")
+  @mock.patch("slm.retriever.os.rename")
   def test_cannot_move_files_if_already_present_in_dst(self, mock_move, mock_isfile):
     self.retriever.results["success"] = [
       (1, 'hello', '/tmp/fake/src/junk.hello.junk.2018-03-12.spdx', '/tmp/fake/dst/subprojects/hello/spdx/hello-2018-03-12.spdx')
@@ -232,3 +232,47 @@ class SLMManagerTestSuite(unittest.TestCase):
   def test_can_check_if_json_report_is_absent(self, os_isfile):
     retval = self.manager.isJSONForMonth("frotz", "f1", "2017-02")
     self.assertFalse(retval)
+
+  @mock.patch('slm.slmmanager.ProjectDB')
+  def test_can_get_project_status_items_from_directory_listings(self,
+      projectdb):
+    projectdb.return_value = self.frotz_db
+    listings = {
+      "/tmp/fake/whatever/projects/frotz/subprojects/f1/spdx":
+        {"f1-2017-02-03.spdx", "notes.txt"},
+      "/tmp/fake/whatever/projects/frotz/subprojects/f2/reports":
+        {"f2-2017-02-17.xlsx", "f2-2017-01-10.json",
+         "f2-2017-01-10.compact.json", "f1-2017-01-10.json"},
+    }
+    with mock.patch.object(self.frotz_db, 'openDB'):
+      with mock.patch.object(self.manager, 'listFilenames',
+          side_effect=lambda path: listings.get(path, set())) as listFilenames:
+        subprojects, items = self.manager.getProjectStatusItems("frotz")
+    # each subproject's two directories are listed once
+    self.assertEqual(listFilenames.call_count, 6)
+    self.assertEqual(subprojects, ["f1", "f2", "f3"])
+    self.assertEqual(items, [
+      ("f1", "scan", "2017-02-03"),
+      ("f1", "spdx", "2017-02-03"),
+      ("f2", "json", "2017-01-10"),
+      ("f2", "scan", "2017-01-10"),
+      ("f2", "scan", "2017-02-10"),
+      ("f2", "scan", "2017-02-17"),
+      ("f2", "xlsx", "2017-02-17"),
+    ])
+
+  def test_listing_missing_directory_returns_empty_set(self):
+    self.assertEqual(self.manager.listFilenames("/tmp/fake/whatever/nope"),
+      set())
+
+  def test_can_get_months_in_range(self):
+    months = self.manager.getMonthsInRange("2017-11", "2018-02")
+    self.assertEqual(months, ["2017-11", "2017-12", "2018-01", "2018-02"])
+    self.assertEqual(self.manager.getMonthsInRange("2017-11", "2017-11"),
+      ["2017-11"])
+
+  def test_cannot_get_months_in_reversed_or_invalid_range(self):
+    with self.assertRaises(SLMManagerError):
+      self.manager.getMonthsInRange("2018-02", "2017-11")
+    with self.assertRaises(SLMManagerError):
+      self.manager.getMonthsInRange("2018-2-1", "2018-03")
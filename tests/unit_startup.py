@@ -0,0 +1,72 @@
+# tests/unit_startup.py
+#
+# Unit test for spdxLicenseManager: fast CLI startup.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import subprocess
+import sys
+import unittest
+
+# modules that should only be imported once a command that needs them runs
+HEAVY_MODULES = ["sqlalchemy", "openpyxl", "tabulate", "slm.projectdb",
+  "slm.reports", "slm.commands"]
+
+class StartupTestSuite(unittest.TestCase):
+  """spdxLicenseManager CLI startup unit test suite."""
+
+  def getImportedModules(self, code):
+    # run code in a fresh interpreter, and use -X importtime to find out
+    # which modules it imported
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = root
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+      cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+      universal_newlines=True)
+    self.assertEqual(0, result.returncode, result.stderr)
+    modules = set()
+    for line in result.stderr.splitlines():
+      if line.startswith("import time:") and line.count("|") == 2:
+        modules.add(line.split("|")[2].strip())
+    return modules
+
+  def assertNoHeavyModules(self, modules):
+    for module in modules:
+      for heavy in HEAVY_MODULES:
+        self.assertFalse(module == heavy or module.startswith(heavy + "."),
+          f"{module} was imported at startup")
+
+  ##### Test cases below
+
+  def test_importing_cli_does_not_import_heavy_modules(self):
+    modules = self.getImportedModules("import slm.slm")
+    self.assertIn("slm.slm", modules)
+    self.assertNoHeavyModules(modules)
+
+  def test_cli_help_does_not_import_heavy_modules(self):
+    modules = self.getImportedModules(
+      "from slm.slm import cli; cli(['--help'], standalone_mode=False)")
+    self.assertNoHeavyModules(modules)
+
+  def test_command_imports_its_modules_when_run(self):
+    modules = self.getImportedModules(
+      "from slm.slm import cli; cli(['list'], standalone_mode=False)")
+    self.assertIn("slm.commands.cmdList", modules)
+    self.assertNotIn("slm.commands.cmdCreateReport", modules)
+    self.assertNotIn("openpyxl", modules)
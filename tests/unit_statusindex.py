@@ -0,0 +1,142 @@
+# tests/unit_statusindex.py
+#
+# Unit test for spdxLicenseManager: status index.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import unittest
+from testfixtures import TempDirectory
+
+from slm.statusIndex import StatusIndex, getItemForFilename
+
+class StatusIndexTestSuite(unittest.TestCase):
+  """spdxLicenseManager status index unit test suite."""
+
+  def setUp(self):
+    self.td = TempDirectory()
+    self.slmhome = self.td.path
+    self.index = StatusIndex(self.slmhome)
+
+  def tearDown(self):
+    self.td.cleanup()
+
+  def rebuildSample(self):
+    self.index.rebuild([
+      ("frotz", ["f1", "f2"], [
+        ("f1", "scan", "2018-01-05"),
+        ("f1", "spdx", "2018-01-05"),
+        ("f1", "json", "2018-01-05"),
+        ("f2", "scan", "2018-02-06"),
+        ("f2", "spdx", "2018-02-01"),
+        ("f2", "xlsx", "2018-02-06"),
+      ]),
+      ("rezrov", ["r1"], []),
+    ])
+
+  def subprojectPath(self, project, subproject, folder, filename):
+    return os.path.join(self.slmhome, "projects", project, "subprojects",
+      subproject, folder, filename)
+
+  ##### Test cases below
+
+  def test_can_get_items_for_subproject_filenames(self):
+    self.assertEqual(getItemForFilename("f1", "spdx", "f1-2018-01-05.spdx"),
+      ("f1", "spdx", "2018-01-05"))
+    self.assertEqual(getItemForFilename("f1", "reports", "f1-2018-01-05.json"),
+      ("f1", "json", "2018-01-05"))
+    self.assertEqual(getItemForFilename("f1", "reports", "f1-2018-01-05.xlsx"),
+      ("f1", "xlsx", "2018-01-05"))
+
+  def test_ignores_other_filenames(self):
+    self.assertIsNone(getItemForFilename("f1", "reports", "f1-2018-01-05.csv"))
+    self.assertIsNone(getItemForFilename("f1", "reports",
+      "f1-2018-01-05.compact.json"))
+    self.assertIsNone(getItemForFilename("f1", "reports", "f2-2018-01-05.json"))
+    self.assertIsNone(getItemForFilename("f1", "reports", "f1-latest.json"))
+    self.assertIsNone(getItemForFilename("f1", "spdx", "f1-2018-01-05.json"))
+    self.assertIsNone(getItemForFilename("f1", "spdx", "f1-2018-01-05"))
+
+  def test_can_get_status_for_months_after_rebuild(self):
+    self.assertFalse(self.index.exists())
+    self.rebuildSample()
+    self.assertTrue(self.index.exists())
+    rows = self.index.getStatusForMonths(["rezrov", "frotz"],
+      ["2018-01", "2018-02"])
+    self.assertEqual(rows, [
+      ["rezrov", "r1", {
+        "2018-01": (False, False, False, False),
+        "2018-02": (False, False, False, False),
+      }],
+      ["frotz", "f1", {
+        "2018-01": (True, True, True, False),
+        "2018-02": (False, False, False, False),
+      }],
+      # SPDX file only counts if it is for a scan's date
+      ["frotz", "f2", {
+        "2018-01": (False, False, False, False),
+        "2018-02": (False, True, False, True),
+      }],
+    ])
+
+  def test_status_omits_projects_not_requested(self):
+    self.rebuildSample()
+    rows = self.index.getStatusForMonths(["frotz"], ["2018-01"])
+    self.assertEqual([row[1] for row in rows], ["f1", "f2"])
+
+  def test_can_record_new_items(self):
+    self.rebuildSample()
+    self.index.recordSubproject("rezrov", "r2")
+    self.index.recordScans("rezrov", [("r2", "2018-03-09")])
+    self.index.recordPaths("rezrov", [
+      self.subprojectPath("rezrov", "r2", "spdx", "r2-2018-03-09.spdx"),
+      self.subprojectPath("rezrov", "r2", "reports", "r2-2018-03-09.json"),
+      # not indexed
+      self.subprojectPath("rezrov", "r2", "reports", "r2-2018-03-09.csv"),
+      os.path.join(self.slmhome, "elsewhere", "r2-2018-03-09.xlsx"),
+    ])
+    rows = self.index.getStatusForMonths(["rezrov"], ["2018-03"])
+    self.assertEqual(rows, [
+      ["rezrov", "r1", {"2018-03": (False, False, False, False)}],
+      ["rezrov", "r2", {"2018-03": (True, True, True, False)}],
+    ])
+
+  def test_recording_twice_is_harmless(self):
+    self.rebuildSample()
+    self.index.recordScans("frotz", [("f1", "2018-01-05")])
+    self.index.recordSubproject("frotz", "f1")
+    rows = self.index.getStatusForMonths(["frotz"], ["2018-01"])
+    self.assertEqual(rows[0], ["frotz", "f1",
+      {"2018-01": (True, True, True, False)}])
+
+  def test_nothing_is_recorded_without_an_index(self):
+    self.index.recordScans("frotz", [("f1", "2018-01-05")])
+    self.assertFalse(self.index.exists())
+
+  def test_unusable_index_is_removed_when_recording(self):
+    with open(self.index.path, "w") as f:
+      f.write("not a database")
+    self.index.recordScans("frotz", [("f1", "2018-01-05")])
+    self.assertFalse(self.index.exists())
+
+  def test_rebuild_replaces_existing_index(self):
+    self.rebuildSample()
+    self.index.rebuild([("frotz", ["f3"], [])])
+    rows = self.index.getStatusForMonths(["frotz", "rezrov"], ["2018-01"])
+    self.assertEqual(rows, [
+      ["frotz", "f3", {"2018-01": (False, False, False, False)}],
+    ])
@@ -0,0 +1,133 @@
+# tests/unit_watcher.py
+#
+# Unit test for spdxLicenseManager: watching for new SPDX files.
+#
+# Copyright (C) The Linux Foundation
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import unittest
+from unittest import mock
+from testfixtures import TempDirectory
+
+from slm.datatypes import Category, License
+from slm.projectdb import ProjectDB
+from slm.watcher import ProjectWatcher, WatchLedger
+
+PATH_ALL_KNOWN = "tests/testfiles/simpleAllKnown.spdx"
+
+class WatcherTestSuite(unittest.TestCase):
+  """spdxLicenseManager SPDX watcher unit test suite."""
+
+  def setUp(self):
+    # set up temp directories for the SLM home and the search directory
+    self.slmhome = TempDirectory()
+    self.slmhome.makedir("projects/prj/subprojects/sub1/spdx")
+    self.searchDir = TempDirectory()
+
+    # create and initialize an in-memory database
+    self.db = ProjectDB()
+    self.db.createDB(":memory:")
+    self.db.initializeDBTables()
+    self.db.session.add(Category(_id=1, name="a category", order=1))
+    self.db.session.add(License(_id=1, name="BSD-2-Clause", category_id=1))
+    self.db.session.add(License(_id=2, name="MIT", category_id=1))
+    self.db.session.commit()
+    self.db.addSubproject("sub1", "subproject 1")
+    self.db.setConfigValue(key="spdx-search-dir", value=self.searchDir.path)
+
+  def tearDown(self):
+    self.db.closeDB()
+    self.db = None
+    self.searchDir.cleanup()
+    self.slmhome.cleanup()
+
+  def _newWatcher(self, settle=30):
+    return ProjectWatcher(self.slmhome.path, "prj", settle=settle)
+
+  def _dropFile(self, name):
+    shutil.copy(PATH_ALL_KNOWN, os.path.join(self.searchDir.path, name))
+
+  ##### Test cases below
+
+  def test_ledger_records_files_by_size_and_mtime(self):
+    projectDir = os.path.join(self.slmhome.path, "projects", "prj")
+    ledger = WatchLedger(projectDir)
+    self.assertFalse(ledger.isSeen("a.spdx", (10, 100.0)))
+    ledger.record("a.spdx", (10, 100.0), "retrieved")
+    ledger.record("b.spdx", (20, 100.0), "ignored")
+    self.assertTrue(ledger.isSeen("a.spdx", (10, 100.0)))
+    self.assertFalse(ledger.isSeen("a.spdx", (11, 100.0)))
+    self.assertFalse(ledger.isSeen("a.spdx", (10, 101.0)))
+    ledger.prune({"b.spdx": (20, 100.0)})
+    ledger.save()
+
+    # and a new ledger for the same project loads it
+    ledger = WatchLedger(projectDir)
+    self.assertFalse(ledger.isSeen("a.spdx", (10, 100.0)))
+    self.assertTrue(ledger.isSeen("b.spdx", (20, 100.0)))
+    self.assertEqual("ignored", ledger.entries["b.spdx"]["status"])
+
+  def test_new_file_is_retrieved_once_unchanged_since_last_poll(self):
+    self._dropFile("sub1-2018-03-21.spdx")
+    watcher = self._newWatcher()
+    # just modified, so not yet stable
+    self.assertEqual([], watcher.poll(self.db))
+    # unchanged at the next poll, so it's retrieved and imported
+    messages = watcher.poll(self.db)
+    self.assertEqual([
+      "Retrieved sub1-2018-03-21.spdx to sub1 (new name: sub1-2018-03-21.spdx)",
+      "Imported 4 files from sub1-2018-03-21.spdx to sub1 (scan ID 1)",
+    ], messages)
+    self.assertTrue(os.path.isfile(os.path.join(self.slmhome.path, "projects",
+      "prj", "subprojects", "sub1", "spdx", "sub1-2018-03-21.spdx")))
+
+  def test_file_still_changing_is_not_retrieved(self):
+    self._dropFile("sub1-2018-03-21.spdx")
+    watcher = self._newWatcher()
+    self.assertEqual([], watcher.poll(self.db))
+    with open(os.path.join(self.searchDir.path, "sub1-2018-03-21.spdx"), "a") as f:
+      f.write("\n")
+    self.assertEqual([], watcher.poll(self.db))
+
+  def test_file_last_modified_before_settle_time_is_retrieved_at_once(self):
+    self._dropFile("sub1-2018-03-21.spdx")
+    path = os.path.join(self.searchDir.path, "sub1-2018-03-21.spdx")
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime - 60))
+    messages = self._newWatcher().poll(self.db)
+    self.assertEqual(2, len(messages))
+
+  def test_restarted_watcher_does_not_handle_files_again(self):
+    # this file matches no subproject, so it stays in the search directory
+    self._dropFile("other-2018-03-21.spdx")
+    self._dropFile("undated.spdx")
+    watcher = self._newWatcher(settle=0)
+    self.assertEqual([], watcher.poll(self.db))
+    ledgerPath = os.path.join(self.slmhome.path, "projects", "prj",
+      WatchLedger.FILENAME)
+    self.assertTrue(os.path.isfile(ledgerPath))
+
+    # a new watcher skips both files, even though they are stable
+    watcher = self._newWatcher(settle=0)
+    with mock.patch("slm.watcher.Retriever") as retriever_mock:
+      self.assertEqual([], watcher.poll(self.db))
+      retriever_mock.assert_not_called()
+
+  def test_poll_does_nothing_if_search_dir_not_set(self):
+    self.db.unsetConfigValue(key="spdx-search-dir")
+    self._dropFile("sub1-2018-03-21.spdx")
+    self.assertEqual([], self._newWatcher(settle=0).poll(self.db))